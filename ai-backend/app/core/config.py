@@ -11,6 +11,21 @@ class Settings(BaseSettings):
     # AI Models
     SENTENCE_TRANSFORMER_MODEL: str = "all-MiniLM-L6-v2"
     BERT_MODEL: str = "distilbert-base-uncased"
+    # Token-classification checkpoint fine-tuned for timetable spans; empty disables the tagger
+    COURSE_SPAN_MODEL: str = os.getenv("COURSE_SPAN_MODEL", "")
+    COURSE_SPAN_BATCH_SIZE: int = int(os.getenv("COURSE_SPAN_BATCH_SIZE", "64"))
+    
+    # Load bert-base-uncased for Graph-BERT keyword extraction (off: ~440MB saved per worker)
+    ENABLE_BERT_KEYWORDS: bool = os.getenv("ENABLE_BERT_KEYWORDS", "false").lower() == "true"
+    
+    # Resume bio summarizer; sshleifer/distilbart-cnn-12-6 or -6-6 trade a little
+    # quality for speed (compare with scripts/bench_summarizers.py)
+    SUMMARIZER_MODEL: str = os.getenv("SUMMARIZER_MODEL", "facebook/bart-large-cnn")
+    SUMMARIZER_BATCH_SIZE: int = int(os.getenv("SUMMARIZER_BATCH_SIZE", "8"))
+    
+    # Inference backend for all transformer models: torch, torch-int8, onnx, onnx-int8
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "torch")
+    INFERENCE_CACHE_DIR: str = os.getenv("INFERENCE_CACHE_DIR", "models/onnx")
     
     # File Storage
     UPLOAD_DIR: str = "uploads"
@@ -32,6 +47,7 @@ class Settings(BaseSettings):
     
     # API Keys
     GITHUB_TOKEN: str = os.getenv("GITHUB_TOKEN", "")
+    GITHUB_API_URL: str = os.getenv("GITHUB_API_URL", "https://api.github.com")
     
     class Config:
         env_file = ".env"
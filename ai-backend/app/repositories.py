@@ -0,0 +1,294 @@
+"""
+MongoDB Repositories
+The queries each collection serves, with field projections and the indexes
+they rely on. Indexes are created by ensure_indexes(), which main.py runs as
+a background task at startup.
+
+Every repository call is timed into query_stats (count, total and max
+milliseconds per query); calls slower than MONGO_SLOW_QUERY_MS are logged.
+"""
+import asyncio
+import functools
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+
+from app.database import mongo_db
+
+logger = logging.getLogger(__name__)
+
+class QueryStats:
+    """Per-query latency counters"""
+
+    def __init__(self, slow_ms: float = 200.0):
+        self.slow_ms = slow_ms
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, seconds: float):
+        elapsed_ms = seconds * 1000
+        stats = self._stats.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if elapsed_ms > self.slow_ms:
+            logger.warning(f"Slow query {name}: {elapsed_ms:.1f} ms")
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "count": int(stats["count"]),
+                "avg_ms": round(stats["total_ms"] / stats["count"], 2),
+                "max_ms": round(stats["max_ms"], 2),
+                "total_ms": round(stats["total_ms"], 2)
+            }
+            for name, stats in sorted(self._stats.items())
+        }
+
+    def reset(self):
+        self._stats.clear()
+
+# Global instance
+query_stats = QueryStats(slow_ms=float(os.getenv('MONGO_SLOW_QUERY_MS', '200')))
+
+def timed(method):
+    """Record a repository coroutine's latency as '<collection>.<method>'"""
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(self, *args, **kwargs)
+        finally:
+            query_stats.record(f"{self.collection_name}.{name}", time.perf_counter() - started)
+    return wrapper
+
+class Repository:
+    """Base class: one collection and the indexes its queries need"""
+
+    collection_name = ""
+    indexes: List[IndexModel] = []
+
+    def __init__(self, database=None):
+        self.database = database
+
+    @property
+    def collection(self):
+        return self.database[self.collection_name]
+
+    async def ensure_indexes(self):
+        if self.indexes:
+            await self.collection.create_indexes(self.indexes)
+
+class UserProfileRepository(Repository):
+    collection_name = "user_profiles"
+    indexes = [IndexModel([("userId", ASCENDING)], name="userId")]
+
+    # Fields the profile completeness checks read
+    COMPLETENESS_FIELDS = {
+        "_id": 0, "personalInfo": 1, "academicInfo": 1, "skills": 1,
+        "interests": 1, "careerGoals": 1, "experienceLevel": 1
+    }
+    # Fields notifications personalize and deliver with
+    CONTACT_FIELDS = {"_id": 0, "userId": 1, "personalInfo": 1, "skills": 1}
+
+    @timed
+    async def get(self, user_id: str, projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"userId": user_id}, projection or {"_id": 0})
+
+    async def get_contact(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.get(user_id, self.CONTACT_FIELDS)
+
+    async def get_for_completeness(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.get(user_id, self.COMPLETENESS_FIELDS)
+
+    @timed
+    async def find_many(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        return await self.collection.find({"userId": {"$in": user_ids}}, {"_id": 0}).to_list(length=None)
+
+    @timed
+    async def upsert(self, user_id: str, profile_doc: Dict[str, Any]) -> bool:
+        """Create or replace the profile's fields; True when it was created"""
+        result = await self.collection.update_one({"userId": user_id}, {"$set": profile_doc}, upsert=True)
+        return result.upserted_id is not None
+
+    @timed
+    async def update_fields(self, user_id: str, updates: Dict[str, Any],
+                            projection: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        """Apply `updates` and return the updated profile (None if there is no profile)"""
+        return await self.collection.find_one_and_update(
+            {"userId": user_id},
+            {"$set": updates},
+            projection=projection or {"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    @timed
+    async def set_fields(self, user_id: str, fields: Dict[str, Any]) -> int:
+        """Set fields without reading the profile back; returns the matched count"""
+        result = await self.collection.update_one({"userId": user_id}, {"$set": fields})
+        return result.matched_count
+
+class PortfolioRepository(Repository):
+    collection_name = "user_portfolios"
+    indexes = [
+        IndexModel([("userId", ASCENDING)], name="userId"),
+        # Background re-verification picks the stalest portfolios first
+        IndexModel([("oldestVerifiedAt", ASCENDING)], name="oldestVerifiedAt"),
+    ]
+
+    @timed
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"userId": user_id}, {"_id": 0})
+
+    @timed
+    async def find_many(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        return await self.collection.find({"userId": {"$in": user_ids}}, {"_id": 0}).to_list(length=None)
+
+class ExtractedCourseRepository(Repository):
+    collection_name = "extracted_courses"
+    indexes = [IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING)], name="userId_createdAt")]
+
+    # Course documents without the raw OCR text
+    FIELDS = {"_id": 0, "rawText": 0}
+
+    @timed
+    async def for_user(self, user_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        return await self.collection.find({"userId": user_id}, self.FIELDS).limit(limit).to_list(length=limit)
+
+    @timed
+    async def for_users(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        return await self.collection.find({"userId": {"$in": user_ids}}, self.FIELDS).to_list(length=None)
+
+class NotificationLogRepository(Repository):
+    collection_name = "notification_logs"
+    indexes = [
+        IndexModel([("userId", ASCENDING), ("timestamp", DESCENDING)], name="userId_timestamp"),
+        IndexModel([("userId", ASCENDING), ("type", ASCENDING), ("timestamp", DESCENDING)],
+                   name="userId_type_timestamp"),
+    ]
+
+    @timed
+    async def history(self, user_id: str, limit: int = 50, notification_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = {"userId": user_id}
+        if notification_type:
+            query["type"] = notification_type
+        return await self.collection.find(query, {"_id": 0}).sort(
+            "timestamp", DESCENDING
+        ).limit(limit).to_list(length=limit)
+
+class NotificationPreferencesRepository(Repository):
+    collection_name = "notification_preferences"
+    indexes = [IndexModel([("userId", ASCENDING)], name="userId")]
+
+    @timed
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"userId": user_id}, {"_id": 0})
+
+    @timed
+    async def upsert(self, user_id: str, prefs_doc: Dict[str, Any]):
+        await self.collection.update_one({"userId": user_id}, {"$set": prefs_doc}, upsert=True)
+
+class RecommendationRepository(Repository):
+    collection_name = "user_recommendations"
+    indexes = [IndexModel([("userId", ASCENDING), ("timestamp", DESCENDING)], name="userId_timestamp")]
+
+    @timed
+    async def history(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return await self.collection.find({"userId": user_id}, {"_id": 0}).sort(
+            "timestamp", DESCENDING
+        ).limit(limit).to_list(length=limit)
+
+class ResumeHistoryRepository(Repository):
+    collection_name = "resume_history"
+    indexes = [
+        IndexModel([("userId", ASCENDING), ("createdAt", DESCENDING)], name="userId_createdAt"),
+        IndexModel([("userId", ASCENDING), ("resumeId", ASCENDING)], name="userId_resumeId"),
+        IndexModel([("filePath", ASCENDING)], name="filePath"),
+    ]
+
+    @timed
+    async def recent(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        return await self.collection.find({"userId": user_id}, {"_id": 0}).sort(
+            "createdAt", DESCENDING
+        ).limit(limit).to_list(length=limit)
+
+    @timed
+    async def insert(self, metadata: Dict[str, Any]):
+        await self.collection.insert_one(metadata)
+
+    @timed
+    async def delete(self, user_id: str, resume_id: str) -> Optional[Dict[str, Any]]:
+        """Remove one resume entry; returns its file path fields (None if it didn't exist)"""
+        return await self.collection.find_one_and_delete(
+            {"userId": user_id, "resumeId": resume_id},
+            projection={"_id": 0, "filePath": 1}
+        )
+
+    @timed
+    async def referenced_paths(self, paths: List[str]) -> Set[str]:
+        """The subset of `paths` some resume entry still points to"""
+        documents = await self.collection.find({"filePath": {"$in": paths}}, {"_id": 0, "filePath": 1}).to_list(length=None)
+        return {document["filePath"] for document in documents}
+
+class JobRepository(Repository):
+    """State of background jobs, so any API worker can answer a status poll"""
+
+    indexes = [
+        IndexModel([("job_id", ASCENDING)], name="job_id", unique=True),
+        # Finished and abandoned jobs expire after a week
+        IndexModel([("updatedAt", ASCENDING)], name="updatedAt_ttl", expireAfterSeconds=7 * 24 * 3600),
+    ]
+
+    @timed
+    async def save(self, job: Dict[str, Any]):
+        await self.collection.replace_one(
+            {"job_id": job["job_id"]}, {**job, "updatedAt": datetime.utcnow()}, upsert=True
+        )
+
+    @timed
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"job_id": job_id}, {"_id": 0, "updatedAt": 0})
+
+class ResumeJobRepository(JobRepository):
+    collection_name = "resume_jobs"
+
+class TimetableBatchJobRepository(JobRepository):
+    collection_name = "timetable_batch_jobs"
+
+# Global instances
+user_profiles = UserProfileRepository(mongo_db)
+portfolios = PortfolioRepository(mongo_db)
+extracted_courses = ExtractedCourseRepository(mongo_db)
+notification_logs = NotificationLogRepository(mongo_db)
+notification_preferences = NotificationPreferencesRepository(mongo_db)
+recommendations = RecommendationRepository(mongo_db)
+resume_history = ResumeHistoryRepository(mongo_db)
+resume_jobs = ResumeJobRepository(mongo_db)
+timetable_batch_jobs = TimetableBatchJobRepository(mongo_db)
+
+REPOSITORIES = (
+    user_profiles, portfolios, extracted_courses, notification_logs,
+    notification_preferences, recommendations, resume_history, resume_jobs,
+    timetable_batch_jobs
+)
+
+async def ensure_indexes():
+    """
+    Create every repository's indexes (no-op for ones that already exist)
+
+    Collections are handled concurrently and failures are only logged; run
+    it as a background task so an unreachable MongoDB can't hold up startup.
+    """
+    if mongo_db is None:
+        return
+    outcomes = await asyncio.gather(
+        *(repository.ensure_indexes() for repository in REPOSITORIES), return_exceptions=True
+    )
+    for repository, outcome in zip(REPOSITORIES, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning(f"Could not create indexes on {repository.collection_name}: {str(outcome)}")
@@ -1,11 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from app.services.notification_service import NotificationService
-from app.database import get_db, mongo_db
+from app.services.notification_templates import compile_message
+from app.services.notification_dedup import notification_dedup, recipient_key, job_key
+from app.services.write_buffer import log_writer
+from app.database import get_db
+from app import repositories
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List
 from pydantic import BaseModel
 import pandas as pd
+import asyncio
 
 router = APIRouter()
 notification_service = NotificationService()
@@ -115,7 +120,7 @@ async def send_bulk_notifications(
         for user_id in request.user_ids:
             # Get user preferences and contact info
             preferences = await get_user_preferences(user_id)
-            user_profile = await mongo_db.user_profiles.find_one({"userId": user_id})
+            user_profile = await repositories.user_profiles.get_contact(user_id)
             
             if not user_profile:
                 results.append({
@@ -239,11 +244,7 @@ async def update_notification_preferences(
             "updatedAt": {"$date": {"$numberLong": str(int(pd.Timestamp.now().timestamp() * 1000))}}
         }
         
-        await mongo_db.notification_preferences.update_one(
-            {"userId": preferences.user_id},
-            {"$set": prefs_doc},
-            upsert=True
-        )
+        await repositories.notification_preferences.upsert(preferences.user_id, prefs_doc)
         
         return JSONResponse(content={
             "success": True,
@@ -258,7 +259,7 @@ async def get_notification_preferences(user_id: str):
     """Get user notification preferences"""
     
     try:
-        preferences = await mongo_db.notification_preferences.find_one({"userId": user_id})
+        preferences = await repositories.notification_preferences.get(user_id)
         
         if not preferences:
             # Return default preferences
@@ -270,8 +271,6 @@ async def get_notification_preferences(user_id: str):
                 "frequency": "immediate",
                 "categories": ["recommendations", "achievements", "reminders"]
             }
-        else:
-            preferences.pop('_id', None)
         
         return JSONResponse(content={
             "success": True,
@@ -290,17 +289,7 @@ async def get_notification_history(
     """Get user notification history"""
     
     try:
-        query = {"userId": user_id}
-        if notification_type:
-            query["type"] = notification_type
-        
-        history = await mongo_db.notification_logs.find(query).sort(
-            "timestamp", -1
-        ).limit(limit).to_list(length=limit)
-        
-        # Remove MongoDB _id fields
-        for item in history:
-            item.pop('_id', None)
+        history = await repositories.notification_logs.history(user_id, limit, notification_type)
         
         return JSONResponse(content={
             "success": True,
@@ -352,7 +341,7 @@ async def send_recommendation_alert(
             raise HTTPException(status_code=400, detail="User ID and recommendations are required")
         
         # Get user profile for personalization
-        user_profile = await mongo_db.user_profiles.find_one({"userId": user_id})
+        user_profile = await repositories.user_profiles.get_contact(user_id)
         
         if not user_profile:
             raise HTTPException(status_code=404, detail="User profile not found")
@@ -416,7 +405,7 @@ EduCareer AI Team
 async def get_user_preferences(user_id: str) -> Dict[str, Any]:
     """Get user notification preferences"""
     
-    preferences = await mongo_db.notification_preferences.find_one({"userId": user_id})
+    preferences = await repositories.notification_preferences.get(user_id)
     
     if not preferences:
         # Return default preferences
@@ -448,9 +437,8 @@ async def personalize_message(message: str, user_profile: Dict[str, Any], templa
     personal_info = user_profile.get('personalInfo', {})
     user_name = personal_info.get('firstName', 'there')
     
-    # Simple template replacement
-    personalized = message.replace('{{name}}', user_name)
-    personalized = personalized.replace('{{user_name}}', user_name)
+    # Compiled once per distinct message, so bulk sends only fill in the name
+    personalized = compile_message(message).render(name=user_name, user_name=user_name)
     
     # Add more personalization based on template
     if template == "recommendation":
@@ -462,24 +450,20 @@ async def personalize_message(message: str, user_profile: Dict[str, Any], templa
     return personalized
 
 async def save_notification_log(user_id: str, notification_type: str, subject: str, result: Dict[str, Any]):
-    """Save notification log to MongoDB"""
+    """Queue notification log for a batched write to MongoDB"""
     
-    try:
-        log_doc = {
-            "userId": user_id,
-            "type": notification_type,
-            "subject": subject,
-            "success": result.get('success', False),
-            "message": result.get('message', ''),
-            "timestamp": {"$date": {"$numberLong": str(int(pd.Timestamp.now().timestamp() * 1000))}},
-            "notificationId": result.get('notification_id', '')
-        }
-        
-        await mongo_db.notification_logs.insert_one(log_doc)
-        
-    except Exception as e:
-        print(f"Error saving notification log: {str(e)}")
-        # Don't raise exception to avoid breaking main flow
+    log_doc = {
+        "userId": user_id,
+        "type": notification_type,
+        "subject": subject,
+        "success": result.get('success', False),
+        "message": result.get('message', ''),
+        "timestamp": {"$date": {"$numberLong": str(int(pd.Timestamp.now().timestamp() * 1000))}},
+        "notificationId": result.get('notification_id', '')
+    }
+    
+    # Flushed in the background; a Mongo outage spills to disk instead of failing the request
+    await log_writer.insert("notification_logs", log_doc)
 
 
 @router.post("/send-opportunity-alert")
@@ -513,32 +497,47 @@ async def send_opportunity_alert(
         
         results = {}
         
-        # Send Email
+        # Idempotency keys: the same alert is never sent twice on a channel
+        user_key = recipient_key({'user_id': user_id, 'email': user_email, 'phone': user_phone})
+        alert_key = job_key({
+            'job_id': request.get('job_id'),
+            'title': opportunity_title,
+            'company': company,
+            'apply_url': apply_url
+        })
+        
+        # Send Email (the dedup store and providers block, so this runs on a thread)
         if user_email:
-            email_result = email_service.send_opportunity_email(
-                user_email=user_email,
-                user_name=user_name,
-                opportunity_title=opportunity_title,
-                company=company,
-                location=location,
-                description=description,
-                apply_url=apply_url,
-                salary=salary
+            results['email'] = await asyncio.to_thread(
+                notification_dedup.send_once,
+                user_key, alert_key, 'email',
+                lambda: email_service.send_opportunity_email(
+                    user_email=user_email,
+                    user_name=user_name,
+                    opportunity_title=opportunity_title,
+                    company=company,
+                    location=location,
+                    description=description,
+                    apply_url=apply_url,
+                    salary=salary
+                )
             )
-            results['email'] = email_result
         
         # Send WhatsApp
         if user_phone:
-            whatsapp_result = twilio_service.send_opportunity_notification(
-                user_phone=user_phone,
-                opportunity_title=opportunity_title,
-                company=company,
-                location=location,
-                apply_url=apply_url,
-                via_whatsapp=True,
-                via_sms=False
+            results['whatsapp'] = await asyncio.to_thread(
+                notification_dedup.send_once,
+                user_key, alert_key, 'whatsapp',
+                lambda: twilio_service.send_opportunity_notification(
+                    user_phone=user_phone,
+                    opportunity_title=opportunity_title,
+                    company=company,
+                    location=location,
+                    apply_url=apply_url,
+                    via_whatsapp=True,
+                    via_sms=False
+                ).get('whatsapp', {})
             )
-            results['whatsapp'] = whatsapp_result.get('whatsapp', {})
         
         # Save notification log
         if user_id:
@@ -1,16 +1,26 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from app.database import get_db, mongo_db
+from app import repositories
+from app.services.http_client import http_client
+from app.services.github_client import github_client, parse_repo_url, GitHubRateLimited
 from sqlalchemy.orm import Session
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
-import requests
+import asyncio
+import httpx
+import os
 import re
+import time
 import pandas as pd
 from urllib.parse import urlparse
 
 router = APIRouter()
 
+# Seconds a verification result is reused for the same URL (failures are retried sooner)
+VERIFY_CACHE_TTL = float(os.getenv('PORTFOLIO_VERIFY_CACHE_TTL', '3600'))
+VERIFY_FAILURE_TTL = float(os.getenv('PORTFOLIO_VERIFY_FAILURE_TTL', '60'))
+
 class GitHubVerificationRequest(BaseModel):
     github_url: str
 
@@ -112,11 +122,15 @@ async def verify_portfolio_items(
     """Verify portfolio items (certifications, projects, courses)"""
     
     try:
-        verification_results = []
+        # GitHub repos are looked up in one batch first; the per-item pass then hits the cache
+        await prefetch_github_projects([
+            item.url for item in request.items if "github.com" in urlparse(item.url).netloc.lower()
+        ])
         
-        for item in request.items:
-            result = await verify_single_item(item)
-            verification_results.append(result)
+        # Items are verified concurrently; the shared client limits requests per domain
+        verification_results = list(await asyncio.gather(
+            *(verify_single_item(item) for item in request.items)
+        ))
         
         # Save verification results to MongoDB
         await save_verification_results(request.user_id, verification_results)
@@ -159,7 +173,7 @@ async def get_user_portfolio(user_id: str):
     """Get user's verified portfolio"""
     
     try:
-        portfolio = await mongo_db.user_portfolios.find_one({"userId": user_id})
+        portfolio = await repositories.portfolios.get(user_id)
         
         if not portfolio:
             return JSONResponse(content={
@@ -171,8 +185,6 @@ async def get_user_portfolio(user_id: str):
                 }
             })
         
-        portfolio.pop('_id', None)
-        
         return JSONResponse(content={
             "success": True,
             "portfolio": portfolio
@@ -282,21 +294,28 @@ async def verify_single_item(item: PortfolioItem) -> Dict[str, Any]:
     }
     
     try:
-        # Parse URL
-        parsed_url = urlparse(item.url)
-        domain = parsed_url.netloc.lower()
+        # Reuse a recent result for the same URL
+        result = http_client.cache.get(item.url)
         
-        # Different verification strategies based on domain
-        if "github.com" in domain:
-            result = await verify_github_project(item.url)
-        elif "coursera.org" in domain or "edx.org" in domain or "udemy.com" in domain:
-            result = await verify_course_certificate(item.url)
-        elif "linkedin.com" in domain and "learning" in item.url:
-            result = await verify_linkedin_certificate(item.url)
-        elif "credly.com" in domain or "badgr.com" in domain:
-            result = await verify_digital_badge(item.url)
-        else:
-            result = await verify_generic_url(item.url)
+        if result is None:
+            # Parse URL
+            parsed_url = urlparse(item.url)
+            domain = parsed_url.netloc.lower()
+            
+            # Different verification strategies based on domain
+            if "github.com" in domain:
+                result = await verify_github_project(item.url)
+            elif "coursera.org" in domain or "edx.org" in domain or "udemy.com" in domain:
+                result = await verify_course_certificate(item.url)
+            elif "linkedin.com" in domain and "learning" in item.url:
+                result = await verify_linkedin_certificate(item.url)
+            elif "credly.com" in domain or "badgr.com" in domain:
+                result = await verify_digital_badge(item.url)
+            else:
+                result = await verify_generic_url(item.url)
+            
+            ttl = VERIFY_CACHE_TTL if result.get('verified') else VERIFY_FAILURE_TTL
+            http_client.cache.set(item.url, result, ttl)
         
         verification_result.update(result)
         
@@ -306,110 +325,99 @@ async def verify_single_item(item: PortfolioItem) -> Dict[str, Any]:
     
     return verification_result
 
-async def verify_github_project(url: str) -> Dict[str, Any]:
-    """Verify GitHub project"""
+def github_result(repo_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Verification result for GitHub repository metadata (None when not found)"""
     
-    try:
-        # Extract owner and repo from URL
-        match = re.search(r'github\.com/([^/]+)/([^/]+)', url)
-        if not match:
-            return {"verified": False, "issues": ["Invalid GitHub URL format"], "confidence_score": 0.0}
-        
-        owner, repo = match.groups()
-        repo = repo.rstrip('/')  # Remove trailing slash if present
-        
-        # GitHub API call
-        api_url = f"https://api.github.com/repos/{owner}/{repo}"
-        headers = {
-            "Accept": "application/vnd.github.v3+json",
-            "User-Agent": "EduCareer-Portfolio-Verifier"
-        }
-        
-        # Try to get GitHub token from environment
-        import os
-        github_token = os.getenv('GITHUB_TOKEN')
-        if github_token and github_token != 'your-github-token':
-            headers["Authorization"] = f"token {github_token}"
-        
-        response = requests.get(api_url, headers=headers, timeout=15)
-        
-        if response.status_code == 200:
-            repo_data = response.json()
-            
-            # Check if repo is public and has content
-            if not repo_data.get('private', True):  # Public repo
-                # Get additional metrics
-                commits_url = f"https://api.github.com/repos/{owner}/{repo}/commits"
-                commits_response = requests.get(commits_url, headers=headers, timeout=10)
-                
-                commit_count = len(commits_response.json()) if commits_response.status_code == 200 else 0
-                
-                confidence_score = min(0.9, 0.5 + (commit_count * 0.01))  # Base 0.5 + commits bonus
-                
-                return {
-                    "verified": True,
-                    "verification_method": "GitHub API",
-                    "confidence_score": confidence_score,
-                    "metadata": {
-                        "stars": repo_data.get('stargazers_count', 0),
-                        "forks": repo_data.get('forks_count', 0),
-                        "language": repo_data.get('language'),
-                        "description": repo_data.get('description'),
-                        "commits": commit_count,
-                        "created_at": repo_data.get('created_at'),
-                        "updated_at": repo_data.get('updated_at')
-                    }
-                }
-            else:
-                return {
-                    "verified": False,
-                    "issues": ["Repository is private or inaccessible"],
-                    "confidence_score": 0.0
-                }
-        
-        elif response.status_code == 404:
-            return {
-                "verified": False,
-                "issues": ["Repository not found"],
-                "confidence_score": 0.0
-            }
-        else:
-            return {
-                "verified": False,
-                "issues": [f"GitHub API error: {response.status_code}"],
-                "confidence_score": 0.0
-            }
-            
-    except requests.exceptions.Timeout:
+    if repo_data is None:
         return {
             "verified": False,
-            "issues": ["Connection timeout - GitHub API took too long to respond"],
+            "issues": ["Repository not found"],
             "confidence_score": 0.0
         }
-    except requests.exceptions.ConnectionError:
+    
+    # Check if repo is public and has content
+    if repo_data.get('private', True):
         return {
             "verified": False,
-            "issues": ["Connection error - Unable to reach GitHub API. Please check your internet connection."],
+            "issues": ["Repository is private or inaccessible"],
             "confidence_score": 0.0
         }
-    except requests.exceptions.RequestException as e:
-        return {
-            "verified": False,
-            "issues": [f"Network error: {str(e)}"],
-            "confidence_score": 0.0
+    
+    commit_count = repo_data.get('commits', 0)
+    confidence_score = min(0.9, 0.5 + (commit_count * 0.01))  # Base 0.5 + commits bonus
+    
+    return {
+        "verified": True,
+        "verification_method": "GitHub API",
+        "confidence_score": confidence_score,
+        "metadata": {
+            "stars": repo_data.get('stars', 0),
+            "forks": repo_data.get('forks', 0),
+            "language": repo_data.get('language'),
+            "description": repo_data.get('description'),
+            "commits": commit_count,
+            "created_at": repo_data.get('created_at'),
+            "updated_at": repo_data.get('updated_at')
         }
+    }
+
+def github_error(e: Exception) -> Dict[str, Any]:
+    """Verification result for a failed GitHub lookup"""
+    
+    if isinstance(e, GitHubRateLimited):
+        issue = f"GitHub rate limit reached - retry in {int(e.retry_after)}s"
+    elif isinstance(e, httpx.TimeoutException):
+        issue = "Connection timeout - GitHub API took too long to respond"
+    elif isinstance(e, httpx.ConnectError):
+        issue = "Connection error - Unable to reach GitHub API. Please check your internet connection."
+    elif isinstance(e, httpx.HTTPError):
+        issue = f"Network error: {str(e)}"
+    elif isinstance(e, RuntimeError):
+        issue = str(e)
+    else:
+        issue = f"GitHub verification failed: {str(e)}"
+    return {"verified": False, "issues": [issue], "confidence_score": 0.0}
+
+async def prefetch_github_projects(urls: List[str]):
+    """Look up uncached GitHub repos in one batch and cache their results"""
+    
+    repos = {}
+    for url in urls:
+        repo = parse_repo_url(url)
+        if repo and http_client.cache.get(url) is None:
+            repos[url] = repo
+    if len(repos) < 2:
+        return
+    
+    try:
+        repo_data = await github_client.fetch_repos(repos.values())
+    except Exception:
+        # Leave them to the per-item path, which reports the error
+        return
+    
+    for url, repo in repos.items():
+        result = github_result(repo_data.get(repo))
+        ttl = VERIFY_CACHE_TTL if result.get('verified') else VERIFY_FAILURE_TTL
+        http_client.cache.set(url, result, ttl)
+
+async def verify_github_project(url: str) -> Dict[str, Any]:
+    """Verify GitHub project"""
+    
+    # Extract owner and repo from URL
+    repo = parse_repo_url(url)
+    if not repo:
+        return {"verified": False, "issues": ["Invalid GitHub URL format"], "confidence_score": 0.0}
+    
+    try:
+        return github_result(await github_client.fetch_repo(*repo))
     except Exception as e:
-        return {
-            "verified": False,
-            "issues": [f"GitHub verification failed: {str(e)}"],
-            "confidence_score": 0.0
-        }
+        return github_error(e)
 
 async def verify_course_certificate(url: str) -> Dict[str, Any]:
     """Verify course certificate from major platforms"""
     
     try:
-        response = requests.head(url, timeout=10, allow_redirects=True)
+        response = await http_client.head(url, follow_redirects=True)
         
         if response.status_code == 200:
             # Check if it's a valid certificate URL pattern
@@ -457,7 +465,7 @@ async def verify_linkedin_certificate(url: str) -> Dict[str, Any]:
     try:
         # LinkedIn certificates often require authentication, so we do basic URL validation
         if "linkedin.com/learning/certificates" in url:
-            response = requests.head(url, timeout=10)
+            response = await http_client.head(url)
             
             return {
                 "verified": response.status_code in [200, 302],  # 302 for redirect to login
@@ -486,7 +494,7 @@ async def verify_digital_badge(url: str) -> Dict[str, Any]:
     """Verify digital badges from Credly, Badgr, etc."""
     
     try:
-        response = requests.get(url, timeout=10)
+        response = await http_client.get(url, follow_redirects=True)
         
         if response.status_code == 200:
             # Look for badge verification indicators in the HTML
@@ -531,7 +539,7 @@ async def verify_generic_url(url: str) -> Dict[str, Any]:
     """Generic URL verification"""
     
     try:
-        response = requests.head(url, timeout=10, allow_redirects=True)
+        response = await http_client.head(url, follow_redirects=True)
         
         if response.status_code == 200:
             return {
@@ -582,16 +590,21 @@ async def save_verification_results(user_id: str, results: List[Dict[str, Any]])
     """Save verification results to MongoDB"""
     
     try:
-        # Update user's portfolio with verification results
+        # Per-item check time, so the background re-verifier can refresh the oldest first
+        verified_at = time.time()
+        items = [{**result, "verified_at": verified_at} for result in results]
+        
         portfolio_doc = {
             "userId": user_id,
-            "items": results,
+            "items": items,
+            "oldestVerifiedAt": verified_at,
             "verification_date": {"$date": {"$numberLong": str(int(pd.Timestamp.now().timestamp() * 1000))}},
             "total_items": len(results),
             "verified_items": sum(1 for r in results if r['verified']),
             "verification_score": (sum(1 for r in results if r['verified']) / len(results)) * 100 if results else 0
         }
         
+        # User state, not telemetry: written directly so a GET right after /verify sees it
         await mongo_db.user_portfolios.update_one(
             {"userId": user_id},
             {"$set": portfolio_doc},
@@ -600,4 +613,4 @@ async def save_verification_results(user_id: str, results: List[Dict[str, Any]])
         
     except Exception as e:
         print(f"Error saving verification results: {str(e)}")
-        # Don't raise exception to avoid breaking main flow
\ No newline at end of file
+        # Don't raise exception to avoid breaking main flow
@@ -2,9 +2,12 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from app.services.recommendation_engine import RecommendationEngine
 from app.database import get_db, mongo_db
+from app import repositories
+from app.services.write_buffer import log_writer
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from pydantic import BaseModel
+import pandas as pd
 
 router = APIRouter()
 recommendation_engine = RecommendationEngine()
@@ -230,9 +233,7 @@ async def get_user_recommendation_history(
     
     try:
         # Fetch from MongoDB
-        history = await mongo_db.user_recommendations.find(
-            {"userId": user_id}
-        ).sort("timestamp", -1).limit(limit).to_list(length=limit)
+        history = await repositories.recommendations.history(user_id, limit)
         
         return JSONResponse(content={
             "success": True,
@@ -278,18 +279,13 @@ def generate_match_reasons(item: Dict[str, Any], courses: List[str]) -> List[str
     return reasons[:3]  # Return top 3 reasons
 
 async def save_recommendations(user_id: str, recommendation_type: str, recommendations: List[Dict]):
-    """Save recommendations to MongoDB for tracking and analytics"""
-    try:
-        doc = {
-            "userId": user_id,
-            "type": recommendation_type,
-            "recommendations": recommendations,
-            "timestamp": {"$date": {"$numberLong": str(int(pd.Timestamp.now().timestamp() * 1000))}},
-            "viewed": False
-        }
-        
-        await mongo_db.user_recommendations.insert_one(doc)
-        
-    except Exception as e:
-        print(f"Error saving recommendations: {str(e)}")
-        # Don't raise exception to avoid breaking main flow
\ No newline at end of file
+    """Queue recommendations for a batched write to MongoDB (tracking and analytics)"""
+    doc = {
+        "userId": user_id,
+        "type": recommendation_type,
+        "recommendations": recommendations,
+        "timestamp": {"$date": {"$numberLong": str(int(pd.Timestamp.now().timestamp() * 1000))}},
+        "viewed": False
+    }
+    
+    await log_writer.insert("user_recommendations", doc)
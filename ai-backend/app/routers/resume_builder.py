@@ -1,21 +1,49 @@
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from app.services.resume_generator import ResumeGenerator
+from app.services.resume_renderer import check_callback_url, resume_render_queue
+from app.services.resume_cache import resume_cache
+from app.services.job_matcher import job_matcher
 from app.database import get_db, mongo_db
+from app import repositories
 from sqlalchemy.orm import Session
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, AsyncIterator
 from pydantic import BaseModel
+import asyncio
+import io
+import json
 import os
 import tempfile
+import time
+import zipfile
+import pandas as pd
 
 router = APIRouter()
 resume_generator = ResumeGenerator()
 
+MAX_BULK_USERS = int(os.getenv('RESUME_BULK_MAX_USERS', '500'))
+MAX_OPTIMIZE_JOBS = int(os.getenv('RESUME_OPTIMIZE_MAX_JOBS', '1000'))
+
 class ResumeRequest(BaseModel):
     user_id: str
     template: str = "modern"
     sections: List[str] = ["personal", "education", "experience", "skills", "projects", "certifications"]
     custom_data: Dict[str, Any] = {}
+    # Return a job id immediately and render in the background
+    async_mode: bool = False
+    # POSTed the finished job when async_mode is set
+    callback_url: Optional[str] = None
+
+class BulkResumeRequest(BaseModel):
+    user_ids: List[str]
+    template: str = "modern"
+    sections: List[str] = ["personal", "education", "experience", "skills", "projects", "certifications"]
+
+class JobMatchRequest(BaseModel):
+    user_id: str
+    top_n: int = 10
+    # 'job' or 'internship'; both when omitted
+    source: Optional[str] = None
 
 class ResumeUpdateRequest(BaseModel):
     user_id: str
@@ -39,16 +67,26 @@ async def generate_resume(
         # Merge custom data
         user_data.update(request.custom_data)
         
-        # Generate resume
-        resume_path = await resume_generator.generate_resume(
-            user_data=user_data,
-            template=request.template,
-            sections=request.sections,
-            user_id=request.user_id
-        )
+        if request.async_mode:
+            if request.callback_url:
+                try:
+                    await check_callback_url(request.callback_url)
+                except ValueError as e:
+                    raise HTTPException(status_code=400, detail=str(e))
+            job_id = resume_render_queue.submit(
+                build_resume(user_data, request),
+                callback_url=request.callback_url,
+                metadata={"user_id": request.user_id, "template": request.template}
+            )
+            return JSONResponse(status_code=202, content={
+                "success": True,
+                "job_id": job_id,
+                "status": "queued",
+                "status_url": f"/api/v1/resume/generate/{job_id}"
+            })
         
-        # Save resume metadata to MongoDB
-        await save_resume_metadata(request.user_id, request.template, resume_path)
+        # Generate resume (PDF rendering runs on the worker pool)
+        resume_path = await build_resume(user_data, request)
         
         return FileResponse(
             path=resume_path,
@@ -61,6 +99,70 @@ async def generate_resume(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Resume generation failed: {str(e)}")
 
+@router.post("/generate-bulk")
+async def generate_bulk_resumes(request: BulkResumeRequest):
+    """
+    Generate resumes for a whole cohort and stream them back as one zip
+    
+    The zip holds one PDF per student plus timings.json with per-stage
+    timings and the students that were missing or failed.
+    """
+    
+    user_ids = list(dict.fromkeys(request.user_ids))
+    if not user_ids:
+        raise HTTPException(status_code=400, detail="At least one user ID is required")
+    if len(user_ids) > MAX_BULK_USERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_USERS} users per bulk request")
+    
+    started = time.perf_counter()
+    try:
+        users = await collect_users_data(user_ids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load user data: {str(e)}")
+    
+    if not users:
+        raise HTTPException(status_code=404, detail="No user profiles found")
+    
+    timings = {"fetch_seconds": round(time.perf_counter() - started, 3)}
+    missing = [user_id for user_id in user_ids if user_id not in users]
+    
+    return StreamingResponse(
+        stream_bulk_resumes(users, missing, request.template, request.sections, timings, started),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="resumes_{request.template}.zip"'}
+    )
+
+@router.get("/generate/{job_id}")
+async def get_resume_job(job_id: str):
+    """Poll an asynchronous resume generation job"""
+    
+    job = await resume_render_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Resume job not found")
+    
+    job.pop('callback_url', None)
+    file_path = job.pop('file_path', None)
+    if job['status'] == 'completed' and file_path:
+        job['download_url'] = f"/api/v1/resume/generate/{job_id}/download"
+    
+    return JSONResponse(content={"success": True, **job})
+
+@router.get("/generate/{job_id}/download")
+async def download_resume_job(job_id: str):
+    """Download the PDF of a completed resume job"""
+    
+    job = await resume_render_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Resume job not found")
+    if job['status'] != 'completed' or not job['file_path']:
+        raise HTTPException(status_code=409, detail=f"Resume job is {job['status']}")
+    
+    return FileResponse(
+        path=job['file_path'],
+        filename=f"resume_{job['user_id']}_{job['template']}.pdf",
+        media_type="application/pdf"
+    )
+
 @router.post("/preview")
 async def preview_resume(
     request: ResumeRequest,
@@ -82,7 +184,8 @@ async def preview_resume(
         html_content = await resume_generator.generate_html_preview(
             user_data=user_data,
             template=request.template,
-            sections=request.sections
+            sections=request.sections,
+            user_id=request.user_id
         )
         
         return JSONResponse(content={
@@ -112,21 +215,44 @@ async def optimize_resume_content(
     request: Dict[str, Any],
     db: Session = Depends(get_db)
 ):
-    """AI-powered resume content optimization"""
+    """
+    AI-powered resume content optimization
+    
+    Send job_description for one job, or job_descriptions to score the resume
+    against many jobs at once (results in input order plus a best-first ranking).
+    """
     
     try:
         user_id = request.get('user_id')
         job_description = request.get('job_description', '')
+        job_descriptions = request.get('job_descriptions')
         
         if not user_id:
             raise HTTPException(status_code=400, detail="User ID is required")
         
+        if job_descriptions is not None and len(job_descriptions) > MAX_OPTIMIZE_JOBS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_OPTIMIZE_JOBS} job descriptions per request")
+        
         # Get user data
         user_data = await collect_user_data(user_id)
         
         if not user_data:
             raise HTTPException(status_code=404, detail="User profile not found")
         
+        # Score against many job descriptions in one call
+        if job_descriptions is not None:
+            results = await resume_generator.optimize_for_jobs(
+                user_data=user_data,
+                job_descriptions=[description or '' for description in job_descriptions]
+            )
+            ranking = sorted(range(len(results)), key=lambda index: results[index]['match_score'], reverse=True)
+            
+            return JSONResponse(content={
+                "success": True,
+                "results": results,
+                "ranking": ranking
+            })
+        
         # Optimize resume content
         optimized_content = await resume_generator.optimize_for_job(
             user_data=user_data,
@@ -144,18 +270,40 @@ async def optimize_resume_content(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Resume optimization failed: {str(e)}")
 
+@router.post("/match-jobs")
+async def match_jobs(request: JobMatchRequest):
+    """Rank every listed job and internship against the user's resume"""
+    
+    if request.source not in (None, 'job', 'internship'):
+        raise HTTPException(status_code=400, detail="source must be 'job' or 'internship'")
+    
+    try:
+        user_data = await collect_user_data(request.user_id)
+        
+        if not user_data:
+            raise HTTPException(status_code=404, detail="User profile not found")
+        
+        matches = await asyncio.to_thread(
+            job_matcher.match, user_data, max(1, min(request.top_n, 100)), request.source
+        )
+        
+        return JSONResponse(content={
+            "success": True,
+            "matches": matches,
+            "total_matches": len(matches)
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Job matching failed: {str(e)}")
+
 @router.get("/history/{user_id}")
 async def get_resume_history(user_id: str):
     """Get user's resume generation history"""
     
     try:
-        history = await mongo_db.resume_history.find(
-            {"userId": user_id}
-        ).sort("createdAt", -1).limit(20).to_list(length=20)
-        
-        # Remove MongoDB _id fields
-        for item in history:
-            item.pop('_id', None)
+        history = await repositories.resume_history.recent(user_id, limit=20)
         
         return JSONResponse(content={
             "success": True,
@@ -214,15 +362,15 @@ async def update_resume_section(
         # Update user profile with new section data
         update_path = f"resumeData.{request.section}"
         
-        await mongo_db.user_profiles.update_one(
-            {"userId": request.user_id},
-            {
-                "$set": {
-                    update_path: request.data,
-                    "updatedAt": {"$date": {"$numberLong": str(int(pd.Timestamp.now().timestamp() * 1000))}}
-                }
-            }
-        )
+        await repositories.user_profiles.set_fields(request.user_id, {
+            update_path: request.data,
+            "updatedAt": {"$date": {"$numberLong": str(int(pd.Timestamp.now().timestamp() * 1000))}}
+        })
+        
+        # Renders are content-keyed, so this only frees the entries the edit
+        # leaves unreachable; resumes are built from the profile, not resumeData
+        await asyncio.to_thread(resume_cache.invalidate_section, request.user_id, request.section)
+        await resume_generator.release_evicted_pdfs()
         
         return JSONResponse(content={
             "success": True,
@@ -237,23 +385,15 @@ async def delete_resume(user_id: str, resume_id: str):
     """Delete a specific resume from history"""
     
     try:
-        # Remove from database
-        result = await mongo_db.resume_history.delete_one({
-            "userId": user_id,
-            "resumeId": resume_id
-        })
+        # Remove from database, keeping the file path of the removed entry
+        resume_doc = await repositories.resume_history.delete(user_id, resume_id)
         
-        if result.deleted_count == 0:
+        if resume_doc is None:
             raise HTTPException(status_code=404, detail="Resume not found")
         
         # Try to delete physical file
         try:
-            resume_doc = await mongo_db.resume_history.find_one({
-                "userId": user_id,
-                "resumeId": resume_id
-            })
-            
-            if resume_doc and resume_doc.get('filePath'):
+            if resume_doc.get('filePath'):
                 if os.path.exists(resume_doc['filePath']):
                     os.remove(resume_doc['filePath'])
         except:
@@ -269,42 +409,168 @@ async def delete_resume(user_id: str, resume_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete resume: {str(e)}")
 
+async def build_resume(user_data: Dict[str, Any], request: ResumeRequest) -> str:
+    """Generate the resume PDF and record it in the resume history"""
+    
+    resume_path = await resume_generator.generate_resume(
+        user_data=user_data,
+        template=request.template,
+        sections=request.sections,
+        user_id=request.user_id
+    )
+    
+    # Save resume metadata to MongoDB
+    await save_resume_metadata(request.user_id, request.template, resume_path)
+    
+    return resume_path
+
+class _ZipStream(io.RawIOBase):
+    """Write-only sink for a streamed zip; drain() hands over the bytes written so far"""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+async def stream_bulk_resumes(users: Dict[str, Dict[str, Any]], missing: List[str], template: str,
+                              sections: List[str], timings: Dict[str, float], started: float) -> AsyncIterator[bytes]:
+    """Render every user's resume and yield the zip as each PDF is added"""
+    
+    output = _ZipStream()
+    # PDFs are already compressed
+    archive = zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED)
+    failed: Dict[str, str] = {}
+    
+    # Summaries for the whole cohort in batched model passes
+    stage = time.perf_counter()
+    if resume_generator.summarizer:
+        bios = [user_data['profile'].get('bio', '') for user_data in users.values()]
+        await resume_generator.summarize_many(bios, list(users))
+    timings['summarize_seconds'] = round(time.perf_counter() - stage, 3)
+    
+    # HTML (summaries now come from the cache)
+    stage = time.perf_counter()
+    html_by_user: Dict[str, str] = {}
+    for user_id, user_data in users.items():
+        try:
+            processed_data = await resume_generator._process_user_data(user_data, sections)
+            html_by_user[user_id] = await resume_generator.render_html(
+                processed_data, template, sections, user_id, for_pdf=True
+            )
+        except Exception as e:
+            failed[user_id] = str(e)
+    timings['html_seconds'] = round(time.perf_counter() - stage, 3)
+    
+    # PDFs render in parallel on the worker pool; each is zipped as soon as it's done
+    async def render(user_id: str, html_content: str):
+        try:
+            return user_id, await resume_generator.render_pdf(html_content, template, user_id), None
+        except Exception as e:
+            return user_id, None, str(e)
+    
+    stage = time.perf_counter()
+    zip_seconds = 0.0
+    generated = 0
+    for finished in asyncio.as_completed([render(*item) for item in html_by_user.items()]):
+        user_id, pdf_path, error = await finished
+        if error:
+            failed[user_id] = error
+            continue
+        zip_started = time.perf_counter()
+        archive.write(pdf_path, f"resume_{user_id}_{template}.pdf")
+        zip_seconds += time.perf_counter() - zip_started
+        generated += 1
+        yield output.drain()
+    timings['pdf_seconds'] = round(time.perf_counter() - stage - zip_seconds, 3)
+    timings['zip_seconds'] = round(zip_seconds, 3)
+    timings['total_seconds'] = round(time.perf_counter() - started, 3)
+    
+    report = {
+        "template": template,
+        "requested": len(users) + len(missing),
+        "generated": generated,
+        "missing": missing,
+        "failed": failed,
+        "timings": timings
+    }
+    archive.writestr('timings.json', json.dumps(report, indent=2))
+    archive.close()
+    yield output.drain()
+
+def _assemble_user_data(profile: Dict[str, Any], portfolio: Optional[Dict[str, Any]],
+                        courses: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine profile, portfolio and extracted courses into resume input"""
+    
+    return {
+        "profile": profile,
+        "portfolio": portfolio.get('items', []) if portfolio else [],
+        "courses": courses,
+        "personal_info": profile.get('personalInfo', {}),
+        "academic_info": profile.get('academicInfo', {}),
+        "skills": profile.get('skills', []),
+        "experience_level": profile.get('experienceLevel', 'beginner'),
+        "career_goals": profile.get('careerGoals', [])
+    }
+
 async def collect_user_data(user_id: str) -> Dict[str, Any]:
     """Collect all user data needed for resume generation"""
     
     try:
         # Get user profile
-        profile = await mongo_db.user_profiles.find_one({"userId": user_id})
+        profile = await repositories.user_profiles.get(user_id)
         
         if not profile:
             return None
         
-        # Get portfolio
-        portfolio = await mongo_db.user_portfolios.find_one({"userId": user_id})
-        
-        # Get extracted courses
-        courses = await mongo_db.extracted_courses.find(
-            {"userId": user_id}
-        ).to_list(length=100)
+        # Get portfolio and extracted courses
+        portfolio, courses = await asyncio.gather(
+            repositories.portfolios.get(user_id),
+            repositories.extracted_courses.for_user(user_id, limit=100)
+        )
         
         # Combine all data
-        user_data = {
-            "profile": profile,
-            "portfolio": portfolio.get('items', []) if portfolio else [],
-            "courses": courses,
-            "personal_info": profile.get('personalInfo', {}),
-            "academic_info": profile.get('academicInfo', {}),
-            "skills": profile.get('skills', []),
-            "experience_level": profile.get('experienceLevel', 'beginner'),
-            "career_goals": profile.get('careerGoals', [])
-        }
-        
-        return user_data
+        return _assemble_user_data(profile, portfolio, courses)
         
     except Exception as e:
         print(f"Error collecting user data: {str(e)}")
         return None
 
+async def collect_users_data(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Collect resume data for many users with one $in query per collection"""
+    
+    profiles, portfolios, courses = await asyncio.gather(
+        repositories.user_profiles.find_many(user_ids),
+        repositories.portfolios.find_many(user_ids),
+        repositories.extracted_courses.for_users(user_ids)
+    )
+    
+    portfolio_by_user = {portfolio['userId']: portfolio for portfolio in portfolios}
+    courses_by_user: Dict[str, List[Dict[str, Any]]] = {}
+    for course in courses:
+        user_courses = courses_by_user.setdefault(course['userId'], [])
+        # Same cap as collect_user_data
+        if len(user_courses) < 100:
+            user_courses.append(course)
+    
+    return {
+        profile['userId']: _assemble_user_data(
+            profile,
+            portfolio_by_user.get(profile['userId']),
+            courses_by_user.get(profile['userId'], [])
+        )
+        for profile in profiles
+    }
+
 async def save_resume_metadata(user_id: str, template: str, file_path: str):
     """Save resume generation metadata to MongoDB"""
     
@@ -322,7 +588,7 @@ async def save_resume_metadata(user_id: str, template: str, file_path: str):
             "fileSize": os.path.getsize(file_path) if os.path.exists(file_path) else 0
         }
         
-        await mongo_db.resume_history.insert_one(metadata)
+        await repositories.resume_history.insert(metadata)
         
     except Exception as e:
         print(f"Error saving resume metadata: {str(e)}")
@@ -1,15 +1,63 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
+from fastapi import APIRouter, File, Form, UploadFile, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from app.services.timetable_processor import TimetableProcessor
+from app.services.timetable_batch import timetable_batch_queue, course_documents
 from app.database import get_db, mongo_db
 from sqlalchemy.orm import Session
 import aiofiles
+import asyncio
+import hashlib
 import os
-from typing import Dict, Any
+import shutil
+import tempfile
+import zipfile
+from typing import Dict, Any, List, Optional, Tuple
 
 router = APIRouter()
 timetable_processor = TimetableProcessor()
 
+SUPPORTED_EXTENSIONS = {'pdf', 'jpg', 'jpeg', 'png', 'bmp', 'tiff'}
+MAX_BATCH_FILES = int(os.getenv('TIMETABLE_BATCH_MAX_FILES', '500'))
+MAX_UPLOAD_BYTES = int(os.getenv('TIMETABLE_MAX_UPLOAD_MB', '25')) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+async def _spool_upload(file: UploadFile, directory: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Stream an upload to a temp file in chunks, hashing it on the way
+    
+    Returns:
+        (path, sha256 hex digest); the caller removes the file
+    """
+    extension = os.path.splitext(file.filename or '')[1].lower()
+    fd, path = tempfile.mkstemp(suffix=extension, dir=directory)
+    os.close(fd)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with aiofiles.open(path, 'wb') as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"{file.filename} exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit"
+                    )
+                digest.update(chunk)
+                await out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, digest.hexdigest()
+
+def _remove_file(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
 @router.post("/upload")
 async def upload_timetable(
     file: UploadFile = File(...),
@@ -29,15 +77,15 @@ async def upload_timetable(
             detail=f"Unsupported file type: {file.content_type}"
         )
     
+    # Spool to disk so memory stays bounded whatever the upload size
+    file_path, content_hash = await _spool_upload(file)
+    
     try:
-        # Read file content
-        file_content = await file.read()
-        
         # Determine file type
         file_extension = file.filename.split('.')[-1].lower()
         
         # Process the timetable
-        result = await timetable_processor.process_timetable(file_content, file_extension)
+        result = await timetable_processor.process_timetable(file_path, file_extension, content_hash)
         
         if not result['success']:
             raise HTTPException(status_code=500, detail=result['error'])
@@ -52,12 +100,140 @@ async def upload_timetable(
             "data": {
                 "total_courses": result['total_courses'],
                 "courses": result['courses'],
+                "cached": result.get('cached', False),
                 "extracted_text_preview": result['extracted_text'][:500] + "..." if len(result['extracted_text']) > 500 else result['extracted_text']
             }
         })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+    finally:
+        _remove_file(file_path)
+
+@router.post("/upload-batch")
+async def upload_timetable_batch(
+    files: List[UploadFile] = File(...),
+    user_ids: Optional[List[str]] = Form(None)
+):
+    """
+    Queue many timetables (individual files and/or zip archives) for processing
+    
+    When `user_ids` is sent it must hold one id per timetable, matched in
+    upload order; without it each file's name without extension is used as
+    its user id. Poll /batch/{job_id} for progress.
+    """
+    
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+    
+    # Every file of the batch is spooled into one directory, removed when the job ends
+    workdir = tempfile.mkdtemp(prefix="timetable-batch-")
+    entries = []
+    try:
+        for upload in files:
+            extension = upload.filename.rsplit('.', 1)[-1].lower()
+            if extension != 'zip' and extension not in SUPPORTED_EXTENSIONS:
+                raise HTTPException(status_code=400, detail=f"Unsupported file type: {upload.filename}")
+            if extension != 'zip' and len(entries) >= MAX_BATCH_FILES:
+                raise HTTPException(status_code=400, detail=f"Batch exceeds {MAX_BATCH_FILES} files")
+            
+            path, content_hash = await _spool_upload(upload, workdir)
+            if extension == 'zip':
+                try:
+                    entries.extend(await asyncio.to_thread(
+                        _unpack_zip, path, workdir, MAX_BATCH_FILES - len(entries)
+                    ))
+                except zipfile.BadZipFile:
+                    raise HTTPException(status_code=400, detail=f"Invalid zip archive: {upload.filename}")
+                finally:
+                    _remove_file(path)
+            else:
+                entries.append((upload.filename, extension, path, content_hash))
+        
+        if not entries:
+            raise HTTPException(status_code=400, detail="No timetable files found in upload")
+        if user_ids and len(user_ids) != len(entries):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Got {len(user_ids)} user ids for {len(entries)} timetables; send one per timetable"
+            )
+    except BaseException:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+    
+    batch = [
+        (
+            user_ids[index] if user_ids else os.path.splitext(os.path.basename(filename))[0],
+            filename,
+            extension,
+            path,
+            content_hash
+        )
+        for index, (filename, extension, path, content_hash) in enumerate(entries)
+    ]
+    
+    job_id = timetable_batch_queue.submit(batch, workdir)
+    
+    return JSONResponse(status_code=202, content={
+        "success": True,
+        "message": f"Queued {len(batch)} timetables for processing",
+        "data": {
+            "job_id": job_id,
+            "total_files": len(batch),
+            "status_url": f"/api/v1/timetable/batch/{job_id}"
+        }
+    })
+
+@router.get("/batch/{job_id}")
+async def get_batch_status(job_id: str):
+    """Get progress and per-file results of a batch upload"""
+    
+    job = await timetable_batch_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    
+    return JSONResponse(content={
+        "success": True,
+        "data": job
+    })
+
+def _unpack_zip(archive_path: str, directory: str, max_files: int) -> list:
+    """
+    Extract each timetable in a zip archive to `directory`
+    
+    The member count and sizes are checked from the archive's directory
+    before anything is written, so an oversized archive is rejected without
+    touching the disk. Returns (filename, extension, path, sha256 hex digest).
+    """
+    with zipfile.ZipFile(archive_path) as archive:
+        members = []
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or not name or name.startswith('.'):
+                continue
+            extension = name.rsplit('.', 1)[-1].lower()
+            if extension not in SUPPORTED_EXTENSIONS:
+                continue
+            if info.file_size > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail=f"{info.filename} exceeds the upload limit")
+            members.append((info, extension))
+            if len(members) > max_files:
+                raise HTTPException(status_code=400, detail=f"Batch exceeds {MAX_BATCH_FILES} files")
+        
+        entries = []
+        for info, extension in members:
+            fd, path = tempfile.mkstemp(suffix=f".{extension}", dir=directory)
+            digest = hashlib.sha256()
+            # Reads stop at the declared size, so the checks above bound what's written
+            with os.fdopen(fd, 'wb') as out, archive.open(info) as member:
+                while True:
+                    chunk = member.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+            entries.append((info.filename, extension, path, digest.hexdigest()))
+    return entries
 
 @router.post("/extract-text")
 async def extract_text_only(
@@ -68,14 +244,15 @@ async def extract_text_only(
     if not file:
         raise HTTPException(status_code=400, detail="No file uploaded")
     
+    file_path, content_hash = await _spool_upload(file)
+    
     try:
-        file_content = await file.read()
         file_extension = file.filename.split('.')[-1].lower()
         
         if file_extension == 'pdf':
-            text = await timetable_processor.extract_from_pdf(file_content)
+            text = await timetable_processor.extract_from_pdf(file_path)
         elif file_extension in ['jpg', 'jpeg', 'png', 'bmp', 'tiff']:
-            text = await timetable_processor.extract_from_image(file_content)
+            text = await timetable_processor.extract_from_image(file_path, content_hash)
         else:
             raise HTTPException(status_code=400, detail="Unsupported file type")
         
@@ -86,6 +263,8 @@ async def extract_text_only(
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Text extraction failed: {str(e)}")
+    finally:
+        _remove_file(file_path)
 
 @router.post("/parse-courses")
 async def parse_courses_from_text(
@@ -98,7 +277,7 @@ async def parse_courses_from_text(
         raise HTTPException(status_code=400, detail="No text provided")
     
     try:
-        courses = timetable_processor.extract_courses_with_bert(text)
+        courses = await asyncio.to_thread(timetable_processor.extract_courses_with_bert, text)
         
         return JSONResponse(content={
             "success": True,
@@ -188,30 +367,13 @@ async def get_course_recommendations(
 async def save_extracted_courses(user_id: str, courses: list):
     """Save extracted courses to MongoDB for integration with existing system"""
     try:
-        import pandas as pd
-        
         # Transform courses to match existing schema
-        course_documents = []
-        
-        for course in courses:
-            course_doc = {
-                "name": course['name'],
-                "extractedFrom": "timetable",
-                "confidence": course.get('confidence', 0.0),
-                "schedule": {
-                    "days": course.get('days', []),
-                    "times": course.get('times', [])
-                },
-                "rawText": course.get('raw_text', ''),
-                "userId": user_id,
-                "createdAt": {"$date": {"$numberLong": str(int(pd.Timestamp.now().timestamp() * 1000))}}
-            }
-            course_documents.append(course_doc)
+        documents = course_documents(user_id, courses)
         
         # Insert into MongoDB
-        if course_documents and mongo_db:
-            await mongo_db.extracted_courses.insert_many(course_documents)
+        if documents and mongo_db is not None:
+            await mongo_db.extracted_courses.insert_many(documents)
             
     except Exception as e:
         print(f"Error saving courses to MongoDB: {str(e)}")
-        # Don't raise exception here to avoid breaking the main flow
\ No newline at end of file
+        # Don't raise exception here to avoid breaking the main flow
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from app.database import get_db, mongo_db
+from app import repositories
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List
 from pydantic import BaseModel
@@ -43,20 +44,9 @@ async def create_user_profile(
             "profileCompleteness": calculate_profile_completeness(profile.dict())
         }
         
-        # Check if profile already exists
-        existing_profile = await mongo_db.user_profiles.find_one({"userId": profile.user_id})
-        
-        if existing_profile:
-            # Update existing profile
-            await mongo_db.user_profiles.update_one(
-                {"userId": profile.user_id},
-                {"$set": profile_doc}
-            )
-            message = "Profile updated successfully"
-        else:
-            # Create new profile
-            await mongo_db.user_profiles.insert_one(profile_doc)
-            message = "Profile created successfully"
+        # Create or update in one round trip
+        created = await repositories.user_profiles.upsert(profile.user_id, profile_doc)
+        message = "Profile created successfully" if created else "Profile updated successfully"
         
         return JSONResponse(content={
             "success": True,
@@ -72,14 +62,11 @@ async def get_user_profile(user_id: str):
     """Get user profile by ID"""
     
     try:
-        profile = await mongo_db.user_profiles.find_one({"userId": user_id})
+        profile = await repositories.user_profiles.get(user_id)
         
         if not profile:
             raise HTTPException(status_code=404, detail="Profile not found")
         
-        # Remove MongoDB _id field
-        profile.pop('_id', None)
-        
         return JSONResponse(content={
             "success": True,
             "profile": profile
@@ -102,24 +89,18 @@ async def update_user_profile(
         updates = request.updates.copy()
         updates["updatedAt"] = {"$date": {"$numberLong": str(int(pd.Timestamp.now().timestamp() * 1000))}}
         
-        # Update profile
-        result = await mongo_db.user_profiles.update_one(
-            {"userId": request.user_id},
-            {"$set": updates}
+        # Update profile, reading back only what completeness needs
+        updated_profile = await repositories.user_profiles.update_fields(
+            request.user_id, updates, repositories.UserProfileRepository.COMPLETENESS_FIELDS
         )
         
-        if result.matched_count == 0:
+        if updated_profile is None:
             raise HTTPException(status_code=404, detail="Profile not found")
         
-        # Get updated profile to calculate completeness
-        updated_profile = await mongo_db.user_profiles.find_one({"userId": request.user_id})
         completeness = calculate_profile_completeness(updated_profile)
         
         # Update completeness
-        await mongo_db.user_profiles.update_one(
-            {"userId": request.user_id},
-            {"$set": {"profileCompleteness": completeness}}
-        )
+        await repositories.user_profiles.set_fields(request.user_id, {"profileCompleteness": completeness})
         
         return JSONResponse(content={
             "success": True,
@@ -178,7 +159,7 @@ async def get_profile_completeness(user_id: str):
     """Get profile completeness score and suggestions"""
     
     try:
-        profile = await mongo_db.user_profiles.find_one({"userId": user_id})
+        profile = await repositories.user_profiles.get_for_completeness(user_id)
         
         if not profile:
             raise HTTPException(status_code=404, detail="Profile not found")
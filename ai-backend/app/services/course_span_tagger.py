@@ -0,0 +1,130 @@
+"""
+Course Span Tagger
+Token-classification model that tags course, instructor, room and time spans
+in timetable lines the regex scanner could not resolve on its own.
+
+Needs a checkpoint fine-tuned for this task (set COURSE_SPAN_MODEL); the
+label names are read from the model config, e.g. B-COURSE / I-COURSE,
+B-INSTRUCTOR, B-ROOM, B-TIME.
+"""
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Model entity label -> ScannedLine field
+ENTITY_FIELDS = {
+    'COURSE': 'courses',
+    'INSTRUCTOR': 'professors',
+    'PROFESSOR': 'professors',
+    'PER': 'professors',
+    'ROOM': 'rooms',
+    'LOC': 'rooms',
+    'TIME': 'times',
+    'DAY': 'days',
+}
+
+class CourseSpanTagger:
+    """
+    Batched span tagging over many lines at once
+
+    Lines are sorted by length before batching so each padded batch holds
+    lines of similar size, and the model runs once per batch rather than once
+    per line. The model is loaded on first use.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 64, max_length: int = 64, backend: Optional[str] = None):
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self._tokenizer = None
+        self._model = None
+        self._load_lock = threading.Lock()
+
+    def _load(self):
+        if self._model is not None:
+            return
+        with self._load_lock:
+            if self._model is not None:
+                return
+            from app.services.inference_backend import load_token_classifier
+
+            # Offsets mapping needs a fast tokenizer (load_token_classifier asks for one)
+            self._tokenizer, self._model = load_token_classifier(self.model_name, self.backend)
+            logger.info(f"Loaded course span tagger {self.model_name}")
+
+    def tag_lines(self, lines: List[str]) -> List[Dict[str, List[str]]]:
+        """
+        Tag spans in each line
+
+        Returns:
+            One dict per input line (same order) mapping field name
+            (courses, professors, rooms, times, days) to the span texts
+        """
+        if not lines:
+            return []
+        self._load()
+        import torch
+
+        id2label = self._model.config.id2label
+        results: List[Dict[str, List[str]]] = [{} for _ in lines]
+        order = sorted(range(len(lines)), key=lambda index: len(lines[index]))
+
+        for start in range(0, len(order), self.batch_size):
+            batch_indices = order[start:start + self.batch_size]
+            batch_lines = [lines[index] for index in batch_indices]
+            encoded = self._tokenizer(
+                batch_lines,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_offsets_mapping=True,
+                return_tensors='pt'
+            )
+            offsets = encoded.pop('offset_mapping').tolist()
+
+            with torch.inference_mode():
+                predictions = self._model(**encoded).logits.argmax(dim=-1).tolist()
+
+            for row, index in enumerate(batch_indices):
+                results[index] = self._decode_spans(
+                    lines[index], predictions[row], offsets[row], id2label
+                )
+
+        return results
+
+    @staticmethod
+    def _decode_spans(line: str, label_ids: List[int], offsets: List[List[int]], id2label) -> Dict[str, List[str]]:
+        """Merge BIO-labelled tokens into character spans of the original line"""
+        spans: Dict[str, List[str]] = {}
+        entity, span_start, span_end = None, 0, 0
+
+        def close():
+            if entity and entity in ENTITY_FIELDS:
+                text = line[span_start:span_end].strip()
+                if text:
+                    spans.setdefault(ENTITY_FIELDS[entity], []).append(text)
+
+        for label_id, (token_start, token_end) in zip(label_ids, offsets):
+            # Special and padding tokens have empty offsets
+            if token_start == token_end:
+                continue
+            label = id2label[label_id]
+            prefix, _, name = label.partition('-')
+            if not name:
+                prefix, name = ('O', None) if label == 'O' else ('I', label)
+            name = name.upper() if name else None
+
+            # Continue the span on I- tags, and on word pieces glued to the previous token
+            if entity and name == entity and (prefix == 'I' or token_start == span_end):
+                span_end = token_end
+                continue
+            close()
+            if prefix in ('B', 'I') and name:
+                entity, span_start, span_end = name, token_start, token_end
+            else:
+                entity = None
+        close()
+        return spans
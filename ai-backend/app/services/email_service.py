@@ -5,11 +5,44 @@ import os
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, Dict, Any
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List
 import logging
+from app.services.notification_templates import RenderedOpportunity, render_digest, render_opportunity
 
 logger = logging.getLogger(__name__)
 
+class SMTPSession:
+    """Authenticated SMTP connection reused across many sends"""
+    
+    def __init__(self, service: 'EmailService'):
+        self.service = service
+        self._server = None
+    
+    def _connection(self) -> smtplib.SMTP:
+        if self._server is None:
+            server = smtplib.SMTP(self.service.smtp_server, self.service.smtp_port)
+            server.starttls()
+            server.login(self.service.email_user, self.service.email_password)
+            self._server = server
+        return self._server
+    
+    def send_message(self, msg) -> None:
+        """Send a message, reconnecting once if the server dropped the connection"""
+        try:
+            self._connection().send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._server = None
+            self._connection().send_message(msg)
+    
+    def close(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except smtplib.SMTPException:
+                pass
+            self._server = None
+
 class EmailService:
     """Service for sending email notifications"""
     
@@ -26,12 +59,31 @@ class EmailService:
             logger.warning("Email credentials not found. Email notifications disabled.")
             self.enabled = False
     
+    @contextmanager
+    def session(self):
+        """
+        Open one SMTP connection for a batch of sends
+        
+        Yields None when email is disabled so callers can pass it straight
+        through to send_email.
+        """
+        if not self.enabled:
+            yield None
+            return
+        
+        smtp_session = SMTPSession(self)
+        try:
+            yield smtp_session
+        finally:
+            smtp_session.close()
+    
     def send_email(
         self, 
         to_email: str, 
         subject: str, 
         body: str, 
-        html: bool = False
+        html: bool = False,
+        session: Optional[SMTPSession] = None
     ) -> Dict[str, Any]:
         """
         Send email
@@ -41,6 +93,7 @@ class EmailService:
             subject: Email subject
             body: Email body (plain text or HTML)
             html: Whether body is HTML
+            session: Open SMTP session to reuse (a new connection is made if omitted)
             
         Returns:
             Dict with success status
@@ -65,10 +118,13 @@ class EmailService:
                 msg.attach(MIMEText(body, 'plain'))
             
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email_user, self.email_password)
-                server.send_message(msg)
+            if session is not None:
+                session.send_message(msg)
+            else:
+                with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+                    server.starttls()
+                    server.login(self.email_user, self.email_password)
+                    server.send_message(msg)
             
             logger.info(f"Email sent successfully to {to_email}")
             
@@ -93,7 +149,8 @@ class EmailService:
         location: str,
         description: str,
         apply_url: str,
-        salary: Optional[str] = None
+        salary: Optional[str] = None,
+        session: Optional[SMTPSession] = None
     ) -> Dict[str, Any]:
         """
         Send opportunity notification email with HTML formatting
@@ -107,126 +164,65 @@ class EmailService:
             description: Job description
             apply_url: Application URL
             salary: Salary range (optional)
+            session: Open SMTP session to reuse (optional)
             
         Returns:
             Dict with success status
         """
-        subject = f"🎯 New Opportunity: {opportunity_title} at {company}"
+        rendered = render_opportunity({
+            'title': opportunity_title,
+            'company': company,
+            'location': location,
+            'description': description,
+            'apply_url': apply_url,
+            'salary': salary
+        })
         
-        html_body = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <style>
-        body {{
-            font-family: Arial, sans-serif;
-            line-height: 1.6;
-            color: #333;
-        }}
-        .container {{
-            max-width: 600px;
-            margin: 0 auto;
-            padding: 20px;
-        }}
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 30px;
-            text-align: center;
-            border-radius: 10px 10px 0 0;
-        }}
-        .content {{
-            background: #f9f9f9;
-            padding: 30px;
-            border-radius: 0 0 10px 10px;
-        }}
-        .job-title {{
-            font-size: 24px;
-            font-weight: bold;
-            color: #667eea;
-            margin-bottom: 10px;
-        }}
-        .company {{
-            font-size: 18px;
-            color: #666;
-            margin-bottom: 20px;
-        }}
-        .details {{
-            background: white;
-            padding: 20px;
-            border-radius: 8px;
-            margin: 20px 0;
-        }}
-        .detail-item {{
-            margin: 10px 0;
-            padding: 10px;
-            border-left: 3px solid #667eea;
-            background: #f0f4ff;
-        }}
-        .button {{
-            display: inline-block;
-            padding: 15px 30px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            text-decoration: none;
-            border-radius: 5px;
-            font-weight: bold;
-            margin: 20px 0;
-        }}
-        .footer {{
-            text-align: center;
-            color: #999;
-            margin-top: 30px;
-            font-size: 12px;
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>🎯 New Opportunity Alert!</h1>
-            <p>We found a great opportunity that matches your profile</p>
-        </div>
+        return self.send_rendered_opportunity(user_email, user_name, rendered, session=session)
+    
+    def send_rendered_opportunity(
+        self,
+        user_email: str,
+        user_name: str,
+        rendered: RenderedOpportunity,
+        session: Optional[SMTPSession] = None
+    ) -> Dict[str, Any]:
+        """
+        Send an opportunity email whose job content is already rendered
         
-        <div class="content">
-            <p>Hi {user_name},</p>
-            
-            <div class="job-title">{opportunity_title}</div>
-            <div class="company">🏢 {company}</div>
-            
-            <div class="details">
-                <div class="detail-item">
-                    <strong>📍 Location:</strong> {location}
-                </div>
-                {f'<div class="detail-item"><strong>💰 Salary:</strong> {salary}</div>' if salary else ''}
-                <div class="detail-item">
-                    <strong>📋 Description:</strong><br>
-                    {description[:300]}{'...' if len(description) > 300 else ''}
-                </div>
-            </div>
-            
-            <center>
-                <a href="{apply_url}" class="button">Apply Now 🚀</a>
-            </center>
-            
-            <p>Don't miss this opportunity! Click the button above to apply.</p>
-            
-            <p>Good luck with your application!</p>
-            
-            <p>Best regards,<br>
-            <strong>EduCareer Team</strong></p>
-        </div>
+        Bulk senders render the job once with render_opportunity() and call
+        this per recipient, so only the greeting is rendered per user.
+        """
+        return self.send_email(
+            user_email,
+            rendered.subject,
+            rendered.email_html(user_name),
+            html=True,
+            session=session
+        )
+
+    def send_digest_email(
+        self,
+        user_email: str,
+        user_name: str,
+        jobs: List[Dict[str, Any]],
+        session: Optional[SMTPSession] = None
+    ) -> Dict[str, Any]:
+        """
+        Send the daily digest listing several opportunities in one email
         
-        <div class="footer">
-            <p>You're receiving this email because you signed up for job alerts on EduCareer.</p>
-            <p>© 2025 EduCareer. All rights reserved.</p>
-        </div>
-    </div>
-</body>
-</html>
+        Args:
+            user_email: User's email address
+            user_name: User's name
+            jobs: Job dicts (title, company, location, apply_url, optional salary)
+            session: Open SMTP session to reuse (optional)
+            
+        Returns:
+            Dict with success status
         """
+        subject, html_body = render_digest(user_name, jobs)
         
-        return self.send_email(user_email, subject, html_body, html=True)
+        return self.send_email(user_email, subject, html_body, html=True, session=session)
 
 # Create singleton instance
 email_service = EmailService()
@@ -0,0 +1,263 @@
+"""
+GitHub Client
+Repository lookups for portfolio verification.
+
+With a token, a batch of repositories seen for the first time is fetched in
+one GraphQL query (aliased repository fields, including the full commit
+count of the default branch). Single-repo lookups and re-checks of known
+repos use the REST API with ETag conditional requests; with a token, a repo
+that hasn't changed costs a 304 that GitHub does not count against the rate
+limit (unauthenticated 304s still count). Rate limits from every response
+are tracked so callers can schedule work around the remaining budget.
+"""
+import asyncio
+import calendar
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+Repo = Tuple[str, str]
+
+REPO_URL = re.compile(r'github\.com/([^/\s]+)/([^/\s?#]+)')
+LAST_PAGE = re.compile(r'[?&]page=(\d+)[^>]*>;\s*rel="last"')
+
+REPOSITORY_FIELDS = """
+    isPrivate
+    stargazerCount
+    forkCount
+    description
+    createdAt
+    updatedAt
+    primaryLanguage { name }
+    defaultBranchRef { target { ... on Commit { history { totalCount } } } }
+"""
+
+class GitHubRateLimited(Exception):
+    """Raised instead of sending a request the remaining budget can't cover"""
+
+    def __init__(self, resource: str, retry_after: float):
+        super().__init__(f"GitHub {resource} rate limit exhausted, resets in {int(retry_after)}s")
+        self.resource = resource
+        self.retry_after = retry_after
+
+def parse_repo_url(url: str) -> Optional[Repo]:
+    """(owner, repo) from a GitHub repository URL"""
+    match = REPO_URL.search(url)
+    if not match:
+        return None
+    owner, repo = match.groups()
+    repo = repo.rstrip('/')
+    if repo.endswith('.git'):
+        repo = repo[:-4]
+    return owner, repo
+
+class GitHubClient:
+    """
+    Batched, rate-limit-aware GitHub repository metadata
+
+    Repository metadata comes back normalized to one shape whichever API
+    served it: private, stars, forks, language, description, commits,
+    created_at and updated_at. A repo that doesn't exist (or isn't visible)
+    maps to None.
+    """
+
+    def __init__(self, api_url: str = "https://api.github.com", token: str = "",
+                 batch_size: int = 50, etag_cache_size: int = 5000):
+        self.api_url = api_url.rstrip('/')
+        self.token = token if token and token != 'your-github-token' else ""
+        self.batch_size = batch_size
+        self.etag_cache_size = etag_cache_size
+
+        self._etags: "OrderedDict[str, Tuple[str, Any, Dict[str, str]]]" = OrderedDict()
+        # resource -> {'limit', 'remaining', 'reset'} from the latest response
+        self.rate_limits: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def graphql_url(self) -> str:
+        return f"{self.api_url}/graphql"
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Accept": "application/vnd.github.v3+json"}
+        if self.token:
+            headers["Authorization"] = f"bearer {self.token}"
+        return headers
+
+    def _track_rate_limit(self, response, default_resource: str):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        resource = response.headers.get('X-RateLimit-Resource', default_resource)
+        self.rate_limits[resource] = {
+            'limit': int(response.headers.get('X-RateLimit-Limit', 0)),
+            'remaining': int(remaining),
+            'reset': int(response.headers.get('X-RateLimit-Reset', 0)),
+        }
+
+    def _track_graphql_rate_limit(self, rate_limit: Optional[Dict[str, Any]]):
+        """Budget from the query's own rateLimit field (always present, unlike the headers)"""
+        if not rate_limit or rate_limit.get('remaining') is None:
+            return
+        try:
+            reset = calendar.timegm(time.strptime(rate_limit['resetAt'], '%Y-%m-%dT%H:%M:%SZ'))
+        except (KeyError, TypeError, ValueError):
+            reset = self.rate_limits.get('graphql', {}).get('reset', 0)
+        self.rate_limits['graphql'] = {
+            'limit': int(rate_limit.get('limit') or 0),
+            'remaining': int(rate_limit['remaining']),
+            'reset': int(reset),
+        }
+
+    def remaining(self, resource: str = 'core') -> Optional[int]:
+        """Requests left in the current window (None until GitHub has told us)"""
+        limits = self.rate_limits.get(resource)
+        return limits['remaining'] if limits else None
+
+    def seconds_until_reset(self, resource: str = 'core') -> float:
+        limits = self.rate_limits.get(resource)
+        return max(0.0, limits['reset'] - time.time()) if limits else 0.0
+
+    def _check_budget(self, resource: str, needed: int = 1):
+        remaining = self.remaining(resource)
+        if remaining is not None and remaining < needed:
+            retry_after = self.seconds_until_reset(resource)
+            if retry_after > 0:
+                logger.warning(f"GitHub {resource} budget exhausted, deferring for {int(retry_after)}s")
+                raise GitHubRateLimited(resource, retry_after)
+
+    async def _get_conditional(self, url: str, params: Optional[Dict[str, Any]] = None):
+        """
+        GET with If-None-Match; a 304 reuses the cached body
+
+        Returns (status, json body, response headers).
+        """
+        key = url if not params else f"{url}?{sorted(params.items())}"
+        headers = self._headers()
+        cached = self._etags.get(key)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+
+        self._check_budget('core')
+        response = await http_client.get(url, headers=headers, params=params, follow_redirects=True)
+        self._track_rate_limit(response, 'core')
+
+        if response.status_code == 304 and cached:
+            self._etags.move_to_end(key)
+            return 200, cached[1], cached[2]
+        if response.status_code != 200:
+            return response.status_code, None, dict(response.headers)
+
+        body = response.json()
+        etag = response.headers.get('ETag')
+        if etag:
+            self._etags[key] = (etag, body, {'link': response.headers.get('Link', '')})
+            while len(self._etags) > self.etag_cache_size:
+                self._etags.popitem(last=False)
+        return 200, body, {'link': response.headers.get('Link', '')}
+
+    async def _fetch_rest(self, owner: str, repo: str) -> Optional[Dict[str, Any]]:
+        status, data, _ = await self._get_conditional(f"{self.api_url}/repos/{owner}/{repo}")
+        if status == 404:
+            return None
+        if status != 200:
+            raise RuntimeError(f"GitHub API error: {status}")
+
+        # One commit per page, so the last page number is the commit count
+        commits = 0
+        status, page, headers = await self._get_conditional(
+            f"{self.api_url}/repos/{owner}/{repo}/commits", {'per_page': 1}
+        )
+        if status == 200:
+            last_page = LAST_PAGE.search(headers.get('link', ''))
+            commits = int(last_page.group(1)) if last_page else len(page or [])
+
+        return {
+            'private': data.get('private', True),
+            'stars': data.get('stargazers_count', 0),
+            'forks': data.get('forks_count', 0),
+            'language': data.get('language'),
+            'description': data.get('description'),
+            'commits': commits,
+            'created_at': data.get('created_at'),
+            'updated_at': data.get('updated_at'),
+        }
+
+    async def _fetch_graphql(self, repos: List[Repo]) -> Dict[Repo, Optional[Dict[str, Any]]]:
+        """One aliased GraphQL query for a batch of repositories"""
+        variables: Dict[str, str] = {}
+        declarations, fields = [], []
+        for index, (owner, name) in enumerate(repos):
+            variables[f"o{index}"], variables[f"n{index}"] = owner, name
+            declarations.append(f"$o{index}: String!, $n{index}: String!")
+            fields.append(f"r{index}: repository(owner: $o{index}, name: $n{index}) {{{REPOSITORY_FIELDS}}}")
+        query = (
+            f"query({', '.join(declarations)}) {{\n"
+            + "\n".join(fields)
+            + "\nrateLimit { limit remaining resetAt }\n}"
+        )
+
+        self._check_budget('graphql')
+        response = await http_client.post(
+            self.graphql_url, json={'query': query, 'variables': variables}, headers=self._headers()
+        )
+        self._track_rate_limit(response, 'graphql')
+        if response.status_code != 200:
+            raise RuntimeError(f"GitHub GraphQL error: {response.status_code}")
+
+        data = response.json().get('data') or {}
+        self._track_graphql_rate_limit(data.get('rateLimit'))
+        results: Dict[Repo, Optional[Dict[str, Any]]] = {}
+        for index, repo in enumerate(repos):
+            node = data.get(f"r{index}")
+            if node is None:
+                results[repo] = None
+                continue
+            target = (node.get('defaultBranchRef') or {}).get('target') or {}
+            results[repo] = {
+                'private': node.get('isPrivate', True),
+                'stars': node.get('stargazerCount', 0),
+                'forks': node.get('forkCount', 0),
+                'language': (node.get('primaryLanguage') or {}).get('name'),
+                'description': node.get('description'),
+                'commits': (target.get('history') or {}).get('totalCount', 0),
+                'created_at': node.get('createdAt'),
+                'updated_at': node.get('updatedAt'),
+            }
+        return results
+
+    async def fetch_repos(self, repos: Iterable[Repo], conditional: bool = False) -> Dict[Repo, Optional[Dict[str, Any]]]:
+        """
+        Metadata for many repositories
+
+        GraphQL batches with a token, else conditional REST calls. Pass
+        conditional=True for repos that were fetched before (re-checks):
+        they go through conditional REST even with a token, so unchanged
+        repos cost nothing.
+        """
+        unique = list(dict.fromkeys(repos))
+        results: Dict[Repo, Optional[Dict[str, Any]]] = {}
+        if conditional or not self.token:
+            fetched = await asyncio.gather(*(self._fetch_rest(owner, repo) for owner, repo in unique))
+            return dict(zip(unique, fetched))
+
+        for start in range(0, len(unique), self.batch_size):
+            results.update(await self._fetch_graphql(unique[start:start + self.batch_size]))
+        return results
+
+    async def fetch_repo(self, owner: str, repo: str) -> Optional[Dict[str, Any]]:
+        results = await self.fetch_repos([(owner, repo)], conditional=True)
+        return results[(owner, repo)]
+
+# Global instance
+github_client = GitHubClient(
+    api_url=settings.GITHUB_API_URL,
+    token=settings.GITHUB_TOKEN,
+    batch_size=int(os.getenv('GITHUB_GRAPHQL_BATCH_SIZE', '50'))
+)
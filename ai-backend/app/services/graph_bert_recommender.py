@@ -1,10 +1,10 @@
-from sentence_transformers import SentenceTransformer
 import networkx as nx
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 from typing import List, Dict, Any, Tuple
-import torch
-from transformers import AutoTokenizer, AutoModel
+import threading
+from app.core.config import settings
+from app.services.inference_backend import load_sentence_encoder, load_feature_extractor
 
 class GraphBERTRecommender:
     """
@@ -14,9 +14,13 @@ class GraphBERTRecommender:
     
     def __init__(self):
         # Load BERT model for semantic understanding
-        self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.tokenizer = AutoTokenizer.from_pretrained("bert-base-uncased")
-        self.bert_model = AutoModel.from_pretrained("bert-base-uncased")
+        self.sentence_model = load_sentence_encoder('all-MiniLM-L6-v2')
+        
+        # bert-base (~440MB) is only needed for BERT keywords; load it on first use
+        self.enable_bert_keywords = settings.ENABLE_BERT_KEYWORDS
+        self._tokenizer = None
+        self._bert_model = None
+        self._bert_lock = threading.Lock()
         
         # Initialize knowledge graph
         self.knowledge_graph = nx.DiGraph()
@@ -25,6 +29,23 @@ class GraphBERTRecommender:
         # Course domain taxonomy
         self.domain_taxonomy = self._build_domain_taxonomy()
     
+    @property
+    def tokenizer(self):
+        self._load_bert()
+        return self._tokenizer
+    
+    @property
+    def bert_model(self):
+        self._load_bert()
+        return self._bert_model
+    
+    def _load_bert(self):
+        if self._bert_model is not None:
+            return
+        with self._bert_lock:
+            if self._bert_model is None:
+                self._tokenizer, self._bert_model = load_feature_extractor("bert-base-uncased")
+    
     def _build_comprehensive_knowledge_graph(self):
         """Build comprehensive knowledge graph with courses, skills, technologies, and career paths"""
         
@@ -214,28 +235,80 @@ class GraphBERTRecommender:
                 if len(word) > 3:  # Only meaningful words
                     keywords.add(word)
         
+        # Optionally add BERT keywords for all course names in one batched pass
+        if self.enable_bert_keywords:
+            names = [course.get('name', '') for course in timetable_courses if course.get('name')]
+            for course_keywords in self.extract_bert_keywords(names):
+                keywords.update(course_keywords)
+        
         return list(keywords)
     
     def _extract_bert_keywords(self, text: str) -> List[str]:
         """Extract keywords using BERT attention weights"""
-        # Tokenize
-        inputs = self.tokenizer(text, return_tensors="pt", padding=True, truncation=True)
+        return self.extract_bert_keywords([text])[0]
+    
+    def extract_bert_keywords(self, texts: List[str], batch_size: int = 32, top_k: int = 10) -> List[List[str]]:
+        """
+        Extract keywords for many texts, batching them through BERT
+        
+        Words are ranked by the [CLS] attention they receive in the last layer
+        (averaged over heads); backends that don't return attentions keep the
+        words in text order.
+        
+        Returns:
+            One keyword list per input text
+        """
+        import torch
         
-        # Get BERT outputs
-        with torch.no_grad():
-            outputs = self.bert_model(**inputs)
+        results: List[List[str]] = [[] for _ in texts]
+        # Length-sorted batches keep padding small
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
         
-        # Extract tokens with high attention
-        tokens = self.tokenizer.convert_ids_to_tokens(inputs['input_ids'][0])
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            inputs = self.tokenizer(
+                [texts[index] for index in batch_indices],
+                return_tensors="pt", padding=True, truncation=True
+            )
+            
+            with torch.no_grad():
+                try:
+                    outputs = self.bert_model(**inputs, output_attentions=True)
+                except TypeError:
+                    outputs = self.bert_model(**inputs)
+            
+            attentions = getattr(outputs, 'attentions', None)
+            cls_attention = attentions[-1].mean(dim=1)[:, 0, :].tolist() if attentions else None
+            
+            for row, index in enumerate(batch_indices):
+                tokens = self.tokenizer.convert_ids_to_tokens(inputs['input_ids'][row])
+                weights = cls_attention[row] if cls_attention else [0.0] * len(tokens)
+                results[index] = self._rank_words(tokens, weights, top_k)
         
-        # Filter meaningful tokens (remove special tokens and short words)
-        keywords = [
-            token.replace('##', '') 
-            for token in tokens 
-            if token not in ['[CLS]', '[SEP]', '[PAD]'] and len(token) > 2
-        ]
+        return results
+    
+    @staticmethod
+    def _rank_words(tokens: List[str], weights: List[float], top_k: int) -> List[str]:
+        """Merge word pieces into words and keep the most attended ones"""
+        words: List[Tuple[str, float]] = []
+        for token, weight in zip(tokens, weights):
+            if token in ('[CLS]', '[SEP]', '[PAD]'):
+                continue
+            if token.startswith('##') and words:
+                word, score = words[-1]
+                words[-1] = (word + token[2:], max(score, weight))
+            else:
+                words.append((token, weight))
         
-        return keywords
+        # Filter meaningful words (remove short words), keeping first occurrences
+        seen = set()
+        keywords = []
+        for word, score in words:
+            if len(word) > 2 and word not in seen:
+                seen.add(word)
+                keywords.append((word, score))
+        keywords.sort(key=lambda item: item[1], reverse=True)
+        return [word for word, _ in keywords[:top_k]]
     
     def rank_courses_with_graph_bert(
         self, 
@@ -0,0 +1,142 @@
+"""
+Shared HTTP Client
+One pooled httpx.AsyncClient for outbound verification requests, with a
+concurrency limit per domain and a TTL cache for per-URL results.
+
+A slow host only ties up its own domain's slots; requests to other domains
+keep flowing.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {"User-Agent": "EduCareer-Portfolio-Verifier"}
+
+class TTLCache:
+    """Small in-process cache whose entries expire after their own TTL"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+class SharedHttpClient:
+    """
+    Pooled async HTTP client with per-domain semaphores
+
+    The client and semaphores belong to the event loop that first used them;
+    a different loop (e.g. a Celery task's asyncio.run) gets fresh ones, and
+    the previous client is closed so its pooled connections aren't leaked.
+    """
+
+    def __init__(self, per_domain_limit: int = 4, max_connections: int = 100, timeout: float = 10.0):
+        self.per_domain_limit = per_domain_limit
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.cache = TTLCache()
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._closing: Set[asyncio.Task] = set()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            if self._client is not None:
+                self._discard(self._client, self._loop, loop)
+            self._client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=20)
+            )
+            self._loop = loop
+            self._semaphores = {}
+        return self._client
+
+    def _discard(self, client: httpx.AsyncClient, old_loop: asyncio.AbstractEventLoop,
+                 loop: asyncio.AbstractEventLoop):
+        """Close a client left behind by another event loop"""
+        if old_loop.is_running() and not old_loop.is_closed():
+            # Still serving another thread; close it there
+            asyncio.run_coroutine_threadsafe(self._aclose_quietly(client), old_loop)
+            return
+        # Its loop is gone, so aclose() can't finish cleanly, but it still shuts
+        # down the pooled connections; the sockets are freed with the client
+        task = loop.create_task(self._aclose_quietly(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _aclose_quietly(client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.debug(f"Closing a stale HTTP client: {str(e)}")
+
+    @staticmethod
+    def domain(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def _semaphore(self, domain: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(domain)
+        if semaphore is None:
+            semaphore = self._semaphores[domain] = asyncio.Semaphore(self.per_domain_limit)
+        return semaphore
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request, waiting for a free slot on the URL's domain"""
+        client = self.client
+        async with self._semaphore(self.domain(url)):
+            return await client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def head(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("HEAD", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+            self._semaphores = {}
+
+# Global instance
+http_client = SharedHttpClient(
+    per_domain_limit=int(os.getenv('HTTP_PER_DOMAIN_LIMIT', '4')),
+    max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', '100')),
+    timeout=float(os.getenv('HTTP_TIMEOUT', '10'))
+)
@@ -0,0 +1,205 @@
+"""
+Inference Backend
+One place to load every transformer model with the configured CPU backend.
+
+INFERENCE_BACKEND selects:
+    torch       full-precision PyTorch (default)
+    torch-int8  PyTorch with dynamic int8 quantization of Linear layers
+    onnx        ONNX Runtime on an exported fp32 graph
+    onnx-int8   ONNX Runtime on a dynamically int8-quantized graph
+
+ONNX exports are written once under INFERENCE_CACHE_DIR and reused on later
+starts. If optimum/onnxruntime are not installed, or export fails, the
+loaders fall back to PyTorch.
+"""
+import logging
+import os
+import shutil
+from typing import Any, List, Optional, Tuple, Union
+import numpy as np
+
+from app.core.config import settings
+
+try:
+    from optimum.onnxruntime import (
+        ORTModelForFeatureExtraction,
+        ORTModelForSeq2SeqLM,
+        ORTModelForTokenClassification,
+    )
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('torch', 'torch-int8', 'onnx', 'onnx-int8')
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """Validate the requested backend, falling back to torch when ONNX Runtime is missing"""
+    backend = (backend or settings.INFERENCE_BACKEND or 'torch').lower()
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown inference backend {backend!r}, using torch")
+        return 'torch'
+    if backend.startswith('onnx') and not ONNX_AVAILABLE:
+        logger.warning("optimum[onnxruntime] not installed, using torch")
+        return 'torch'
+    return backend
+
+def _quantize_torch(model):
+    """Dynamic int8 quantization of Linear layers (weights int8, activations quantized on the fly)"""
+    import torch
+
+    model.eval()
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def _onnx_dir(model_name: str, ort_class, quantized: bool) -> str:
+    """
+    Export `model_name` to ONNX (and quantize it) once, returning the model directory
+
+    The quantized directory mirrors the fp32 one file for file, so the same
+    ORTModel class loads either.
+    """
+    from transformers import AutoTokenizer
+
+    base = os.path.join(settings.INFERENCE_CACHE_DIR, model_name.replace('/', '--'), ort_class.__name__)
+    fp32_dir = os.path.join(base, 'fp32')
+    if not os.path.exists(os.path.join(fp32_dir, 'config.json')):
+        logger.info(f"Exporting {model_name} to ONNX")
+        model = ort_class.from_pretrained(model_name, export=True)
+        model.save_pretrained(fp32_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(fp32_dir)
+
+    if not quantized:
+        return fp32_dir
+
+    int8_dir = os.path.join(base, 'int8')
+    if not os.path.exists(os.path.join(int8_dir, 'config.json')):
+        logger.info(f"Quantizing {model_name} ONNX graph to int8")
+        os.makedirs(int8_dir, exist_ok=True)
+        for name in os.listdir(fp32_dir):
+            source = os.path.join(fp32_dir, name)
+            if name.endswith('.onnx'):
+                quantize_dynamic(source, os.path.join(int8_dir, name), weight_type=QuantType.QInt8)
+            elif os.path.isfile(source) and not name.endswith('.onnx_data'):
+                shutil.copy2(source, int8_dir)
+    return int8_dir
+
+def _load_onnx(model_name: str, ort_class, backend: str):
+    from transformers import AutoTokenizer
+
+    model_dir = _onnx_dir(model_name, ort_class, quantized=backend == 'onnx-int8')
+    return AutoTokenizer.from_pretrained(model_dir), ort_class.from_pretrained(model_dir)
+
+def _hub_name(model_name: str) -> str:
+    """Sentence-transformers short names (all-MiniLM-L6-v2) live under that org on the Hub"""
+    return model_name if '/' in model_name else f"sentence-transformers/{model_name}"
+
+class OnnxSentenceEncoder:
+    """
+    SentenceTransformer-compatible encode() on ONNX Runtime
+
+    Mean pooling over the attention mask followed by L2 normalization, which
+    matches the pooling/normalize modules of the MiniLM sentence models.
+    """
+
+    def __init__(self, tokenizer, model, normalize: bool = True, max_length: int = 256):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.normalize = normalize
+        self.max_length = max_length
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Length-sorted batches keep padding small
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [texts[index] for index in batch_indices],
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors='np'
+            )
+            hidden = np.asarray(self.model(**encoded).last_hidden_state)
+            mask = encoded['attention_mask'][..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for row, index in enumerate(batch_indices):
+                embeddings[index] = pooled[row]
+
+        result = np.stack(embeddings)
+        return result[0] if single else result
+
+def load_sentence_encoder(model_name: str, backend: Optional[str] = None):
+    """Sentence embedding model with an encode() method, on the configured backend"""
+    backend = resolve_backend(backend)
+    if backend.startswith('onnx'):
+        try:
+            tokenizer, model = _load_onnx(_hub_name(model_name), ORTModelForFeatureExtraction, backend)
+            return OnnxSentenceEncoder(tokenizer, model)
+        except Exception as e:
+            logger.warning(f"ONNX load failed for {model_name}, using torch: {str(e)}")
+            backend = 'torch'
+
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device='cpu')
+    return _quantize_torch(model) if backend == 'torch-int8' else model
+
+def load_feature_extractor(model_name: str, backend: Optional[str] = None) -> Tuple[Any, Any]:
+    """(tokenizer, encoder model) returning last_hidden_state, on the configured backend"""
+    backend = resolve_backend(backend)
+    if backend.startswith('onnx'):
+        try:
+            return _load_onnx(model_name, ORTModelForFeatureExtraction, backend)
+        except Exception as e:
+            logger.warning(f"ONNX load failed for {model_name}, using torch: {str(e)}")
+            backend = 'torch'
+
+    from transformers import AutoTokenizer, AutoModel
+
+    model = AutoModel.from_pretrained(model_name)
+    model = _quantize_torch(model) if backend == 'torch-int8' else model.eval()
+    return AutoTokenizer.from_pretrained(model_name), model
+
+def load_token_classifier(model_name: str, backend: Optional[str] = None) -> Tuple[Any, Any]:
+    """(fast tokenizer, token-classification model), on the configured backend"""
+    backend = resolve_backend(backend)
+    if backend.startswith('onnx'):
+        try:
+            return _load_onnx(model_name, ORTModelForTokenClassification, backend)
+        except Exception as e:
+            logger.warning(f"ONNX load failed for {model_name}, using torch: {str(e)}")
+            backend = 'torch'
+
+    from transformers import AutoTokenizer, AutoModelForTokenClassification
+
+    model = AutoModelForTokenClassification.from_pretrained(model_name)
+    model = _quantize_torch(model) if backend == 'torch-int8' else model.eval()
+    return AutoTokenizer.from_pretrained(model_name, use_fast=True), model
+
+def load_summarizer(model_name: str, backend: Optional[str] = None):
+    """transformers summarization pipeline, on the configured backend"""
+    from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
+
+    backend = resolve_backend(backend)
+    if backend.startswith('onnx'):
+        try:
+            tokenizer, model = _load_onnx(model_name, ORTModelForSeq2SeqLM, backend)
+            return pipeline("summarization", model=model, tokenizer=tokenizer)
+        except Exception as e:
+            logger.warning(f"ONNX load failed for {model_name}, using torch: {str(e)}")
+            backend = 'torch'
+
+    if backend == 'torch-int8':
+        model = _quantize_torch(AutoModelForSeq2SeqLM.from_pretrained(model_name))
+        return pipeline("summarization", model=model, tokenizer=AutoTokenizer.from_pretrained(model_name))
+    return pipeline("summarization", model=model_name)
@@ -0,0 +1,212 @@
+"""
+Job Matcher
+Scores a user's resume against every listed job and internship in one
+vectorized pass.
+
+The catalogue is indexed once: each posting gets a normalized sentence
+embedding and a packed bitset of its required skills. Matching a user is
+then one matrix-vector product for semantic similarity plus a bitwise AND
+and popcount for skill coverage.
+"""
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.keyword_engine import keyword_engine
+
+logger = logging.getLogger(__name__)
+
+# Set bits per byte value, for popcounts over packed bitsets
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint16)
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+def _catalogue() -> List[Dict[str, Any]]:
+    """Jobs and internships in one shape: display fields plus the skills they ask for"""
+    from app.services.job_opportunities_service import job_service
+    from app.data.real_opportunities import REAL_INTERNSHIPS
+
+    postings = []
+    for job in job_service.jobs_database:
+        postings.append({
+            'id': job['id'],
+            'source': 'job',
+            'title': job['title'],
+            'company': job['company'],
+            'location': job.get('location', ''),
+            'type': job.get('type', ''),
+            'description': job.get('description', ''),
+            'skills': job.get('requirements', []),
+        })
+    for internship in REAL_INTERNSHIPS:
+        postings.append({
+            'id': internship['id'],
+            'source': 'internship',
+            'title': internship['name'],
+            'company': internship['company'],
+            'location': internship.get('location', ''),
+            'type': 'Internship',
+            'description': internship.get('description', ''),
+            'skills': internship.get('skills', []),
+            'apply_url': internship.get('apply_url', ''),
+        })
+    return postings
+
+class JobMatcher:
+    """
+    Precomputed job index for resume-to-jobs matching
+
+    Score = semantic_weight * cosine(resume, posting)
+          + (1 - semantic_weight) * share of the posting's skills the user has
+
+    The index (and the sentence encoder) is built on first use. Without an
+    encoder, ranking uses skill coverage alone.
+    """
+
+    def __init__(self, encoder_name: str = None, semantic_weight: float = 0.5):
+        self.encoder_name = encoder_name or settings.SENTENCE_TRANSFORMER_MODEL
+        self.semantic_weight = semantic_weight
+        self._lock = threading.Lock()
+        self._encoder = None
+        self._postings: Optional[List[Dict[str, Any]]] = None
+        self._skills: List[str] = []
+        self._skill_index: Dict[str, int] = {}
+        self._bitsets: Optional[np.ndarray] = None
+        self._required_counts: Optional[np.ndarray] = None
+        self._embeddings: Optional[np.ndarray] = None
+
+    def _build_index(self):
+        if self._postings is not None:
+            return
+        with self._lock:
+            if self._postings is not None:
+                return
+            postings = _catalogue()
+
+            # Skill columns, keyed by lowercased skill name
+            skills: Dict[str, str] = {}
+            for posting in postings:
+                for skill in posting['skills']:
+                    skills.setdefault(skill.lower().strip(), skill)
+            self._skills = list(skills)
+            self._skill_index = {skill: column for column, skill in enumerate(self._skills)}
+
+            required = np.zeros((len(postings), len(self._skills)), dtype=bool)
+            for row, posting in enumerate(postings):
+                for skill in posting['skills']:
+                    required[row, self._skill_index[skill.lower().strip()]] = True
+            self._bitsets = np.packbits(required, axis=1)
+            self._required_counts = required.sum(axis=1)
+
+            try:
+                from app.services.inference_backend import load_sentence_encoder
+
+                self._encoder = load_sentence_encoder(self.encoder_name)
+                texts = [
+                    f"{posting['title']}. {posting['description']} Skills: {', '.join(posting['skills'])}"
+                    for posting in postings
+                ]
+                self._embeddings = _normalize_rows(np.asarray(self._encoder.encode(texts), dtype=np.float32))
+            except Exception as e:
+                logger.warning(f"Job matcher running without embeddings: {str(e)}")
+                self._encoder = None
+                self._embeddings = None
+
+            self._postings = postings
+            logger.info(f"Indexed {len(postings)} postings over {len(self._skills)} skills")
+
+    def refresh(self):
+        """Rebuild the index on next use (after the job listings change)"""
+        with self._lock:
+            self._postings = None
+
+    def _user_bitset(self, user_skills: List[str]) -> np.ndarray:
+        """Packed bitset of the catalogue skills the user has"""
+        terms = keyword_engine.skill_terms(user_skills)
+        has = np.zeros(len(self._skills), dtype=bool)
+        for skill, column in self._skill_index.items():
+            if skill in terms:
+                has[column] = True
+        return np.packbits(has)
+
+    @staticmethod
+    def _resume_text(user_data: Dict[str, Any]) -> str:
+        profile = user_data.get('profile', {}) or {}
+        parts = [
+            profile.get('bio', '') or '',
+            ', '.join(user_data.get('skills', []) or profile.get('skills', [])),
+            ', '.join(course.get('name', '') for course in user_data.get('courses', [])[:20]),
+            ', '.join(item.get('title', '') for item in user_data.get('portfolio', [])),
+            ', '.join(user_data.get('career_goals', []) or []),
+        ]
+        return '. '.join(part for part in parts if part)
+
+    def match(self, user_data: Dict[str, Any], top_n: int = 10, source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Top-N postings for a user's resume data
+
+        Args:
+            user_data: Output of collect_user_data (profile, portfolio, courses, ...)
+            top_n: Number of postings to return
+            source: 'job' or 'internship' to restrict the catalogue
+
+        Returns:
+            Postings best first, each with score, semantic_score,
+            skill_coverage, matched_skills and missing_skills
+        """
+        self._build_index()
+        if not self._postings:
+            return []
+
+        user_skills = user_data.get('skills', []) or (user_data.get('profile', {}) or {}).get('skills', [])
+        user_bits = self._user_bitset(user_skills)
+
+        # Skill coverage for every posting at once
+        matched_counts = _POPCOUNT[self._bitsets & user_bits].sum(axis=1)
+        coverage = np.divide(
+            matched_counts, self._required_counts,
+            out=np.zeros(len(self._postings), dtype=np.float64),
+            where=self._required_counts > 0
+        )
+
+        semantic = np.zeros(len(self._postings), dtype=np.float64)
+        resume_text = self._resume_text(user_data)
+        if self._embeddings is not None and resume_text:
+            resume_vector = _normalize_rows(np.asarray(self._encoder.encode([resume_text]), dtype=np.float32))[0]
+            semantic = self._embeddings @ resume_vector
+            weight = self.semantic_weight
+        else:
+            weight = 0.0
+        scores = weight * semantic + (1 - weight) * coverage
+
+        candidates = np.arange(len(self._postings))
+        if source:
+            candidates = np.array([row for row in candidates if self._postings[row]['source'] == source], dtype=int)
+        if candidates.size == 0:
+            return []
+        top_n = min(top_n, candidates.size)
+        top = candidates[np.argpartition(-scores[candidates], top_n - 1)[:top_n]]
+        top = top[np.argsort(-scores[top])]
+
+        user_columns = set(np.flatnonzero(np.unpackbits(user_bits)[:len(self._skills)]))
+        results = []
+        for row in top:
+            posting = self._postings[row]
+            required = {self._skill_index[skill.lower().strip()]: skill for skill in posting['skills']}
+            results.append({
+                **{key: value for key, value in posting.items() if key != 'skills'},
+                'score': round(float(scores[row]), 4),
+                'semantic_score': round(float(semantic[row]), 4),
+                'skill_coverage': round(float(coverage[row]), 4),
+                'matched_skills': [skill for column, skill in required.items() if column in user_columns],
+                'missing_skills': [skill for column, skill in required.items() if column not in user_columns],
+            })
+        return results
+
+# Global instance
+job_matcher = JobMatcher()
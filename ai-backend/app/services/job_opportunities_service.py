@@ -3,6 +3,7 @@ Job Opportunities Service
 Manages job listings with filtering and search capabilities
 """
 
+from bisect import bisect_left
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 import random
@@ -12,6 +13,17 @@ class JobOpportunitiesService:
     
     def __init__(self):
         self.jobs_database = self._initialize_jobs_database()
+        self._build_posted_index()
+    
+    def _build_posted_index(self):
+        """Keep jobs ordered by posting time so time windows are a bisect, not a scan"""
+        self._jobs_by_posted = sorted(
+            self.jobs_database,
+            key=lambda job: datetime.fromisoformat(job["posted_date"])
+        )
+        self._posted_keys = [
+            datetime.fromisoformat(job["posted_date"]) for job in self._jobs_by_posted
+        ]
     
     def _initialize_jobs_database(self) -> List[Dict]:
         """Initialize with sample job opportunities"""
@@ -241,6 +253,16 @@ class JobOpportunitiesService:
             "has_more": (offset + limit) < total
         }
     
+    def get_jobs_posted_between(
+        self,
+        start: datetime,
+        end: Optional[datetime] = None
+    ) -> List[Dict]:
+        """Get jobs posted in [start, end), oldest first"""
+        lo = bisect_left(self._posted_keys, start)
+        hi = bisect_left(self._posted_keys, end) if end else len(self._posted_keys)
+        return self._jobs_by_posted[lo:hi]
+    
     def get_job_by_id(self, job_id: str) -> Optional[Dict]:
         """Get a specific job by ID"""
         for job in self.jobs_database:
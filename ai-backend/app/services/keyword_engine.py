@@ -0,0 +1,167 @@
+"""
+Keyword Engine
+Job-description keyword extraction and skill matching for resume optimization.
+
+Skills vocabulary phrases are found with one Aho-Corasick automaton pass when
+pyahocorasick is installed, or one precompiled regex otherwise. Skill and
+project matching works on precomputed term sets, so scoring a resume against
+many job descriptions costs one pass per description.
+"""
+import logging
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Common technical keywords
+SKILLS_VOCABULARY = (
+    'python', 'java', 'javascript', 'react', 'node.js', 'sql', 'aws', 'docker',
+    'machine learning', 'data analysis', 'web development', 'api', 'database',
+    'git', 'agile', 'scrum', 'testing', 'ci/cd', 'cloud', 'microservices'
+)
+
+STOPWORDS = frozenset([
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our',
+    'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new', 'now', 'old', 'see', 'two',
+    'who', 'boy', 'did', 'she', 'use', 'way', 'many', 'then', 'them', 'well', 'were'
+])
+
+WORD_PATTERN = re.compile(r'\b[A-Za-z]{3,}\b')
+TERM_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#./-]*')
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not (text[index].isalnum() or text[index] == '_')
+
+class KeywordEngine:
+    """
+    Compiled phrase matcher over a skills vocabulary
+
+    Phrases match on word boundaries ("java" is not found inside
+    "javascript"); where phrases overlap, the leftmost and then longest
+    one wins.
+    """
+
+    def __init__(self, vocabulary: Optional[Iterable[str]] = None, max_frequent_words: int = 10):
+        phrases = vocabulary if vocabulary is not None else SKILLS_VOCABULARY
+        self.vocabulary: Tuple[str, ...] = tuple(dict.fromkeys(
+            phrase.strip().lower() for phrase in phrases if phrase.strip()
+        ))
+        self.max_frequent_words = max_frequent_words
+        self._automaton = None
+        self._pattern = None
+
+        if not self.vocabulary:
+            return
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for phrase in self.vocabulary:
+                self._automaton.add_word(phrase, phrase)
+            self._automaton.make_automaton()
+        else:
+            # Longest first, so the regex prefers "machine learning" over a shorter prefix
+            alternatives = '|'.join(re.escape(phrase) for phrase in sorted(self.vocabulary, key=len, reverse=True))
+            self._pattern = re.compile(r'(?<![\w])(?:' + alternatives + r')(?![\w])')
+
+    def find_phrases(self, text: str) -> List[str]:
+        """Vocabulary phrases in `text`, in order of first occurrence"""
+        text_lower = text.lower()
+        if self._pattern is not None:
+            return list(dict.fromkeys(match.group(0) for match in self._pattern.finditer(text_lower)))
+        if self._automaton is None:
+            return []
+
+        spans = []
+        for end, phrase in self._automaton.iter(text_lower):
+            start = end - len(phrase) + 1
+            if _is_boundary(text_lower, start - 1) and _is_boundary(text_lower, end + 1):
+                spans.append((start, -len(phrase), phrase))
+        spans.sort()
+
+        found = []
+        covered_until = -1
+        for start, negative_length, phrase in spans:
+            if start > covered_until:
+                found.append(phrase)
+                covered_until = start - negative_length - 1
+        return list(dict.fromkeys(found))
+
+    def extract_keywords(self, text: str) -> List[str]:
+        """Vocabulary phrases plus words repeated in `text` (job description keywords)"""
+        keywords = self.find_phrases(text)
+
+        word_freq = Counter(
+            word for word in (match.lower() for match in WORD_PATTERN.findall(text))
+            if word not in STOPWORDS
+        )
+        keywords.extend(word for word, freq in word_freq.most_common(self.max_frequent_words) if freq > 1)
+
+        return list(dict.fromkeys(keywords))
+
+    def terms(self, text: str) -> FrozenSet[str]:
+        """Everything a keyword can match in `text`: the whole text, its tokens and its vocabulary phrases"""
+        text_lower = text.lower().strip()
+        if not text_lower:
+            return frozenset()
+        tokens = (token.rstrip('.') for token in TERM_PATTERN.findall(text_lower))
+        return frozenset([text_lower, *tokens, *self.find_phrases(text_lower)])
+
+    def skill_terms(self, skills: Iterable[str]) -> FrozenSet[str]:
+        terms = set()
+        for skill in skills:
+            terms |= self.terms(skill)
+        return frozenset(terms)
+
+    def score(self, job_keywords: List[str], skill_terms: FrozenSet[str],
+              project_terms: List[Tuple[str, FrozenSet[str]]]) -> Dict[str, Any]:
+        """Match one job's keywords against precomputed skill and project term sets"""
+        skill_matches = [keyword for keyword in job_keywords if keyword in skill_terms]
+        matched = set(skill_matches)
+        missing_skills = [keyword for keyword in job_keywords if keyword not in matched]
+
+        keyword_set = set(job_keywords)
+        relevant_projects = [title for title, terms in project_terms if keyword_set & terms]
+
+        return {
+            'skill_matches': skill_matches,
+            'missing_skills': missing_skills,
+            'relevant_projects': relevant_projects,
+            'job_keywords': job_keywords,
+            'match_score': round(len(skill_matches) / len(job_keywords), 4) if job_keywords else 0.0
+        }
+
+    def score_batch(self, skills: List[str], portfolio: List[Dict[str, Any]],
+                    job_descriptions: List[str]) -> List[Dict[str, Any]]:
+        """Score one resume against many job descriptions, in input order"""
+        skill_terms = self.skill_terms(skills)
+        project_terms = [
+            (item.get('title', ''), self.terms(item.get('description', '') or ''))
+            for item in portfolio
+        ]
+        return [
+            self.score(self.extract_keywords(description), skill_terms, project_terms)
+            for description in job_descriptions
+        ]
+
+def _load_vocabulary() -> Tuple[str, ...]:
+    """Built-in vocabulary extended with RESUME_SKILLS_VOCABULARY (one phrase per line)"""
+    path = os.getenv('RESUME_SKILLS_VOCABULARY', '')
+    if not path:
+        return SKILLS_VOCABULARY
+    try:
+        with open(path, encoding='utf-8') as f:
+            extra = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        return SKILLS_VOCABULARY + tuple(extra)
+    except OSError as e:
+        logger.warning(f"Could not read skills vocabulary {path}: {str(e)}")
+        return SKILLS_VOCABULARY
+
+# Global instance
+keyword_engine = KeywordEngine(_load_vocabulary())
@@ -0,0 +1,160 @@
+"""
+Notification Deduplication Service
+Idempotency keys for (user, job, channel) so overlapping runs and task
+retries never notify the same user about the same job twice.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class RedisKeyStore:
+    """Exact key set in Redis, shared by every worker"""
+
+    def __init__(self, redis_url: str):
+        import redis
+        self.client = redis.Redis.from_url(redis_url)
+        self.client.ping()
+
+    def add_if_absent(self, key: str, ttl_seconds: int) -> bool:
+        return bool(self.client.set(key, 1, nx=True, ex=ttl_seconds))
+
+    def discard(self, key: str):
+        self.client.delete(key)
+
+class SQLiteKeyStore:
+    """Exact key set in a local SQLite file (single-host fallback)"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS notification_keys (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)'
+        )
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def add_if_absent(self, key: str, ttl_seconds: int) -> bool:
+        now = time.time()
+        with self._lock:
+            if now - self._last_purge > 3600:
+                self.connection.execute('DELETE FROM notification_keys WHERE expires_at <= ?', (now,))
+                self._last_purge = now
+            self.connection.execute('DELETE FROM notification_keys WHERE key = ? AND expires_at <= ?', (key, now))
+            cursor = self.connection.execute(
+                'INSERT OR IGNORE INTO notification_keys (key, expires_at) VALUES (?, ?)',
+                (key, now + ttl_seconds)
+            )
+            return cursor.rowcount == 1
+
+    def discard(self, key: str):
+        with self._lock:
+            self.connection.execute('DELETE FROM notification_keys WHERE key = ?', (key,))
+
+class NotificationDeduplicator:
+    """
+    Claims (user, job, channel) keys before a provider call
+
+    Keys live in Redis when it is reachable, SQLite otherwise, and expire
+    after the TTL. Claiming is a single atomic add-if-absent, so concurrent
+    workers can't both win the same key. If the store itself fails the
+    notification is sent anyway: a rare duplicate beats a silently dropped
+    notification.
+    """
+
+    def __init__(self, redis_url: Optional[str], sqlite_path: str, ttl_seconds: int):
+        self.redis_url = redis_url
+        self.sqlite_path = sqlite_path
+        self.ttl_seconds = ttl_seconds
+        self._store = None
+        self._store_lock = threading.Lock()
+
+    @property
+    def store(self):
+        """Connect lazily so importing the module never blocks on Redis"""
+        if self._store is None:
+            with self._store_lock:
+                if self._store is None:
+                    self._store = self._connect()
+        return self._store
+
+    def _connect(self):
+        if self.redis_url:
+            try:
+                store = RedisKeyStore(self.redis_url)
+                logger.info("Notification dedup using Redis")
+                return store
+            except Exception as e:
+                logger.warning(f"Redis unavailable for notification dedup, using SQLite: {str(e)}")
+        return SQLiteKeyStore(self.sqlite_path)
+
+    @staticmethod
+    def make_key(user_key: str, job_key: str, channel: str) -> str:
+        return f"notif:{user_key}:{job_key}:{channel}"
+
+    def claim(self, user_key: str, job_key: str, channel: str) -> bool:
+        """
+        Reserve a send; returns False if this notification was already sent
+
+        Call release() if the send then fails so a retry can go out.
+        """
+        return self.store.add_if_absent(self.make_key(user_key, job_key, channel), self.ttl_seconds)
+
+    def release(self, user_key: str, job_key: str, channel: str):
+        """Give up a claim after a failed send"""
+        self.store.discard(self.make_key(user_key, job_key, channel))
+
+    def send_once(self, user_key: str, job_key: str, channel: str, send: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Run a provider call unless this (user, job, channel) was already notified
+
+        Args:
+            send: Zero-argument callable returning the provider result dict
+
+        Returns:
+            The provider result, or a success dict marked 'duplicate' when skipped
+        """
+        try:
+            claimed = self.claim(user_key, job_key, channel)
+        except Exception as e:
+            logger.warning(f"Notification dedup store failed, sending without a claim: {str(e)}")
+            claimed = None
+        if claimed is False:
+            return {'success': True, 'duplicate': True, 'message': 'Already notified'}
+
+        try:
+            result = send()
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+
+        # Let a retry send it again if this attempt failed
+        if claimed and not result.get('success'):
+            try:
+                self.release(user_key, job_key, channel)
+            except Exception as e:
+                logger.warning(f"Could not release notification claim: {str(e)}")
+        return result
+
+def recipient_key(user: Dict[str, Any]) -> str:
+    """Stable identity for a recipient (user id, else email, else phone)"""
+    return str(user.get('user_id') or user.get('email') or user.get('phone') or '')
+
+def job_key(job: Dict[str, Any]) -> str:
+    """Stable identity for a job (job id, else a hash of title/company/apply URL)"""
+    if job.get('job_id'):
+        return str(job['job_id'])
+    fingerprint = f"{job.get('title')}|{job.get('company')}|{job.get('apply_url')}"
+    return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+
+# Global instance
+notification_dedup = NotificationDeduplicator(
+    redis_url=os.getenv('REDIS_URL'),
+    sqlite_path=os.getenv('NOTIFICATION_DEDUP_DB', 'data/notification_dedup.sqlite3'),
+    ttl_seconds=int(os.getenv('NOTIFICATION_DEDUP_TTL_HOURS', '72')) * 3600
+)
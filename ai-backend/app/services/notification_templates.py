@@ -0,0 +1,335 @@
+"""
+Notification Templates
+Compiled-once Jinja2 templates for opportunity notifications and the daily
+digest. HTML templates are autoescaped, so job fields can't inject markup.
+
+Job-level content (subject, job details, WhatsApp/SMS text) is rendered once
+per job and cached; only the greeting is rendered per recipient.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache, select_autoescape
+
+OPPORTUNITY_EMAIL_HEAD = """
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+        }
+        .container {
+            max-width: 600px;
+            margin: 0 auto;
+            padding: 20px;
+        }
+        .header {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 30px;
+            text-align: center;
+            border-radius: 10px 10px 0 0;
+        }
+        .content {
+            background: #f9f9f9;
+            padding: 30px;
+            border-radius: 0 0 10px 10px;
+        }
+        .job-title {
+            font-size: 24px;
+            font-weight: bold;
+            color: #667eea;
+            margin-bottom: 10px;
+        }
+        .company {
+            font-size: 18px;
+            color: #666;
+            margin-bottom: 20px;
+        }
+        .details {
+            background: white;
+            padding: 20px;
+            border-radius: 8px;
+            margin: 20px 0;
+        }
+        .detail-item {
+            margin: 10px 0;
+            padding: 10px;
+            border-left: 3px solid #667eea;
+            background: #f0f4ff;
+        }
+        .button {
+            display: inline-block;
+            padding: 15px 30px;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            text-decoration: none;
+            border-radius: 5px;
+            font-weight: bold;
+            margin: 20px 0;
+        }
+        .footer {
+            text-align: center;
+            color: #999;
+            margin-top: 30px;
+            font-size: 12px;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🎯 New Opportunity Alert!</h1>
+            <p>We found a great opportunity that matches your profile</p>
+        </div>
+
+        <div class="content">
+"""
+
+OPPORTUNITY_EMAIL_GREETING = """            <p>Hi {{ user_name }},</p>
+"""
+
+OPPORTUNITY_EMAIL_BODY = """
+            <div class="job-title">{{ title }}</div>
+            <div class="company">🏢 {{ company }}</div>
+
+            <div class="details">
+                <div class="detail-item">
+                    <strong>📍 Location:</strong> {{ location }}
+                </div>
+                {% if salary %}<div class="detail-item"><strong>💰 Salary:</strong> {{ salary }}</div>{% endif %}
+                <div class="detail-item">
+                    <strong>📋 Description:</strong><br>
+                    {{ description[:300] }}{% if description|length > 300 %}...{% endif %}
+                </div>
+            </div>
+
+            <center>
+                <a href="{{ apply_url }}" class="button">Apply Now 🚀</a>
+            </center>
+
+            <p>Don't miss this opportunity! Click the button above to apply.</p>
+
+            <p>Good luck with your application!</p>
+
+            <p>Best regards,<br>
+            <strong>EduCareer Team</strong></p>
+        </div>
+
+        <div class="footer">
+            <p>You're receiving this email because you signed up for job alerts on EduCareer.</p>
+            <p>© 2025 EduCareer. All rights reserved.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+OPPORTUNITY_SUBJECT = "🎯 New Opportunity: {{ title }} at {{ company }}"
+
+OPPORTUNITY_WHATSAPP = """🎯 New Opportunity Alert!
+
+📋 Position: {{ title }}
+🏢 Company: {{ company }}
+📍 Location: {{ location }}
+{% if salary %}💰 Salary: {{ salary }}
+{% endif %}
+Apply now: {{ apply_url }}
+
+Good luck! 🚀
+- EduCareer Team"""
+
+OPPORTUNITY_SMS = "New Job: {{ title }} at {{ company }}. Apply: {{ apply_url }}"
+
+DIGEST_SUBJECT = "📬 Your daily digest: {{ count }} new opportunit{{ 'y' if count == 1 else 'ies' }}"
+
+DIGEST_EMAIL = """
+<!DOCTYPE html>
+<html>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+    <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
+            <h1>📬 Your Daily Opportunity Digest</h1>
+        </div>
+        <div style="background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px;">
+            <p>Hi {{ user_name }},</p>
+            <p>Here are the opportunities posted in the last 24 hours that match your preferences:</p>
+            {% for job in jobs %}
+            <div style="background: white; padding: 15px; margin: 10px 0; border-left: 3px solid #667eea; border-radius: 4px;">
+                <div style="font-size: 18px; font-weight: bold; color: #667eea;">{{ job.title }}</div>
+                <div>🏢 {{ job.company }} &middot; 📍 {{ job.location }}</div>
+                {% if job.salary %}<div>💰 {{ job.salary }}</div>{% endif %}
+                <a href="{{ job.apply_url }}" style="color: #764ba2; font-weight: bold;">View &amp; apply →</a>
+            </div>
+            {% endfor %}
+            <p>Best regards,<br><strong>EduCareer Team</strong></p>
+        </div>
+        <div style="text-align: center; color: #999; margin-top: 30px; font-size: 12px;">
+            <p>You're receiving this digest because you chose daily job alerts on EduCareer.</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+TEMPLATES = {
+    'opportunity_email_head.html': OPPORTUNITY_EMAIL_HEAD,
+    'opportunity_email_greeting.html': OPPORTUNITY_EMAIL_GREETING,
+    'opportunity_email_body.html': OPPORTUNITY_EMAIL_BODY,
+    'opportunity_subject.txt': OPPORTUNITY_SUBJECT,
+    'opportunity_whatsapp.txt': OPPORTUNITY_WHATSAPP,
+    'opportunity_sms.txt': OPPORTUNITY_SMS,
+    'digest_subject.txt': DIGEST_SUBJECT,
+    'digest_email.html': DIGEST_EMAIL,
+}
+
+DEFAULT_APPLY_URL = 'http://localhost:5173/opportunities'
+
+# Rendered job parts kept per process
+RENDER_CACHE_SIZE = int(os.getenv('NOTIFICATION_RENDER_CACHE_SIZE', '256'))
+
+def _build_environment() -> Environment:
+    """Jinja2 environment with bytecode cached on disk across worker restarts"""
+    cache_dir = os.getenv(
+        'NOTIFICATION_TEMPLATE_CACHE_DIR',
+        os.path.join(tempfile.gettempdir(), 'educareer-notification-templates')
+    )
+    os.makedirs(cache_dir, exist_ok=True)
+
+    return Environment(
+        loader=DictLoader(TEMPLATES),
+        bytecode_cache=FileSystemBytecodeCache(cache_dir),
+        autoescape=select_autoescape(enabled_extensions=('html',), default_for_string=False),
+        auto_reload=False
+    )
+
+_env = _build_environment()
+
+# Compile every template once at import
+_templates = {name: _env.get_template(name) for name in TEMPLATES}
+_email_head = _templates['opportunity_email_head.html'].render()
+_email_greeting = _templates['opportunity_email_greeting.html']
+
+class RenderedOpportunity:
+    """Job-level notification content shared by every recipient"""
+
+    def __init__(self, subject: str, email_body: str, whatsapp: str, sms: str):
+        self.subject = subject
+        self.email_body = email_body
+        self.whatsapp = whatsapp
+        self.sms = sms
+
+    def email_html(self, user_name: str) -> str:
+        """Assemble the full email for one recipient"""
+        return _email_head + _email_greeting.render(user_name=user_name) + self.email_body
+
+_render_cache: "OrderedDict[str, RenderedOpportunity]" = OrderedDict()
+_render_lock = threading.Lock()
+
+def _cache_key(job: Dict[str, Any]) -> str:
+    payload = json.dumps(job, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+def render_opportunity(job_data: Dict[str, Any]) -> RenderedOpportunity:
+    """
+    Render (or fetch from cache) the job-level parts of an opportunity notification
+
+    Args:
+        job_data: Dict with title, company, location, description and
+                  optional apply_url and salary
+
+    Returns:
+        RenderedOpportunity for the job
+    """
+    job = {
+        'title': job_data['title'],
+        'company': job_data['company'],
+        'location': job_data.get('location') or '',
+        'description': job_data.get('description') or '',
+        'apply_url': job_data.get('apply_url') or DEFAULT_APPLY_URL,
+        'salary': job_data.get('salary'),
+    }
+    key = _cache_key(job)
+
+    with _render_lock:
+        rendered = _render_cache.get(key)
+        if rendered is not None:
+            _render_cache.move_to_end(key)
+            return rendered
+
+    rendered = RenderedOpportunity(
+        subject=_templates['opportunity_subject.txt'].render(**job),
+        email_body=_templates['opportunity_email_body.html'].render(**job),
+        whatsapp=_templates['opportunity_whatsapp.txt'].render(**job),
+        sms=_templates['opportunity_sms.txt'].render(**job),
+    )
+
+    with _render_lock:
+        _render_cache[key] = rendered
+        if len(_render_cache) > RENDER_CACHE_SIZE:
+            _render_cache.popitem(last=False)
+
+    return rendered
+
+def render_digest(user_name: str, jobs: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """
+    Render the daily digest email (job fields are HTML-escaped)
+
+    Args:
+        user_name: Recipient's name
+        jobs: Job dicts with title, company, location and optional apply_url and salary
+
+    Returns:
+        (subject, html body)
+    """
+    entries = [{
+        'title': job.get('title') or '',
+        'company': job.get('company') or '',
+        'location': job.get('location') or '',
+        'apply_url': job.get('apply_url') or DEFAULT_APPLY_URL,
+        'salary': job.get('salary'),
+    } for job in jobs]
+    subject = _templates['digest_subject.txt'].render(count=len(entries))
+    html = _templates['digest_email.html'].render(user_name=user_name, jobs=entries)
+    return subject, html
+
+_PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+class MessageTemplate:
+    """
+    User-written message with {{placeholder}} fields, split into segments once
+
+    Messages come from API callers, so they are not compiled as Jinja source;
+    unknown placeholders are left in the text unchanged.
+    """
+
+    def __init__(self, message: str, fields: frozenset):
+        self._segments: List[Any] = []
+        position = 0
+        for match in _PLACEHOLDER.finditer(message):
+            if match.group(1) not in fields:
+                continue
+            self._segments.append(message[position:match.start()])
+            self._segments.append((match.group(1),))
+            position = match.end()
+        self._segments.append(message[position:])
+
+    def render(self, **values: str) -> str:
+        return ''.join(
+            values.get(segment[0], '') if isinstance(segment, tuple) else segment
+            for segment in self._segments
+        )
+
+@lru_cache(maxsize=128)
+def compile_message(message: str, fields: frozenset = frozenset({'name', 'user_name'})) -> MessageTemplate:
+    """Compile a user-written message (cached, so bulk sends compile it once)"""
+    return MessageTemplate(message, fields)
@@ -0,0 +1,277 @@
+"""
+OCR Pipeline
+Resolution-normalized, grid-aware OCR for timetable images.
+
+Large photos are scaled down to a target DPI, table cells are found with
+morphological line detection, and the cells are recognised concurrently by a
+thread pool that reuses one Tesseract engine per thread (tesserocr). Without
+tesserocr the whole image goes through one pytesseract image_to_data call and
+its words are assigned to cells by position, so there is still one tesseract
+process per image rather than one per cell.
+"""
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image
+from app.services.timetable_cache import TimetableResultCache
+
+try:
+    from tesserocr import PyTessBaseAPI, PSM
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Timetables are at most a landscape letter/A4 page, so this is the longest
+# side we need at the target DPI; anything larger only slows Tesseract down
+PAGE_LONG_SIDE_INCHES = 11.7
+
+# Cell bounding box: (x, y, width, height)
+Cell = Tuple[int, int, int, int]
+
+class OCRPipeline:
+    """
+    Image → text for timetables
+
+    Results are cached by the SHA-256 of the uploaded bytes, so re-uploads of
+    the same file skip OCR entirely.
+    """
+
+    def __init__(
+        self,
+        target_dpi: int = 300,
+        workers: int = 4,
+        min_cells: int = 4,
+        cache_size: int = 128,
+        max_pixels: int = 80_000_000
+    ):
+        self.target_dpi = target_dpi
+        self.max_side = int(target_dpi * PAGE_LONG_SIDE_INCHES)
+        self.workers = workers
+        self.min_cells = min_cells
+        self.cache_size = cache_size
+        self.max_pixels = max_pixels
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._local = threading.local()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        if not TESSEROCR_AVAILABLE:
+            logger.info("tesserocr not installed, OCR will use pytesseract")
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+        return self._executor
+
+    def extract_text(self, source: Union[bytes, str], content_hash: Optional[str] = None) -> str:
+        """
+        OCR an uploaded image (blocking; run it in an executor)
+
+        Args:
+            source: Image bytes, or the path of a spooled upload
+            content_hash: SHA-256 of the file if the caller already has it
+        """
+        key = content_hash or TimetableResultCache.hash_content(source)
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        image, target_size = self._open_image(source)
+        with image:
+            text = self.ocr_image(image, target_size)
+
+        with self._cache_lock:
+            self._cache[key] = text
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    def _open_image(self, source: Union[bytes, str]) -> Tuple[Image.Image, Tuple[int, int]]:
+        """
+        Open an image without decoding more pixels than OCR needs
+
+        Only the header is read up front, so oversized images are rejected
+        before decoding; JPEGs are decoded directly at a reduced scale.
+        Returns the image and the size OCR should run at, computed from the
+        original dimensions and DPI (draft() may already have shrunk it).
+        """
+        image = Image.open(source if isinstance(source, str) else io.BytesIO(source))
+        if image.width * image.height > self.max_pixels:
+            image.close()
+            raise ValueError(f"Image is too large ({image.width}x{image.height} pixels)")
+
+        target_size = self._target_size(image)
+        if target_size != image.size:
+            # draft() picks the smallest JPEG scale that is still at least this size
+            image.draft('L', target_size)
+        return image, target_size
+
+    def _target_size(self, image: Image.Image) -> Tuple[int, int]:
+        """Size with the long side fitting the target DPI (never upscaled)"""
+        scale = 1.0
+        dpi = image.info.get('dpi')
+        if dpi and dpi[0] and dpi[0] > self.target_dpi:
+            scale = self.target_dpi / float(dpi[0])
+        longest = max(image.size)
+        if longest * scale > self.max_side:
+            scale = self.max_side / float(longest)
+        if scale >= 1.0:
+            return image.size
+        return max(1, int(image.width * scale)), max(1, int(image.height * scale))
+
+    def ocr_image(self, image: Image.Image, target_size: Optional[Tuple[int, int]] = None) -> str:
+        """OCR a PIL image, cell by cell when a table grid is found"""
+        gray = self._normalize(image, target_size or self._target_size(image))
+
+        # Threshold and denoise as before, now on the downscaled image
+        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        denoised = cv2.medianBlur(thresh, 5)
+
+        cells = self._detect_cells(gray)
+        if len(cells) < self.min_cells:
+            return self._recognize(denoised)
+        if not TESSEROCR_AVAILABLE:
+            return self._recognize_by_position(denoised, cells)
+
+        crops = [denoised[y:y + h, x:x + w] for x, y, w, h in cells]
+        texts = list(self.executor.map(self._recognize, crops))
+        return self._assemble_rows(cells, texts)
+
+    @staticmethod
+    def _normalize(image: Image.Image, target_size: Tuple[int, int]) -> np.ndarray:
+        """Grayscale the image and resize it to the OCR target size"""
+        # Converting straight to L avoids the RGB -> BGR -> gray round trip
+        image = image.convert('L')
+        if image.size[0] > target_size[0]:
+            image = image.resize(target_size, Image.LANCZOS)
+        return np.asarray(image)
+
+    def _detect_cells(self, gray: np.ndarray) -> List[Cell]:
+        """Find table cells from the horizontal and vertical ruling lines"""
+        inverted = cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 15, 10
+        )
+        height, width = gray.shape
+
+        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(10, width // 40), 1))
+        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(10, height // 40)))
+        horizontal = cv2.morphologyEx(inverted, cv2.MORPH_OPEN, horizontal_kernel)
+        vertical = cv2.morphologyEx(inverted, cv2.MORPH_OPEN, vertical_kernel)
+        grid = cv2.dilate(cv2.add(horizontal, vertical), np.ones((3, 3), np.uint8))
+
+        # Two-level hierarchy: the ruling lines' outer boundaries, and the
+        # holes inside them, which are the cells
+        contours, hierarchy = cv2.findContours(grid, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+        if hierarchy is None:
+            return []
+        min_width, min_height = width // 50, height // 100
+        cells = []
+        for contour, (_, _, _, parent) in zip(contours, hierarchy[0]):
+            if parent == -1:
+                continue
+            x, y, w, h = cv2.boundingRect(contour)
+            # Skip specks
+            if w < min_width or h < min_height:
+                continue
+            cells.append((x, y, w, h))
+
+        # A box that encloses other cells is a table border, not a cell
+        return [
+            cell for cell in cells
+            if not any(other != cell and OCRPipeline._contains(cell, other) for other in cells)
+        ]
+
+    @staticmethod
+    def _contains(outer: Cell, inner: Cell) -> bool:
+        x, y, w, h = outer
+        ix, iy, iw, ih = inner
+        return x <= ix and y <= iy and ix + iw <= x + w and iy + ih <= y + h
+
+    def _recognize(self, image: np.ndarray) -> str:
+        """OCR one image with this thread's Tesseract engine"""
+        if not TESSEROCR_AVAILABLE:
+            return pytesseract.image_to_string(image, config='--psm 6')
+
+        api = getattr(self._local, 'api', None)
+        if api is None:
+            api = PyTessBaseAPI(psm=PSM.SINGLE_BLOCK)
+            self._local.api = api
+        api.SetImage(Image.fromarray(image))
+        return api.GetUTF8Text()
+
+    def _recognize_by_position(self, image: np.ndarray, cells: List[Cell]) -> str:
+        """
+        One image_to_data call for the whole image, words assigned to the
+        cell containing their centre
+
+        Words outside every cell (titles, notes) are grouped by Tesseract
+        line and kept as cells of their own.
+        """
+        data = pytesseract.image_to_data(image, config='--psm 6', output_type=pytesseract.Output.DICT)
+        words = {index: [] for index in range(len(cells))}
+        loose: "OrderedDict[Tuple[int, int, int], List[int]]" = OrderedDict()
+        for i, word in enumerate(data['text']):
+            if not word.strip():
+                continue
+            cx = data['left'][i] + data['width'][i] / 2
+            cy = data['top'][i] + data['height'][i] / 2
+            for index, (x, y, w, h) in enumerate(cells):
+                if x <= cx < x + w and y <= cy < y + h:
+                    words[index].append(word)
+                    break
+            else:
+                loose.setdefault((data['block_num'][i], data['par_num'][i], data['line_num'][i]), []).append(i)
+
+        all_cells = list(cells)
+        texts = [' '.join(words[index]) for index in range(len(cells))]
+        for indices in loose.values():
+            left = min(data['left'][i] for i in indices)
+            top = min(data['top'][i] for i in indices)
+            right = max(data['left'][i] + data['width'][i] for i in indices)
+            bottom = max(data['top'][i] + data['height'][i] for i in indices)
+            all_cells.append((left, top, right - left, bottom - top))
+            texts.append(' '.join(data['text'][i] for i in indices))
+        return self._assemble_rows(all_cells, texts)
+
+    @staticmethod
+    def _assemble_rows(cells: List[Cell], texts: List[str]) -> str:
+        """Join cell text row by row so each timetable row stays on one line"""
+        ordered = sorted(zip(cells, texts), key=lambda item: (item[0][1], item[0][0]))
+        lines, row, row_top, row_height = [], [], None, 0
+        for (x, y, w, h), text in ordered:
+            if row_top is not None and y > row_top + row_height / 2:
+                lines.append(row)
+                row = []
+                row_top = None
+            if row_top is None:
+                row_top, row_height = y, h
+            row.append((x, ' '.join(text.split())))
+        if row:
+            lines.append(row)
+
+        return '\n'.join(
+            '  '.join(text for _, text in sorted(line) if text) for line in lines
+        )
+
+# Global instance
+ocr_pipeline = OCRPipeline(
+    target_dpi=int(os.getenv('TIMETABLE_OCR_TARGET_DPI', '300')),
+    workers=int(os.getenv('TIMETABLE_OCR_WORKERS', '4')),
+    cache_size=int(os.getenv('TIMETABLE_OCR_CACHE_SIZE', '128')),
+    max_pixels=int(os.getenv('TIMETABLE_MAX_IMAGE_PIXELS', '80000000'))
+)
@@ -0,0 +1,296 @@
+"""
+Portfolio Re-verifier
+Refreshes stored portfolio verification results in the background, oldest
+first, so GET /portfolio/{user_id} serves current scores without verifying
+on the request path.
+
+Each run takes the portfolios whose oldest item is past the staleness
+cutoff, re-checks as many of their stale items as the per-domain budgets
+allow, and writes the changed portfolios back in one bulk write. Items that
+don't fit in this run's budget stay stale and are picked up first next run.
+
+Links are probed with a conditional HEAD (If-None-Match / If-Modified-Since
+from the previous check); a 304 keeps the stored result. Anything else,
+including a probe that fails outright, runs the full verifier, so dead links
+are recorded as unverified. GitHub repos are re-checked with conditional
+requests through the rate-limit-aware GitHub client, so unchanged repos don't
+spend the budget; a GitHub batch that has to wait keeps its stored results
+and falls due again after a backoff, so deferred portfolios don't hold the
+front of the queue.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+import httpx
+import motor.motor_asyncio
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.services.github_client import GitHubRateLimited, github_client, parse_repo_url
+from app.services.http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+RESULT_FIELDS = ('verified', 'verification_method', 'confidence_score', 'issues', 'metadata')
+
+def _legacy_verified_at(portfolio: Dict[str, Any]) -> float:
+    """Epoch seconds from the portfolio's verification_date ({"$date": {"$numberLong": ms}})"""
+    try:
+        return int(portfolio['verification_date']['$date']['$numberLong']) / 1000
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+def _item_verified_at(item: Dict[str, Any], portfolio: Dict[str, Any]) -> float:
+    return item.get('verified_at') or _legacy_verified_at(portfolio)
+
+def _score(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Portfolio totals, as save_verification_results stores them"""
+    verified = sum(1 for item in items if item.get('verified'))
+    return {
+        "total_items": len(items),
+        "verified_items": verified,
+        "verification_score": (verified / len(items)) * 100 if items else 0
+    }
+
+class PortfolioReverifier:
+    """
+    Incremental, budgeted re-verification of user_portfolios
+
+    Args:
+        max_age: Seconds after which an item's verification is stale
+        max_portfolios: Stale portfolios loaded per run
+        max_items: Items re-checked per run
+        domain_budget: Requests per domain per run
+        github_reserve: GitHub rate-limit budget left untouched for /verify
+        retry_backoff: Seconds before a deferred item is due again
+    """
+
+    def __init__(self, max_age: float = 7 * 24 * 3600, max_portfolios: int = 200,
+                 max_items: int = 500, domain_budget: int = 20, github_reserve: int = 100,
+                 retry_backoff: float = 3600):
+        self.max_age = max_age
+        self.max_portfolios = max_portfolios
+        self.max_items = max_items
+        self.domain_budget = domain_budget
+        self.github_reserve = github_reserve
+        self.retry_backoff = retry_backoff
+
+    def _select(self, portfolios: List[Dict[str, Any]], cutoff: float) -> List[Tuple[int, int, Dict[str, Any]]]:
+        """Stale items oldest first, within the per-domain and per-run budgets"""
+        stale = []
+        for doc_index, portfolio in enumerate(portfolios):
+            for item_index, item in enumerate(portfolio.get('items') or []):
+                if not isinstance(item, dict) or not item.get('url'):
+                    continue
+                verified_at = _item_verified_at(item, portfolio)
+                if verified_at < cutoff:
+                    stale.append((verified_at, doc_index, item_index, item))
+        stale.sort(key=lambda entry: entry[0])
+
+        budgets: Dict[str, int] = {}
+        selected = []
+        for _, doc_index, item_index, item in stale:
+            if len(selected) >= self.max_items:
+                break
+            domain = http_client.domain(item['url'])
+            if budgets.setdefault(domain, self.domain_budget) <= 0:
+                continue
+            budgets[domain] -= 1
+            selected.append((doc_index, item_index, item))
+        return selected
+
+    async def _probe(self, item: Dict[str, Any]) -> Tuple[bool, Dict[str, str]]:
+        """Conditional HEAD; (unchanged, validators to store for next time)"""
+        headers = {}
+        if item.get('etag'):
+            headers['If-None-Match'] = item['etag']
+        if item.get('last_modified'):
+            headers['If-Modified-Since'] = item['last_modified']
+
+        response = await http_client.head(item['url'], headers=headers, follow_redirects=True)
+        validators = {}
+        if response.headers.get('ETag'):
+            validators['etag'] = response.headers['ETag']
+        if response.headers.get('Last-Modified'):
+            validators['last_modified'] = response.headers['Last-Modified']
+        return response.status_code == 304 and bool(headers), validators
+
+    async def _check_link(self, user_id: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Fresh result fields for a changed link, validators only for an unchanged one"""
+        from app.routers.portfolio_verification import PortfolioItem, verify_single_item
+
+        try:
+            unchanged, validators = await self._probe(item)
+        except httpx.HTTPError as e:
+            # Let the full verifier record why the link is unreachable
+            logger.info(f"Re-verification probe failed for {item['url']}: {str(e)}")
+            unchanged, validators = False, {}
+        if unchanged:
+            return validators
+
+        result = await verify_single_item(PortfolioItem(
+            user_id=user_id,
+            item_type=item.get('type', 'project'),
+            title=item.get('title', ''),
+            url=item['url']
+        ))
+        return {**{field: result[field] for field in RESULT_FIELDS if field in result}, **validators}
+
+    async def _check_github(self, items: List[Dict[str, Any]], results: Dict[int, Dict[str, Any]]):
+        """Results for GitHub items, or a retry delay for each item when the batch has to wait"""
+        from app.routers.portfolio_verification import github_result
+
+        repos = {}
+        for item in items:
+            repo = parse_repo_url(item['url'])
+            if repo:
+                repos[id(item)] = repo
+            else:
+                results[id(item)] = {"verified": False, "issues": ["Invalid GitHub URL format"], "confidence_score": 0.0}
+        if not repos:
+            return
+
+        def defer(seconds: float):
+            for item in items:
+                if id(item) in repos:
+                    results[id(item)] = {"retry_after": max(seconds, self.retry_backoff)}
+
+        # Re-checks use conditional REST, where unchanged repos are free with a token
+        resource = 'core'
+        remaining = github_client.remaining(resource)
+        if remaining is not None and remaining - len(repos) < self.github_reserve:
+            logger.info(f"Deferring {len(repos)} GitHub items: {remaining} {resource} requests left")
+            defer(github_client.seconds_until_reset(resource))
+            return
+
+        try:
+            repo_data = await github_client.fetch_repos(repos.values(), conditional=True)
+        except GitHubRateLimited as e:
+            logger.warning(f"GitHub re-verification deferred: {str(e)}")
+            defer(e.retry_after)
+            return
+        except (httpx.HTTPError, RuntimeError) as e:
+            logger.warning(f"GitHub re-verification deferred: {str(e)}")
+            defer(self.retry_backoff)
+            return
+
+        for item in items:
+            repo = repos.get(id(item))
+            if repo:
+                results[id(item)] = github_result(repo_data.get(repo))
+
+    async def run(self) -> Dict[str, Any]:
+        """One incremental pass; opens its own MongoDB client for the current event loop"""
+        started = time.perf_counter()
+        now = time.time()
+        cutoff = now - self.max_age
+
+        client = motor.motor_asyncio.AsyncIOMotorClient(settings.MONGODB_URI)
+        try:
+            collection = client.get_database("edu-career-ai").user_portfolios
+            portfolios = await collection.find(
+                {"items.url": {"$exists": True},
+                 "$or": [{"oldestVerifiedAt": {"$lt": cutoff}}, {"oldestVerifiedAt": {"$exists": False}}]},
+                {"userId": 1, "items": 1, "verification_date": 1, "updatedAt": 1}
+            ).sort("oldestVerifiedAt", 1).limit(self.max_portfolios).to_list(length=self.max_portfolios)
+
+            selected = self._select(portfolios, cutoff)
+            github_items = [item for _, _, item in selected if "github.com" in http_client.domain(item['url'])]
+            link_items = [
+                (doc_index, item) for doc_index, _, item in selected
+                if "github.com" not in http_client.domain(item['url'])
+            ]
+
+            results: Dict[int, Dict[str, Any]] = {}
+            if github_items:
+                await self._check_github(github_items, results)
+            if link_items:
+                # Concurrent; the shared client holds each domain to its own limit
+                checked = await asyncio.gather(*(
+                    self._check_link(portfolios[doc_index].get('userId', ''), item)
+                    for doc_index, item in link_items
+                ))
+                for (_, item), update in zip(link_items, checked):
+                    results[id(item)] = update
+
+            # Apply results per portfolio
+            changed: Dict[int, List[Dict[str, Any]]] = {}
+            for doc_index, item_index, item in selected:
+                update = results.get(id(item))
+                if update is None:
+                    continue
+                items = changed.setdefault(doc_index, list(portfolios[doc_index]['items']))
+                refreshed = dict(item)
+                fields = {field: update[field] for field in RESULT_FIELDS if field in update}
+                if 'verification_details' in item:
+                    # Added through /add-achievement
+                    refreshed['verification_details'] = {**(item['verification_details'] or {}), **fields}
+                    if 'verified' in fields:
+                        refreshed['verified'] = fields['verified']
+                else:
+                    refreshed.update(fields)
+                for validator in ('etag', 'last_modified'):
+                    if validator in update:
+                        refreshed[validator] = update[validator]
+                if 'retry_after' in update:
+                    # Stored result kept; dated so the item is stale again once the delay passes
+                    refreshed['verified_at'] = max(_item_verified_at(item, portfolios[doc_index]),
+                                                   cutoff + update['retry_after'])
+                else:
+                    refreshed['verified_at'] = now
+                items[item_index] = refreshed
+
+            requests = []
+            for doc_index, items in changed.items():
+                portfolio = portfolios[doc_index]
+                oldest = min(
+                    (_item_verified_at(item, portfolio) for item in items if isinstance(item, dict) and item.get('url')),
+                    default=now
+                )
+                # Skipped if the user re-verified or edited the portfolio meanwhile
+                requests.append(UpdateOne(
+                    {"_id": portfolio['_id'],
+                     "verification_date": {"$eq": portfolio.get('verification_date')},
+                     "updatedAt": {"$eq": portfolio.get('updatedAt')}},
+                    {"$set": {"items": items, "oldestVerifiedAt": oldest, **_score(items)}}
+                ))
+
+            written = 0
+            if requests:
+                try:
+                    outcome = await collection.bulk_write(requests, ordered=False)
+                    written = outcome.modified_count
+                except BulkWriteError as e:
+                    written = e.details.get('nModified', 0)
+                    logger.warning(f"Re-verification had {len(e.details.get('writeErrors', []))} rejected writes")
+        finally:
+            client.close()
+            await http_client.close()
+
+        return {
+            'portfolios_scanned': len(portfolios),
+            'items_selected': len(selected),
+            'items_checked': sum(1 for update in results.values() if 'retry_after' not in update),
+            'unchanged': sum(
+                1 for update in results.values()
+                if 'retry_after' not in update and not any(field in update for field in RESULT_FIELDS)
+            ),
+            'deferred': sum(1 for update in results.values() if 'retry_after' in update),
+            'portfolios_updated': written,
+            'github_remaining': github_client.remaining('core'),
+            'duration_seconds': round(time.perf_counter() - started, 2)
+        }
+
+# Global instance
+portfolio_reverifier = PortfolioReverifier(
+    max_age=float(os.getenv('PORTFOLIO_REVERIFY_MAX_AGE_HOURS', '168')) * 3600,
+    max_portfolios=int(os.getenv('PORTFOLIO_REVERIFY_MAX_PORTFOLIOS', '200')),
+    max_items=int(os.getenv('PORTFOLIO_REVERIFY_MAX_ITEMS', '500')),
+    domain_budget=int(os.getenv('PORTFOLIO_REVERIFY_DOMAIN_BUDGET', '20')),
+    github_reserve=int(os.getenv('PORTFOLIO_REVERIFY_GITHUB_RESERVE', '100')),
+    retry_backoff=float(os.getenv('PORTFOLIO_REVERIFY_RETRY_MINUTES', '60')) * 60
+)
@@ -1,4 +1,4 @@
-from sentence_transformers import SentenceTransformer
+from app.services.inference_backend import load_sentence_encoder
 import networkx as nx
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
@@ -12,7 +12,7 @@ import os
 class RecommendationEngine:
     def __init__(self):
         # Load sentence transformer model
-        self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.sentence_model = load_sentence_encoder('all-MiniLM-L6-v2')
         
         # Initialize knowledge graph
         self.knowledge_graph = nx.Graph()
@@ -0,0 +1,173 @@
+"""
+Resume Render Cache
+Content-addressed cache for the three expensive resume layers, each stored
+separately so a change only recomputes the layers it touches:
+
+    summary  AI summary of the profile bio, keyed by bio hash and model
+    html     rendered template, keyed by processed data + template + sections
+    pdf      path of the rendered PDF on disk, keyed by the HTML hash; the
+             file is removed once its entry is dropped and no resume history
+             entry uses it
+
+Because every key is derived from the content it was built from, an edit can
+never serve a stale render: changed input simply misses. Invalidation is
+housekeeping that frees space early; correctness doesn't depend on it.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LAYERS = ('summary', 'html', 'pdf')
+
+# Layers an edit to a resume section can make unreachable (they'd otherwise
+# linger until the LRU purge); any other section only changes the rendered output
+SECTION_LAYERS = {
+    'summary': LAYERS,
+    'bio': LAYERS,
+    'profile': LAYERS,
+}
+DEFAULT_SECTION_LAYERS = ('html', 'pdf')
+
+class ResumeRenderCache:
+    """
+    SQLite-backed layered render cache shared by the API and worker processes
+
+    Entries are tagged with the user id so `invalidate_user` can drop one
+    user's stale layers. Least recently used entries are purged once the
+    cache grows past `max_entries`.
+
+    Dropping a pdf entry doesn't delete its file, since a resume history
+    entry may still point to it; the paths are collected for
+    `take_evicted_pdfs`, whose caller checks that and removes the files.
+    """
+
+    def __init__(self, path: str, max_entries: int = 20000):
+        self.path = path
+        self.max_entries = max_entries
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._evicted_pdfs: List[str] = []
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # Connect lazily and per process, so forked workers get their own handle
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS resume_renders '
+                '(layer TEXT NOT NULL, key TEXT NOT NULL, user_id TEXT, value TEXT NOT NULL, '
+                'last_used REAL NOT NULL, PRIMARY KEY (layer, key))'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS resume_renders_user ON resume_renders (user_id)')
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """SHA-256 of the parts serialized as canonical JSON"""
+        payload = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, layer: str, key: str) -> Optional[str]:
+        try:
+            with self._lock:
+                row = self.connection.execute(
+                    'SELECT value FROM resume_renders WHERE layer = ? AND key = ?', (layer, key)
+                ).fetchone()
+                if row is None:
+                    return None
+                # A cached PDF whose file was deleted is a miss
+                if layer == 'pdf' and not os.path.exists(row[0]):
+                    self.connection.execute(
+                        'DELETE FROM resume_renders WHERE layer = ? AND key = ?', (layer, key)
+                    )
+                    return None
+                self.connection.execute(
+                    'UPDATE resume_renders SET last_used = ? WHERE layer = ? AND key = ?',
+                    (time.time(), layer, key)
+                )
+            return row[0]
+        except sqlite3.Error as e:
+            logger.warning(f"Resume cache read failed: {str(e)}")
+            return None
+
+    def set(self, layer: str, key: str, value: str, user_id: Optional[str] = None):
+        try:
+            with self._lock:
+                if layer == 'pdf':
+                    # Concurrent misses may each render the same PDF; keep track of the replaced file
+                    row = self.connection.execute(
+                        'SELECT value FROM resume_renders WHERE layer = ? AND key = ?', (layer, key)
+                    ).fetchone()
+                    if row is not None and row[0] != value:
+                        self._evicted_pdfs.append(row[0])
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO resume_renders (layer, key, user_id, value, last_used) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    (layer, key, user_id, value, time.time())
+                )
+                self._writes += 1
+                if self._writes % 1000 == 0:
+                    self._purge()
+        except sqlite3.Error as e:
+            logger.warning(f"Resume cache write failed: {str(e)}")
+
+    def invalidate_user(self, user_id: str, layers: Iterable[str] = LAYERS) -> int:
+        """Drop a user's entries in the given layers, returning how many were removed"""
+        layers = list(layers)
+        try:
+            with self._lock:
+                if 'pdf' in layers:
+                    self._evicted_pdfs.extend(row[0] for row in self.connection.execute(
+                        "SELECT value FROM resume_renders WHERE user_id = ? AND layer = 'pdf'", (user_id,)
+                    ))
+                cursor = self.connection.execute(
+                    f"DELETE FROM resume_renders WHERE user_id = ? AND layer IN ({','.join('?' * len(layers))})",
+                    (user_id, *layers)
+                )
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Resume cache invalidation failed: {str(e)}")
+            return 0
+
+    def invalidate_section(self, user_id: str, section: str) -> int:
+        """
+        Free the layers an edit to `section` leaves unreachable
+
+        Only reclaims space: lookups are content-keyed, so skipping this never
+        serves an outdated resume.
+        """
+        return self.invalidate_user(user_id, SECTION_LAYERS.get(section, DEFAULT_SECTION_LAYERS))
+
+    def take_evicted_pdfs(self) -> List[str]:
+        """Paths of PDFs whose cache entries were dropped since the last call"""
+        with self._lock:
+            evicted, self._evicted_pdfs = self._evicted_pdfs, []
+        return evicted
+
+    def _purge(self):
+        stale = (
+            'SELECT rowid FROM resume_renders ORDER BY last_used DESC LIMIT -1 OFFSET ?'
+        )
+        self._evicted_pdfs.extend(row[0] for row in self.connection.execute(
+            f"SELECT value FROM resume_renders WHERE layer = 'pdf' AND rowid IN ({stale})", (self.max_entries,)
+        ))
+        self.connection.execute(f'DELETE FROM resume_renders WHERE rowid IN ({stale})', (self.max_entries,))
+
+# Global instance
+resume_cache = ResumeRenderCache(
+    path=os.getenv('RESUME_CACHE_DB', 'data/resume_cache.sqlite3'),
+    max_entries=int(os.getenv('RESUME_CACHE_MAX_ENTRIES', '20000'))
+)
@@ -1,14 +1,23 @@
-from jinja2 import Environment, FileSystemLoader, Template
-from weasyprint import HTML, CSS
 import spacy
-from transformers import pipeline
+from app import repositories
+from app.core.config import settings
+from app.services.inference_backend import load_summarizer
+from app.services.resume_renderer import resume_render_queue
+from app.services.resume_cache import resume_cache
+from app.services.resume_templates import get_template
+from app.services.keyword_engine import keyword_engine
+import asyncio
 import os
+import shutil
 import tempfile
+import uuid
 from typing import Dict, Any, List
-import re
 from datetime import datetime
 import pandas as pd
 
+# Bump whenever templates or data processing change so cached renders are rebuilt
+RENDER_VERSION = '2'
+
 class ResumeGenerator:
     def __init__(self):
         # Initialize NLP models
@@ -19,236 +28,18 @@ class ResumeGenerator:
             self.nlp = None
         
         # Initialize summarization pipeline
+        self.summarizer_model = settings.SUMMARIZER_MODEL
+        self.summarizer_batch_size = settings.SUMMARIZER_BATCH_SIZE
         try:
-            self.summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+            self.summarizer = load_summarizer(self.summarizer_model)
         except Exception as e:
             print(f"Warning: Could not load summarization model: {e}")
             self.summarizer = None
         
-        # Setup Jinja2 environment
-        template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates', 'resume')
-        os.makedirs(template_dir, exist_ok=True)
-        
-        self.jinja_env = Environment(loader=FileSystemLoader(template_dir))
-        
-        # Create default templates if they don't exist
-        self._create_default_templates()
-        
         # Resume output directory
         self.output_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'resumes')
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def _create_default_templates(self):
-        """Create default resume templates"""
-        
-        template_dir = os.path.join(os.path.dirname(__file__), '..', 'templates', 'resume')
-        
-        # Modern template
-        modern_template = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{{ personal_info.name or 'Resume' }}</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body { font-family: 'Arial', sans-serif; line-height: 1.6; color: #333; }
-        .container { max-width: 800px; margin: 0 auto; padding: 20px; }
-        .header { text-align: center; margin-bottom: 30px; border-bottom: 2px solid #2c3e50; padding-bottom: 20px; }
-        .header h1 { font-size: 2.5em; color: #2c3e50; margin-bottom: 10px; }
-        .header .contact { font-size: 1.1em; color: #7f8c8d; }
-        .section { margin-bottom: 25px; }
-        .section h2 { color: #2c3e50; font-size: 1.4em; margin-bottom: 15px; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; }
-        .experience-item, .education-item, .project-item { margin-bottom: 20px; }
-        .item-header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 8px; }
-        .item-title { font-weight: bold; font-size: 1.1em; color: #2c3e50; }
-        .item-company { color: #3498db; font-weight: 500; }
-        .item-date { color: #7f8c8d; font-style: italic; }
-        .item-description { margin-left: 20px; }
-        .skills-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; }
-        .skill-category h3 { color: #2c3e50; margin-bottom: 8px; }
-        .skill-list { list-style: none; }
-        .skill-list li { background: #ecf0f1; padding: 5px 10px; margin: 3px 0; border-radius: 3px; }
-        ul { list-style-type: disc; margin-left: 20px; }
-        .summary { font-style: italic; color: #555; margin-bottom: 20px; padding: 15px; background: #f8f9fa; border-left: 4px solid #3498db; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <!-- Header -->
-        <div class="header">
-            <h1>{{ personal_info.name or 'Your Name' }}</h1>
-            <div class="contact">
-                {% if personal_info.email %}{{ personal_info.email }}{% endif %}
-                {% if personal_info.phone %} | {{ personal_info.phone }}{% endif %}
-                {% if personal_info.location %} | {{ personal_info.location }}{% endif %}
-                {% if personal_info.linkedin %} | LinkedIn: {{ personal_info.linkedin }}{% endif %}
-                {% if personal_info.github %} | GitHub: {{ personal_info.github }}{% endif %}
-            </div>
-        </div>
-
-        <!-- Summary -->
-        {% if summary %}
-        <div class="section">
-            <h2>Professional Summary</h2>
-            <div class="summary">{{ summary }}</div>
-        </div>
-        {% endif %}
-
-        <!-- Education -->
-        {% if education %}
-        <div class="section">
-            <h2>Education</h2>
-            {% for edu in education %}
-            <div class="education-item">
-                <div class="item-header">
-                    <div>
-                        <div class="item-title">{{ edu.degree or 'Degree' }}</div>
-                        <div class="item-company">{{ edu.institution or 'Institution' }}</div>
-                    </div>
-                    <div class="item-date">{{ edu.graduation_date or 'Date' }}</div>
-                </div>
-                {% if edu.gpa %}<div class="item-description">GPA: {{ edu.gpa }}</div>{% endif %}
-                {% if edu.relevant_courses %}
-                <div class="item-description">
-                    <strong>Relevant Courses:</strong> {{ edu.relevant_courses | join(', ') }}
-                </div>
-                {% endif %}
-            </div>
-            {% endfor %}
-        </div>
-        {% endif %}
-
-        <!-- Experience -->
-        {% if experience %}
-        <div class="section">
-            <h2>Experience</h2>
-            {% for exp in experience %}
-            <div class="experience-item">
-                <div class="item-header">
-                    <div>
-                        <div class="item-title">{{ exp.title or 'Position' }}</div>
-                        <div class="item-company">{{ exp.company or 'Company' }}</div>
-                    </div>
-                    <div class="item-date">{{ exp.start_date or 'Start' }} - {{ exp.end_date or 'End' }}</div>
-                </div>
-                {% if exp.description %}
-                <div class="item-description">
-                    {% if exp.description is string %}
-                        <p>{{ exp.description }}</p>
-                    {% else %}
-                        <ul>
-                        {% for item in exp.description %}
-                            <li>{{ item }}</li>
-                        {% endfor %}
-                        </ul>
-                    {% endif %}
-                </div>
-                {% endif %}
-            </div>
-            {% endfor %}
-        </div>
-        {% endif %}
-
-        <!-- Projects -->
-        {% if projects %}
-        <div class="section">
-            <h2>Projects</h2>
-            {% for project in projects %}
-            <div class="project-item">
-                <div class="item-header">
-                    <div>
-                        <div class="item-title">{{ project.name or project.title or 'Project Name' }}</div>
-                        {% if project.technologies %}
-                        <div style="color: #7f8c8d; font-size: 0.9em;">{{ project.technologies | join(', ') }}</div>
-                        {% endif %}
-                    </div>
-                    {% if project.date %}<div class="item-date">{{ project.date }}</div>{% endif %}
-                </div>
-                {% if project.description %}
-                <div class="item-description">{{ project.description }}</div>
-                {% endif %}
-                {% if project.url or project.github_url %}
-                <div class="item-description">
-                    <strong>Link:</strong> 
-                    <a href="{{ project.url or project.github_url }}">{{ project.url or project.github_url }}</a>
-                </div>
-                {% endif %}
-            </div>
-            {% endfor %}
-        </div>
-        {% endif %}
-
-        <!-- Skills -->
-        {% if skills %}
-        <div class="section">
-            <h2>Skills</h2>
-            {% if skills is mapping %}
-            <div class="skills-grid">
-                {% for category, skill_list in skills.items() %}
-                <div class="skill-category">
-                    <h3>{{ category }}</h3>
-                    <ul class="skill-list">
-                        {% for skill in skill_list %}
-                        <li>{{ skill }}</li>
-                        {% endfor %}
-                    </ul>
-                </div>
-                {% endfor %}
-            </div>
-            {% else %}
-            <div class="item-description">
-                {% for skill in skills %}
-                <span style="background: #ecf0f1; padding: 5px 10px; margin: 3px; border-radius: 3px; display: inline-block;">{{ skill }}</span>
-                {% endfor %}
-            </div>
-            {% endif %}
-        </div>
-        {% endif %}
-
-        <!-- Certifications -->
-        {% if certifications %}
-        <div class="section">
-            <h2>Certifications</h2>
-            {% for cert in certifications %}
-            <div class="experience-item">
-                <div class="item-header">
-                    <div>
-                        <div class="item-title">{{ cert.name or cert.title }}</div>
-                        {% if cert.provider or cert.issuer %}
-                        <div class="item-company">{{ cert.provider or cert.issuer }}</div>
-                        {% endif %}
-                    </div>
-                    {% if cert.date or cert.completion_date %}
-                    <div class="item-date">{{ cert.date or cert.completion_date }}</div>
-                    {% endif %}
-                </div>
-                {% if cert.credential_id %}
-                <div class="item-description"><strong>Credential ID:</strong> {{ cert.credential_id }}</div>
-                {% endif %}
-                {% if cert.url %}
-                <div class="item-description"><strong>Verify:</strong> <a href="{{ cert.url }}">{{ cert.url }}</a></div>
-                {% endif %}
-            </div>
-            {% endfor %}
-        </div>
-        {% endif %}
-    </div>
-</body>
-</html>
-        """
-        
-        # Save modern template
-        with open(os.path.join(template_dir, 'modern.html'), 'w', encoding='utf-8') as f:
-            f.write(modern_template)
-        
-        # Classic template (simpler version)
-        classic_template = modern_template.replace('2c3e50', '333333').replace('3498db', '666666')
-        
-        with open(os.path.join(template_dir, 'classic.html'), 'w', encoding='utf-8') as f:
-            f.write(classic_template)
-
     async def generate_resume(self, user_data: Dict[str, Any], template: str = "modern", 
                             sections: List[str] = None, user_id: str = None) -> str:
         """Generate complete resume PDF"""
@@ -256,16 +47,56 @@ class ResumeGenerator:
         # Process user data
         processed_data = await self._process_user_data(user_data, sections)
         
-        # Generate HTML
-        html_content = await self.generate_html_preview(processed_data, template, sections)
+        # Generate HTML (styles are applied by the PDF renderer)
+        html_content = await self.render_html(processed_data, template, sections, user_id, for_pdf=True)
+        
+        # Convert to PDF; the caller gets its own file, since a cached render may be
+        # shared with other resume history entries that can each be deleted
+        pdf_path = await self.render_pdf(html_content, template, user_id)
+        return await asyncio.to_thread(self._own_copy, pdf_path, user_id, template)
+
+    async def render_pdf(self, html_content: str, template: str = "modern", user_id: str = None) -> str:
+        """PDF for resume HTML rendered with for_pdf=True, reusing an earlier identical render"""
         
-        # Convert to PDF
-        pdf_path = await self._html_to_pdf(html_content, user_id, template)
+        stylesheet = get_template(template).stylesheet
+        pdf_key = resume_cache.make_key(RENDER_VERSION, html_content, stylesheet)
+        pdf_path = await asyncio.to_thread(resume_cache.get, 'pdf', pdf_key)
+        if pdf_path:
+            return pdf_path
+        
+        pdf_path = await self._html_to_pdf(html_content, user_id, template, stylesheet)
+        await asyncio.to_thread(resume_cache.set, 'pdf', pdf_key, pdf_path, user_id)
+        await self.release_evicted_pdfs()
         
         return pdf_path
 
+    async def release_evicted_pdfs(self):
+        """Delete PDFs dropped from the render cache unless a resume history entry still uses them"""
+        
+        paths = resume_cache.take_evicted_pdfs()
+        if not paths:
+            return
+        in_use = set()
+        if repositories.resume_history.database is not None:
+            try:
+                in_use = await repositories.resume_history.referenced_paths(paths)
+            except Exception as e:
+                # Keep the files rather than risk deleting one that's in use
+                print(f"Error checking evicted resume PDFs: {str(e)}")
+                return
+        for path in paths:
+            if path not in in_use:
+                await asyncio.to_thread(self._remove_file, path)
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
     async def generate_html_preview(self, user_data: Dict[str, Any], template: str = "modern", 
-                                  sections: List[str] = None) -> str:
+                                  sections: List[str] = None, user_id: str = None) -> str:
         """Generate HTML preview of resume"""
         
         # Process user data if not already processed
@@ -274,14 +105,26 @@ class ResumeGenerator:
         else:
             processed_data = user_data
         
-        # Load template
-        try:
-            template_obj = self.jinja_env.get_template(f'{template}.html')
-        except:
-            template_obj = self.jinja_env.get_template('modern.html')  # Fallback
+        return await self.render_html(processed_data, template, sections, user_id)
+
+    async def render_html(self, processed_data: Dict[str, Any], template: str = "modern",
+                          sections: List[str] = None, user_id: str = None, for_pdf: bool = False) -> str:
+        """
+        Render processed data with a compiled template
         
-        # Render HTML
-        html_content = template_obj.render(**processed_data)
+        for_pdf renders the variant without the inline stylesheet; render_pdf
+        applies that stylesheet pre-parsed.
+        """
+        
+        resume_template = get_template(template)
+        html_key = resume_cache.make_key(RENDER_VERSION, processed_data, resume_template.name, sections, for_pdf)
+        html_content = await asyncio.to_thread(resume_cache.get, 'html', html_key)
+        if html_content is not None:
+            return html_content
+        
+        compiled = resume_template.pdf_html if for_pdf else resume_template.html
+        html_content = compiled.render(**processed_data)
+        await asyncio.to_thread(resume_cache.set, 'html', html_key, html_content, user_id)
         
         return html_content
 
@@ -314,11 +157,7 @@ class ResumeGenerator:
         
         # Generate AI summary
         if self.summarizer and profile.get('bio'):
-            try:
-                summary_result = self.summarizer(profile['bio'], max_length=100, min_length=30, do_sample=False)
-                processed['summary'] = summary_result[0]['summary_text']
-            except:
-                processed['summary'] = profile.get('bio', '')
+            processed['summary'] = await self._summarize_bio(profile['bio'], profile.get('userId'))
         else:
             processed['summary'] = profile.get('bio', '')
         
@@ -376,6 +215,68 @@ class ResumeGenerator:
         
         return processed
 
+    async def _summarize_bio(self, bio: str, user_id: str = None) -> str:
+        """AI summary of a bio, reused while the bio text is unchanged"""
+        
+        summaries = await self.summarize_many([bio], [user_id])
+        return summaries[0]
+
+    async def summarize_many(self, bios: List[str], user_ids: List[str] = None) -> List[str]:
+        """
+        Summarize many bios, running uncached ones through the model in padded batches
+        
+        Summaries are memoized by model and bio hash. A bio that can't be
+        summarized comes back unchanged.
+        """
+        
+        user_ids = user_ids or [None] * len(bios)
+        summaries: Dict[str, str] = {}
+        pending: Dict[str, str] = {}
+        for bio, user_id in zip(bios, user_ids):
+            if not bio or bio in summaries or bio in pending:
+                continue
+            summary_key = resume_cache.make_key(self.summarizer_model, bio)
+            summary = await asyncio.to_thread(resume_cache.get, 'summary', summary_key)
+            if summary is not None:
+                summaries[bio] = summary
+            else:
+                pending[bio] = user_id
+        
+        if pending and self.summarizer:
+            texts = list(pending)
+            try:
+                loop = asyncio.get_running_loop()
+                results = await loop.run_in_executor(None, self._summarize_batch, texts)
+            except Exception as e:
+                print(f"Error summarizing {len(texts)} bios: {str(e)}")
+                results = [None] * len(texts)
+            
+            for bio, summary in zip(texts, results):
+                if summary is None:
+                    continue
+                summaries[bio] = summary
+                summary_key = resume_cache.make_key(self.summarizer_model, bio)
+                await asyncio.to_thread(resume_cache.set, 'summary', summary_key, summary, pending[bio])
+        
+        return [summaries.get(bio, bio) for bio in bios]
+
+    def _summarize_batch(self, texts: List[str]) -> List[str]:
+        """One model call over all texts; length-sorted so each padded batch holds similar bios"""
+        
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        results = self.summarizer(
+            [texts[index] for index in order],
+            batch_size=self.summarizer_batch_size,
+            max_length=100,
+            min_length=30,
+            do_sample=False,
+            truncation=True
+        )
+        summaries: List[str] = [None] * len(texts)
+        for position, index in enumerate(order):
+            summaries[index] = results[position]['summary_text']
+        return summaries
+
     def _categorize_skills(self, skills: List[str]) -> Dict[str, List[str]]:
         """Categorize skills using NLP"""
         
@@ -416,50 +317,58 @@ class ResumeGenerator:
         # Remove empty categories
         return {k: v for k, v in categories.items() if v}
 
-    async def _html_to_pdf(self, html_content: str, user_id: str = None, template: str = "modern") -> str:
+    def _pdf_path(self, user_id: str = None, template: str = "modern") -> str:
+        """Unique output path for a resume PDF"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"resume_{user_id or 'user'}_{template}_{timestamp}_{uuid.uuid4().hex[:8]}.pdf"
+        return os.path.join(self.output_dir, filename)
+
+    def _own_copy(self, pdf_path: str, user_id: str = None, template: str = "modern") -> str:
+        """Hard link (or copy) a PDF to a new path so removing one never removes the other"""
+        own_path = self._pdf_path(user_id, template)
+        try:
+            os.link(pdf_path, own_path)
+        except OSError:
+            shutil.copyfile(pdf_path, own_path)
+        return own_path
+
+    async def _html_to_pdf(self, html_content: str, user_id: str = None, template: str = "modern",
+                           stylesheet: str = '') -> str:
         """Convert HTML to PDF using WeasyPrint"""
         
-        # Generate filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"resume_{user_id or 'user'}_{template}_{timestamp}.pdf"
-        pdf_path = os.path.join(self.output_dir, filename)
+        pdf_path = self._pdf_path(user_id, template)
         
-        try:
-            # Create PDF
-            HTML(string=html_content).write_pdf(pdf_path)
-            return pdf_path
-        except Exception as e:
-            # Fallback: save as HTML if PDF generation fails
-            html_path = pdf_path.replace('.pdf', '.html')
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-            raise Exception(f"PDF generation failed, saved as HTML: {str(e)}")
+        # Render on the warm WeasyPrint pool so the event loop stays free
+        return await resume_render_queue.render(html_content, pdf_path, stylesheet)
 
     async def optimize_for_job(self, user_data: Dict[str, Any], job_description: str) -> Dict[str, Any]:
         """Optimize resume content for specific job description"""
         
-        optimization_tips = []
-        optimized_content = {}
-        
         if not job_description:
             return {
                 'tips': ['Provide a job description for better optimization'],
                 'optimized_content': {}
             }
         
-        # Extract keywords from job description
-        job_keywords = self._extract_keywords(job_description)
+        results = await self.optimize_for_jobs(user_data, [job_description])
+        return results[0]
+
+    async def optimize_for_jobs(self, user_data: Dict[str, Any], job_descriptions: List[str]) -> List[Dict[str, Any]]:
+        """Score and optimize one resume against many job descriptions (same order as given)"""
         
-        # Analyze user skills vs job requirements
         user_skills = user_data.get('profile', {}).get('skills', [])
-        skill_matches = []
-        missing_skills = []
+        portfolio = user_data.get('portfolio', [])
+        scores = keyword_engine.score_batch(user_skills, portfolio, job_descriptions)
         
-        for keyword in job_keywords:
-            if any(keyword.lower() in skill.lower() for skill in user_skills):
-                skill_matches.append(keyword)
-            else:
-                missing_skills.append(keyword)
+        return [self._optimization_tips(user_data, score) for score in scores]
+
+    def _optimization_tips(self, user_data: Dict[str, Any], score: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn keyword matches for one job into optimization tips"""
+        
+        optimization_tips = []
+        skill_matches = score['skill_matches']
+        missing_skills = score['missing_skills']
+        relevant_projects = score['relevant_projects']
         
         # Generate optimization tips
         if skill_matches:
@@ -473,58 +382,22 @@ class ResumeGenerator:
             optimization_tips.append("Tailor your summary to include job-specific keywords")
         
         # Suggest project highlighting
-        portfolio = user_data.get('portfolio', [])
-        relevant_projects = []
-        for item in portfolio:
-            if any(keyword.lower() in item.get('description', '').lower() for keyword in job_keywords):
-                relevant_projects.append(item.get('title', ''))
-        
         if relevant_projects:
             optimization_tips.append(f"Emphasize these relevant projects: {', '.join(relevant_projects[:3])}")
         
-        optimized_content = {
+        return {
             'skill_matches': skill_matches,
             'missing_skills': missing_skills[:5],
             'relevant_projects': relevant_projects,
-            'job_keywords': job_keywords[:10],
+            'job_keywords': score['job_keywords'][:10],
+            'match_score': score['match_score'],
             'tips': optimization_tips
         }
-        
-        return optimized_content
 
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract important keywords from job description"""
         
-        # Simple keyword extraction
-        # In a real implementation, you'd use more sophisticated NLP
-        
-        # Common technical keywords
-        tech_keywords = [
-            'python', 'java', 'javascript', 'react', 'node.js', 'sql', 'aws', 'docker',
-            'machine learning', 'data analysis', 'web development', 'api', 'database',
-            'git', 'agile', 'scrum', 'testing', 'ci/cd', 'cloud', 'microservices'
-        ]
-        
-        text_lower = text.lower()
-        found_keywords = []
-        
-        for keyword in tech_keywords:
-            if keyword in text_lower:
-                found_keywords.append(keyword)
-        
-        # Extract other potential keywords (simple approach)
-        words = re.findall(r'\b[A-Za-z]{3,}\b', text)
-        word_freq = {}
-        for word in words:
-            word_lower = word.lower()
-            if word_lower not in ['the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new', 'now', 'old', 'see', 'two', 'who', 'boy', 'did', 'she', 'use', 'her', 'way', 'many', 'then', 'them', 'well', 'were']:
-                word_freq[word_lower] = word_freq.get(word_lower, 0) + 1
-        
-        # Get most frequent words
-        frequent_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
-        found_keywords.extend([word for word, freq in frequent_words if freq > 1])
-        
-        return list(set(found_keywords))
+        return keyword_engine.extract_keywords(text)
 
     async def analyze_resume(self, resume_text: str) -> Dict[str, Any]:
         """Analyze resume content and provide improvement suggestions"""
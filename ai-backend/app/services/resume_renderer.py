@@ -0,0 +1,216 @@
+"""
+Resume Renderer
+Renders resume HTML to PDF with WeasyPrint on a process pool, so the CPU-heavy
+layout work never runs on the event loop.
+
+Each worker imports WeasyPrint, builds one FontConfiguration, parses the
+template stylesheets and renders a tiny document when it starts, so font
+discovery, module imports and CSS parsing are paid once per worker instead of
+on every resume.
+"""
+import asyncio
+import ipaddress
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Awaitable, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from app import repositories
+
+logger = logging.getLogger(__name__)
+
+_font_config = None
+_stylesheets: Dict[str, Any] = {}
+
+def _stylesheet(css: str):
+    """Parsed CSS object for a template stylesheet, parsed once per worker"""
+    from weasyprint import CSS
+
+    parsed = _stylesheets.get(css)
+    if parsed is None:
+        parsed = _stylesheets[css] = CSS(string=css, font_config=_font_config)
+    return parsed
+
+def _init_worker():
+    """Import WeasyPrint and warm its font configuration and template stylesheets once per worker process"""
+    global _font_config
+    from weasyprint import HTML
+    from weasyprint.text.fonts import FontConfiguration
+    from app.services.resume_templates import TEMPLATE_REGISTRY
+
+    _font_config = FontConfiguration()
+    for resume_template in TEMPLATE_REGISTRY.values():
+        _stylesheet(resume_template.stylesheet)
+    HTML(string="<html><body><p>warm-up</p></body></html>").write_pdf(font_config=_font_config)
+
+def _render_pdf(html_content: str, pdf_path: str, stylesheet: str = '') -> str:
+    """Render one resume in a worker process"""
+    from weasyprint import HTML
+
+    try:
+        stylesheets = [_stylesheet(stylesheet)] if stylesheet else None
+        HTML(string=html_content).write_pdf(pdf_path, stylesheets=stylesheets, font_config=_font_config)
+        return pdf_path
+    except Exception as e:
+        # Fallback: save as HTML if PDF generation fails
+        html_path = pdf_path.replace('.pdf', '.html')
+        with open(html_path, 'w', encoding='utf-8') as f:
+            if stylesheet:
+                f.write(f"<style>\n{stylesheet}\n</style>\n")
+            f.write(html_content)
+        raise Exception(f"PDF generation failed, saved as HTML: {str(e)}")
+
+async def check_callback_url(url: str):
+    """
+    Raise ValueError unless `url` is an http(s) URL on a public host
+
+    Every address the host resolves to is checked, so webhooks can't be
+    pointed at loopback, private, link-local or other internal addresses.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ValueError("Callback URL must be an http(s) URL")
+
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(parsed.hostname, parsed.port or None)
+    except OSError:
+        raise ValueError(f"Callback host {parsed.hostname} could not be resolved")
+
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split('%')[0])
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"Callback host {parsed.hostname} resolves to a non-public address")
+
+class ResumeRenderQueue:
+    """
+    Warm WeasyPrint process pool plus a registry of render jobs
+
+    `render` awaits a single PDF (the synchronous API mode). `submit` runs a
+    whole resume build in the background and returns a job id that can be
+    polled with `get`; if a callback URL is given, the finished job is POSTed
+    to it.
+
+    Jobs run in the process that accepted them, but their state is also
+    written to the resume_jobs collection, so any API worker can answer a
+    poll. PDFs are written to the shared resumes directory.
+    """
+
+    def __init__(self, workers: int = 2, max_jobs: int = 500, webhook_timeout: float = 10.0):
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.webhook_timeout = webhook_timeout
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self._executor
+
+    async def render(self, html_content: str, pdf_path: str, stylesheet: str = '') -> str:
+        """Render HTML (plus an optional template stylesheet) to `pdf_path` on the pool and return the path"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _render_pdf, html_content, pdf_path, stylesheet)
+
+    def submit(self, build: Awaitable[str], callback_url: Optional[str] = None,
+               metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Run `build` (a coroutine returning the PDF path) as a background job
+
+        Returns the job id.
+        """
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = {
+            'job_id': job_id,
+            'status': 'queued',
+            **(metadata or {}),
+            'file_path': None,
+            'error': None,
+            'callback_url': callback_url,
+            'created_at': datetime.utcnow().isoformat(),
+            'finished_at': None,
+            'duration_seconds': None
+        }
+        self._prune()
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id, build))
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job's state, from this process if it ran here, else from MongoDB"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return dict(job)
+        if repositories.resume_jobs.database is None:
+            return None
+        return await repositories.resume_jobs.get(job_id)
+
+    async def _persist(self, job: Dict[str, Any]):
+        if repositories.resume_jobs.database is None:
+            return
+        try:
+            await repositories.resume_jobs.save(dict(job))
+        except Exception as e:
+            logger.warning(f"Could not store resume job {job['job_id']}: {str(e)}")
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_jobs"""
+        while len(self.jobs) > self.max_jobs:
+            finished = next((job_id for job_id, job in self.jobs.items() if job['finished_at']), None)
+            if finished is None:
+                break
+            del self.jobs[finished]
+
+    async def _run(self, job_id: str, build: Awaitable[str]):
+        job = self.jobs[job_id]
+        job['status'] = 'running'
+        started = time.time()
+        await self._persist(job)
+
+        try:
+            job['file_path'] = await build
+            job['status'] = 'completed'
+        except Exception as e:
+            logger.error(f"Resume render {job_id} failed: {str(e)}")
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            job['finished_at'] = datetime.utcnow().isoformat()
+            job['duration_seconds'] = round(time.time() - started, 3)
+            self._tasks.pop(job_id, None)
+        await self._persist(job)
+
+        if job['callback_url']:
+            await self._notify(job)
+
+    async def _notify(self, job: Dict[str, Any]):
+        """POST the finished job to its callback URL"""
+        payload = {key: value for key, value in job.items() if key not in ('callback_url', 'file_path')}
+        try:
+            # Checked again here: the host may resolve differently than at submit time
+            await check_callback_url(job['callback_url'])
+            async with httpx.AsyncClient(timeout=self.webhook_timeout) as client:
+                response = await client.post(job['callback_url'], json=payload)
+                response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Resume webhook for job {job['job_id']} failed: {str(e)}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# Global instance
+resume_render_queue = ResumeRenderQueue(
+    workers=int(os.getenv('RESUME_RENDER_WORKERS', '2')),
+    webhook_timeout=float(os.getenv('RESUME_WEBHOOK_TIMEOUT', '10'))
+)
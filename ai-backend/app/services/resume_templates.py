@@ -0,0 +1,313 @@
+"""
+Resume Templates
+Resume templates compiled once into an immutable registry.
+
+Each template is compiled in two variants: the full page used for HTML
+previews, and a PDF variant with its <style> block split out. The PDF
+renderer parses that stylesheet once per worker instead of on every render.
+
+With ENVIRONMENT=development the templates are read from app/templates/resume
+and recompiled when the files change. Otherwise the built-in sources are used
+and nothing is written to disk.
+"""
+import os
+import re
+import tempfile
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Tuple
+from jinja2 import ChoiceLoader, DictLoader, Environment, FileSystemBytecodeCache, FunctionLoader, Template
+
+MODERN_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ personal_info.name or 'Resume' }}</title>
+    <style>
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body { font-family: 'Arial', sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 800px; margin: 0 auto; padding: 20px; }
+        .header { text-align: center; margin-bottom: 30px; border-bottom: 2px solid #2c3e50; padding-bottom: 20px; }
+        .header h1 { font-size: 2.5em; color: #2c3e50; margin-bottom: 10px; }
+        .header .contact { font-size: 1.1em; color: #7f8c8d; }
+        .section { margin-bottom: 25px; }
+        .section h2 { color: #2c3e50; font-size: 1.4em; margin-bottom: 15px; border-bottom: 1px solid #bdc3c7; padding-bottom: 5px; }
+        .experience-item, .education-item, .project-item { margin-bottom: 20px; }
+        .item-header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 8px; }
+        .item-title { font-weight: bold; font-size: 1.1em; color: #2c3e50; }
+        .item-company { color: #3498db; font-weight: 500; }
+        .item-date { color: #7f8c8d; font-style: italic; }
+        .item-description { margin-left: 20px; }
+        .skills-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px; }
+        .skill-category h3 { color: #2c3e50; margin-bottom: 8px; }
+        .skill-list { list-style: none; }
+        .skill-list li { background: #ecf0f1; padding: 5px 10px; margin: 3px 0; border-radius: 3px; }
+        ul { list-style-type: disc; margin-left: 20px; }
+        .summary { font-style: italic; color: #555; margin-bottom: 20px; padding: 15px; background: #f8f9fa; border-left: 4px solid #3498db; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <!-- Header -->
+        <div class="header">
+            <h1>{{ personal_info.name or 'Your Name' }}</h1>
+            <div class="contact">
+                {% if personal_info.email %}{{ personal_info.email }}{% endif %}
+                {% if personal_info.phone %} | {{ personal_info.phone }}{% endif %}
+                {% if personal_info.location %} | {{ personal_info.location }}{% endif %}
+                {% if personal_info.linkedin %} | LinkedIn: {{ personal_info.linkedin }}{% endif %}
+                {% if personal_info.github %} | GitHub: {{ personal_info.github }}{% endif %}
+            </div>
+        </div>
+
+        <!-- Summary -->
+        {% if summary %}
+        <div class="section">
+            <h2>Professional Summary</h2>
+            <div class="summary">{{ summary }}</div>
+        </div>
+        {% endif %}
+
+        <!-- Education -->
+        {% if education %}
+        <div class="section">
+            <h2>Education</h2>
+            {% for edu in education %}
+            <div class="education-item">
+                <div class="item-header">
+                    <div>
+                        <div class="item-title">{{ edu.degree or 'Degree' }}</div>
+                        <div class="item-company">{{ edu.institution or 'Institution' }}</div>
+                    </div>
+                    <div class="item-date">{{ edu.graduation_date or 'Date' }}</div>
+                </div>
+                {% if edu.gpa %}<div class="item-description">GPA: {{ edu.gpa }}</div>{% endif %}
+                {% if edu.relevant_courses %}
+                <div class="item-description">
+                    <strong>Relevant Courses:</strong> {{ edu.relevant_courses | join(', ') }}
+                </div>
+                {% endif %}
+            </div>
+            {% endfor %}
+        </div>
+        {% endif %}
+
+        <!-- Experience -->
+        {% if experience %}
+        <div class="section">
+            <h2>Experience</h2>
+            {% for exp in experience %}
+            <div class="experience-item">
+                <div class="item-header">
+                    <div>
+                        <div class="item-title">{{ exp.title or 'Position' }}</div>
+                        <div class="item-company">{{ exp.company or 'Company' }}</div>
+                    </div>
+                    <div class="item-date">{{ exp.start_date or 'Start' }} - {{ exp.end_date or 'End' }}</div>
+                </div>
+                {% if exp.description %}
+                <div class="item-description">
+                    {% if exp.description is string %}
+                        <p>{{ exp.description }}</p>
+                    {% else %}
+                        <ul>
+                        {% for item in exp.description %}
+                            <li>{{ item }}</li>
+                        {% endfor %}
+                        </ul>
+                    {% endif %}
+                </div>
+                {% endif %}
+            </div>
+            {% endfor %}
+        </div>
+        {% endif %}
+
+        <!-- Projects -->
+        {% if projects %}
+        <div class="section">
+            <h2>Projects</h2>
+            {% for project in projects %}
+            <div class="project-item">
+                <div class="item-header">
+                    <div>
+                        <div class="item-title">{{ project.name or project.title or 'Project Name' }}</div>
+                        {% if project.technologies %}
+                        <div style="color: #7f8c8d; font-size: 0.9em;">{{ project.technologies | join(', ') }}</div>
+                        {% endif %}
+                    </div>
+                    {% if project.date %}<div class="item-date">{{ project.date }}</div>{% endif %}
+                </div>
+                {% if project.description %}
+                <div class="item-description">{{ project.description }}</div>
+                {% endif %}
+                {% if project.url or project.github_url %}
+                <div class="item-description">
+                    <strong>Link:</strong> 
+                    <a href="{{ project.url or project.github_url }}">{{ project.url or project.github_url }}</a>
+                </div>
+                {% endif %}
+            </div>
+            {% endfor %}
+        </div>
+        {% endif %}
+
+        <!-- Skills -->
+        {% if skills %}
+        <div class="section">
+            <h2>Skills</h2>
+            {% if skills is mapping %}
+            <div class="skills-grid">
+                {% for category, skill_list in skills.items() %}
+                <div class="skill-category">
+                    <h3>{{ category }}</h3>
+                    <ul class="skill-list">
+                        {% for skill in skill_list %}
+                        <li>{{ skill }}</li>
+                        {% endfor %}
+                    </ul>
+                </div>
+                {% endfor %}
+            </div>
+            {% else %}
+            <div class="item-description">
+                {% for skill in skills %}
+                <span style="background: #ecf0f1; padding: 5px 10px; margin: 3px; border-radius: 3px; display: inline-block;">{{ skill }}</span>
+                {% endfor %}
+            </div>
+            {% endif %}
+        </div>
+        {% endif %}
+
+        <!-- Certifications -->
+        {% if certifications %}
+        <div class="section">
+            <h2>Certifications</h2>
+            {% for cert in certifications %}
+            <div class="experience-item">
+                <div class="item-header">
+                    <div>
+                        <div class="item-title">{{ cert.name or cert.title }}</div>
+                        {% if cert.provider or cert.issuer %}
+                        <div class="item-company">{{ cert.provider or cert.issuer }}</div>
+                        {% endif %}
+                    </div>
+                    {% if cert.date or cert.completion_date %}
+                    <div class="item-date">{{ cert.date or cert.completion_date }}</div>
+                    {% endif %}
+                </div>
+                {% if cert.credential_id %}
+                <div class="item-description"><strong>Credential ID:</strong> {{ cert.credential_id }}</div>
+                {% endif %}
+                {% if cert.url %}
+                <div class="item-description"><strong>Verify:</strong> <a href="{{ cert.url }}">{{ cert.url }}</a></div>
+                {% endif %}
+            </div>
+            {% endfor %}
+        </div>
+        {% endif %}
+    </div>
+</body>
+</html>
+        """
+
+# Classic template (simpler version)
+CLASSIC_TEMPLATE = MODERN_TEMPLATE.replace('2c3e50', '333333').replace('3498db', '666666')
+
+SOURCES = {
+    'modern': MODERN_TEMPLATE,
+    'classic': CLASSIC_TEMPLATE,
+}
+DEFAULT_TEMPLATE = 'modern'
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), '..', 'templates', 'resume')
+DEV_MODE = os.getenv('ENVIRONMENT', 'production').lower() == 'development'
+
+_STYLE_BLOCK = re.compile(r'\s*<style>(.*?)</style>', re.DOTALL)
+
+class ResumeTemplate(NamedTuple):
+    """Compiled variants of one resume template"""
+    name: str
+    html: Template       # full page with inline <style>, for previews
+    pdf_html: Template   # same markup without the <style> block
+    stylesheet: str      # CSS split out of the page, applied by the PDF renderer
+
+def split_stylesheet(source: str) -> Tuple[str, str]:
+    """(markup without its <style> blocks, their CSS)"""
+    stylesheet = '\n'.join(block.strip() for block in _STYLE_BLOCK.findall(source))
+    return _STYLE_BLOCK.sub('', source), stylesheet
+
+def _builtin_sources() -> Dict[str, str]:
+    sources = {}
+    for name, source in SOURCES.items():
+        markup, stylesheet = split_stylesheet(source)
+        sources[f'{name}.html'] = source
+        sources[f'{name}.pdf.html'] = markup
+        sources[f'{name}.css'] = stylesheet
+    return sources
+
+def _load_from_disk(name: str):
+    """Dev loader: read the page from TEMPLATE_DIR and derive its PDF variant and stylesheet"""
+    base, _, variant = name.partition('.')
+    path = os.path.join(TEMPLATE_DIR, f'{base}.html')
+    if not os.path.exists(path):
+        return None
+
+    mtime = os.path.getmtime(path)
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    if variant != 'html':
+        markup, stylesheet = split_stylesheet(source)
+        source = markup if variant == 'pdf.html' else stylesheet
+    return source, path, lambda: os.path.exists(path) and os.path.getmtime(path) == mtime
+
+def export_default_templates(directory: str = TEMPLATE_DIR):
+    """Write the built-in templates to `directory` for editing, keeping files that already exist"""
+    os.makedirs(directory, exist_ok=True)
+    for name, source in SOURCES.items():
+        path = os.path.join(directory, f'{name}.html')
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(source)
+
+def _build_environment() -> Environment:
+    """Jinja2 environment with bytecode cached on disk across worker restarts"""
+    cache_dir = os.getenv(
+        'RESUME_TEMPLATE_CACHE_DIR',
+        os.path.join(tempfile.gettempdir(), 'educareer-resume-templates')
+    )
+    os.makedirs(cache_dir, exist_ok=True)
+
+    loader = DictLoader(_builtin_sources())
+    if DEV_MODE:
+        export_default_templates()
+        loader = ChoiceLoader([FunctionLoader(_load_from_disk), loader])
+
+    return Environment(
+        loader=loader,
+        bytecode_cache=FileSystemBytecodeCache(cache_dir),
+        auto_reload=DEV_MODE
+    )
+
+_env = _build_environment()
+
+def _compile(name: str) -> ResumeTemplate:
+    return ResumeTemplate(
+        name=name,
+        html=_env.get_template(f'{name}.html'),
+        pdf_html=_env.get_template(f'{name}.pdf.html'),
+        stylesheet=_env.loader.get_source(_env, f'{name}.css')[0]
+    )
+
+# Compile every template once at import
+TEMPLATE_REGISTRY: Mapping[str, ResumeTemplate] = MappingProxyType({name: _compile(name) for name in SOURCES})
+
+def get_template(name: str) -> ResumeTemplate:
+    """Compiled template by id, falling back to the default template"""
+    if name not in TEMPLATE_REGISTRY:
+        name = DEFAULT_TEMPLATE
+    if DEV_MODE:
+        # Recompiles only when the file on disk has changed
+        return _compile(name)
+    return TEMPLATE_REGISTRY[name]
@@ -0,0 +1,229 @@
+"""
+Timetable Batch Ingestion
+Runs many timetable files through TimetableProcessor on a process pool and
+stores the extracted courses with batched inserts.
+"""
+import asyncio
+import logging
+import os
+import shutil
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import repositories
+
+logger = logging.getLogger(__name__)
+
+# (user_id, filename, file_type, path of the spooled file, SHA-256 of its content)
+BatchFile = Tuple[str, str, str, str, str]
+
+# Seconds between progress writes to MongoDB while a batch runs
+PERSIST_INTERVAL = 1.0
+
+_worker_processor = None
+
+def _init_worker():
+    """Build one TimetableProcessor per worker process"""
+    global _worker_processor
+    from app.services import timetable_processor as processor_module
+
+    # Files are already spread across processes; don't fan pages out again
+    processor_module.PARALLEL_PDF_MIN_PAGES = sys.maxsize
+    _worker_processor = processor_module.TimetableProcessor()
+
+def _process_file(path: str, file_type: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """Process one timetable in a worker process"""
+    result = asyncio.run(_worker_processor.process_timetable(path, file_type, content_hash))
+    # The raw text isn't stored or returned; don't ship it back across processes
+    result.pop('extracted_text', None)
+    return result
+
+def course_documents(user_id: str, courses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Transform extracted courses to the extracted_courses schema"""
+    import pandas as pd
+
+    created_at = {"$date": {"$numberLong": str(int(pd.Timestamp.now().timestamp() * 1000))}}
+    return [
+        {
+            "name": course['name'],
+            "extractedFrom": "timetable",
+            "confidence": course.get('confidence', 0.0),
+            "schedule": {
+                "days": course.get('days', []),
+                "times": course.get('times', [])
+            },
+            "rawText": course.get('raw_text', ''),
+            "userId": user_id,
+            "createdAt": created_at
+        }
+        for course in courses
+    ]
+
+class TimetableBatchQueue:
+    """
+    Job registry for batch timetable ingestion
+
+    Each submitted batch becomes a job whose files are processed concurrently
+    on a shared process pool (throughput scales with `workers`). Course
+    documents are buffered and written with one insert_many per
+    `insert_batch_size` documents rather than one insert per file.
+
+    Jobs run in the process that accepted them; their state is written to the
+    timetable_batch_jobs collection as they progress, so any API worker can
+    answer a status poll and finished jobs survive a restart.
+    """
+
+    def __init__(self, database=None, workers: int = 2, insert_batch_size: int = 1000, max_jobs: int = 100):
+        self.database = database
+        self.workers = workers
+        self.insert_batch_size = insert_batch_size
+        self.max_jobs = max_jobs
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self._executor
+
+    def submit(self, files: List[BatchFile], workdir: Optional[str] = None) -> str:
+        """
+        Queue a batch and return its job id
+
+        `workdir`, if given, holds the spooled files and is removed when the
+        job finishes.
+        """
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = {
+            'job_id': job_id,
+            'status': 'queued',
+            'total': len(files),
+            'processed': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'courses_extracted': 0,
+            'courses_saved': 0,
+            'files': [],
+            'created_at': datetime.utcnow().isoformat(),
+            'finished_at': None,
+            'duration_seconds': None
+        }
+        self._prune()
+        self._tasks[job_id] = asyncio.create_task(self._run(job_id, files, workdir))
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job's state, from this process if it runs here, else from MongoDB"""
+        job = self.jobs.get(job_id)
+        if job is None and repositories.timetable_batch_jobs.database is not None:
+            job = await repositories.timetable_batch_jobs.get(job_id)
+        if job is None:
+            return None
+        progress = job['processed'] / job['total'] if job['total'] else 1.0
+        return {**job, 'progress': round(progress, 4)}
+
+    async def _persist(self, job: Dict[str, Any]):
+        if repositories.timetable_batch_jobs.database is None:
+            return
+        try:
+            await repositories.timetable_batch_jobs.save({**job, 'files': list(job['files'])})
+        except Exception as e:
+            logger.warning(f"Could not store timetable batch {job['job_id']}: {str(e)}")
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_jobs"""
+        while len(self.jobs) > self.max_jobs:
+            finished = next((job_id for job_id, job in self.jobs.items() if job['finished_at']), None)
+            if finished is None:
+                break
+            del self.jobs[finished]
+
+    async def _run(self, job_id: str, files: List[BatchFile], workdir: Optional[str]):
+        job = self.jobs[job_id]
+        job['status'] = 'running'
+        started = time.time()
+        loop = asyncio.get_running_loop()
+        pending_documents: List[Dict[str, Any]] = []
+        await self._persist(job)
+        persisted_at = time.monotonic()
+
+        async def process(user_id: str, filename: str, file_type: str, path: str, content_hash: str):
+            try:
+                result = await loop.run_in_executor(self.executor, _process_file, path, file_type, content_hash)
+            except Exception as e:
+                result = {'success': False, 'error': str(e), 'courses': [], 'total_courses': 0}
+            return user_id, filename, result
+
+        try:
+            for finished in asyncio.as_completed([process(*file) for file in files]):
+                user_id, filename, result = await finished
+
+                job['processed'] += 1
+                entry = {'filename': filename, 'user_id': user_id, 'success': result['success'],
+                         'total_courses': result['total_courses']}
+                if result['success']:
+                    job['succeeded'] += 1
+                    job['courses_extracted'] += result['total_courses']
+                    if user_id and result['courses']:
+                        pending_documents.extend(course_documents(user_id, result['courses']))
+                else:
+                    job['failed'] += 1
+                    entry['error'] = result.get('error')
+                job['files'].append(entry)
+
+                if len(pending_documents) >= self.insert_batch_size:
+                    job['courses_saved'] += await self._save(pending_documents)
+                    pending_documents = []
+
+                if time.monotonic() - persisted_at >= PERSIST_INTERVAL:
+                    await self._persist(job)
+                    persisted_at = time.monotonic()
+
+            job['courses_saved'] += await self._save(pending_documents)
+            job['status'] = 'completed'
+        except Exception as e:
+            logger.error(f"Timetable batch {job_id} failed: {str(e)}")
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            job['finished_at'] = datetime.utcnow().isoformat()
+            job['duration_seconds'] = round(time.time() - started, 3)
+            self._tasks.pop(job_id, None)
+            if workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+        await self._persist(job)
+
+    async def _save(self, documents: List[Dict[str, Any]]) -> int:
+        if not documents or self.database is None:
+            return 0
+        try:
+            await self.database.extracted_courses.insert_many(documents, ordered=False)
+            return len(documents)
+        except Exception as e:
+            logger.error(f"Error saving {len(documents)} batch courses to MongoDB: {str(e)}")
+            return 0
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def _create_batch_queue() -> TimetableBatchQueue:
+    from app.database import mongo_db
+
+    return TimetableBatchQueue(
+        database=mongo_db,
+        workers=int(os.getenv('TIMETABLE_BATCH_WORKERS', str(os.cpu_count() or 2))),
+        insert_batch_size=int(os.getenv('TIMETABLE_BATCH_INSERT_SIZE', '1000'))
+    )
+
+# Global instance
+timetable_batch_queue = _create_batch_queue()
@@ -0,0 +1,105 @@
+"""
+Timetable Result Cache
+Persistent cache of process_timetable results keyed by the SHA-256 of the
+uploaded file and the extractor version, so re-uploads and department-wide
+shared timetables are parsed once.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+class TimetableResultCache:
+    """
+    SQLite-backed result store shared by the API and batch worker processes
+
+    Least recently used entries are purged once the cache grows past
+    `max_entries`.
+    """
+
+    def __init__(self, path: str, max_entries: int = 50000):
+        self.path = path
+        self.max_entries = max_entries
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # Connect lazily and per process, so forked batch workers get their own handle
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS timetable_results '
+                '(key TEXT PRIMARY KEY, result TEXT NOT NULL, last_used REAL NOT NULL)'
+            )
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def make_key(content_hash: str, extractor_version: str) -> str:
+        return f"{extractor_version}:{content_hash}"
+
+    @staticmethod
+    def hash_content(source: Union[bytes, str]) -> str:
+        """SHA-256 of file bytes, or of a file on disk read in chunks"""
+        if not isinstance(source, str):
+            return hashlib.sha256(source).hexdigest()
+        digest = hashlib.sha256()
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with self._lock:
+                row = self.connection.execute(
+                    'SELECT result FROM timetable_results WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self.connection.execute(
+                    'UPDATE timetable_results SET last_used = ? WHERE key = ?', (time.time(), key)
+                )
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Timetable cache read failed: {str(e)}")
+            return None
+
+    def set(self, key: str, result: Dict[str, Any]):
+        try:
+            payload = json.dumps(result, default=str)
+            with self._lock:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO timetable_results (key, result, last_used) VALUES (?, ?, ?)',
+                    (key, payload, time.time())
+                )
+                self._writes += 1
+                if self._writes % 1000 == 0:
+                    self._purge()
+        except sqlite3.Error as e:
+            logger.warning(f"Timetable cache write failed: {str(e)}")
+
+    def _purge(self):
+        self.connection.execute(
+            'DELETE FROM timetable_results WHERE key IN ('
+            'SELECT key FROM timetable_results ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+# Global instance
+timetable_cache = TimetableResultCache(
+    path=os.getenv('TIMETABLE_CACHE_DB', 'data/timetable_cache.sqlite3'),
+    max_entries=int(os.getenv('TIMETABLE_CACHE_MAX_ENTRIES', '50000'))
+)
@@ -1,115 +1,124 @@
-import cv2
-import pytesseract
 import fitz  # PyMuPDF
 from pdfminer.high_level import extract_text
-from transformers import pipeline, AutoTokenizer, AutoModel
-import torch
-import re
-from typing import List, Dict, Any
-import numpy as np
+from typing import List, Dict, Any, Union
 from PIL import Image
 import io
+import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from app.core.config import settings
+from app.services.course_span_tagger import CourseSpanTagger
+from app.services.ocr_pipeline import ocr_pipeline
+from app.services.timetable_cache import timetable_cache
+from app.services.timetable_scanner import CourseLineScanner, COURSE_CODE, DURATION_PATTERNS
+
+# Bump whenever extraction or parsing changes so cached results are recomputed
+EXTRACTOR_VERSION = '2'
+
+# Uploaded file: raw bytes, or the path of a spooled temp file
+Source = Union[bytes, str]
+
+# Page-parallel PDF extraction
+PDF_WORKERS = int(os.getenv('TIMETABLE_PDF_WORKERS', str(os.cpu_count() or 2)))
+PARALLEL_PDF_MIN_PAGES = int(os.getenv('TIMETABLE_PARALLEL_PDF_MIN_PAGES', '8'))
+
+_pdf_pool = None
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all PDF extractions (created on first use)"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+    return _pdf_pool
+
+def _page_ranges(page_count: int, workers: int) -> List[tuple]:
+    """Split pages into at most `workers` contiguous [start, end) ranges"""
+    size = max(1, -(-page_count // max(workers, 1)))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+def _open_pdf(source: Source) -> fitz.Document:
+    """Open a PDF from bytes, or from its path so pages are read on demand"""
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+def _extract_pdf_pages(source: Source, start: int, end: int) -> List[str]:
+    """Extract text for pages [start, end) with PyMuPDF (runs in a worker process)"""
+    with _open_pdf(source) as doc:
+        return [doc[number].get_text() for number in range(start, end)]
+
+def _recover_empty_pages(source: Source, page_numbers: List[int]) -> Dict[int, str]:
+    """Re-extract the given pages with PDFMiner, then OCR whatever is still empty"""
+    recovered = {}
+    for number in page_numbers:
+        try:
+            recovered[number] = extract_text(source if isinstance(source, str) else io.BytesIO(source), page_numbers=[number])
+        except Exception:
+            recovered[number] = ''
+    
+    still_empty = [number for number, page_text in recovered.items() if not page_text.strip()]
+    if still_empty:
+        with _open_pdf(source) as doc:
+            for number in still_empty:
+                pixmap = doc[number].get_pixmap(dpi=300)
+                image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+                recovered[number] = ocr_pipeline.ocr_image(image)
+    
+    return recovered
 
 class TimetableProcessor:
     def __init__(self):
-        # Initialize BERT model for course extraction
-        self.tokenizer = AutoTokenizer.from_pretrained("distilbert-base-uncased")
-        self.model = AutoModel.from_pretrained("distilbert-base-uncased")
-        
-        # Course name patterns
-        self.course_patterns = [
-            r'[A-Z]{2,4}\s*\d{3,4}',  # CS101, MATH201, etc.
-            r'[A-Z][a-z]+\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*',  # Computer Science, Data Structures
-            r'Introduction\s+to\s+[\w\s]+',
-            r'Advanced\s+[\w\s]+',
-            r'Fundamentals\s+of\s+[\w\s]+'
-        ]
-        
-        # Time patterns
-        self.time_patterns = [
-            r'\d{1,2}:\d{2}\s*[AP]M',
-            r'\d{1,2}:\d{2}',
-            r'\d{1,2}\s*[AP]M'
-        ]
-        
-        # Day patterns
-        self.day_patterns = [
-            r'Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday',
-            r'Mon|Tue|Wed|Thu|Fri|Sat|Sun',
-            r'M|T|W|Th|F|S|Su'
-        ]
+        # Course, time, day, professor, room and type patterns, compiled once
+        self.scanner = CourseLineScanner()
         
-        # Professor/Instructor patterns
-        self.professor_patterns = [
-            r'(?:Prof(?:essor)?|Dr|Mr|Ms|Mrs)\.?\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*',
-            r'Instructor:\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            r'Faculty:\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            r'Teacher:\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)'
-        ]
-        
-        # Room/Location patterns
-        self.room_patterns = [
-            r'Room\s*[:#]?\s*([A-Z0-9-]+)',
-            r'Lab\s*[:#]?\s*([A-Z0-9-]+)',
-            r'Hall\s*[:#]?\s*([A-Z0-9-]+)',
-            r'Building\s*[:#]?\s*([A-Z0-9-]+)',
-            r'[A-Z]{1,3}[-\s]?\d{2,4}',  # CS-101, A201, etc.
-        ]
-        
-        # Duration patterns
-        self.duration_patterns = [
-            r'(\d+)\s*(?:hour|hr|h)',
-            r'(\d+)\s*(?:minute|min|m)',
-            r'(\d+)\s*-\s*(\d+)',  # Time range
-        ]
-        
-        # Class type patterns
-        self.type_patterns = [
-            r'\b(lecture|lab|laboratory|tutorial|seminar|workshop|practical)\b'
-        ]
+        # Optional BERT span tagger for lines the scanner can't resolve;
+        # loaded on first use and only when a fine-tuned checkpoint is configured
+        self.span_tagger = None
+        self.extractor_version = EXTRACTOR_VERSION
+        if settings.COURSE_SPAN_MODEL:
+            self.span_tagger = CourseSpanTagger(
+                settings.COURSE_SPAN_MODEL,
+                batch_size=settings.COURSE_SPAN_BATCH_SIZE
+            )
+            self.extractor_version = f"{EXTRACTOR_VERSION}+{settings.COURSE_SPAN_MODEL}"
 
-    async def extract_from_pdf(self, file_content: bytes) -> str:
-        """Extract text from PDF using PyMuPDF and PDFMiner"""
+    async def extract_from_pdf(self, source: Source) -> str:
+        """Extract text from PDF, pages in parallel, with per-page fallbacks"""
         try:
-            # Try PyMuPDF first
-            doc = fitz.open(stream=file_content, filetype="pdf")
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
+            loop = asyncio.get_running_loop()
+            
+            with _open_pdf(source) as doc:
+                page_count = doc.page_count
+            
+            # Small documents are cheaper to read in-process than to ship to the pool
+            if page_count < PARALLEL_PDF_MIN_PAGES:
+                pages = await loop.run_in_executor(None, _extract_pdf_pages, source, 0, page_count)
+            else:
+                ranges = _page_ranges(page_count, PDF_WORKERS)
+                chunks = await asyncio.gather(*[
+                    loop.run_in_executor(_get_pdf_pool(), _extract_pdf_pages, source, start, end)
+                    for start, end in ranges
+                ])
+                pages = [page for chunk in chunks for page in chunk]
             
-            if text.strip():
-                return text
+            # Re-read only the pages PyMuPDF returned empty (scanned or odd encodings)
+            empty_pages = [number for number, page_text in enumerate(pages) if not page_text.strip()]
+            if empty_pages:
+                recovered = await loop.run_in_executor(None, _recover_empty_pages, source, empty_pages)
+                for number, page_text in recovered.items():
+                    pages[number] = page_text
             
-            # Fallback to PDFMiner for scanned PDFs
-            text = extract_text(io.BytesIO(file_content))
-            return text
+            return ''.join(pages)
             
         except Exception as e:
             raise Exception(f"PDF extraction failed: {str(e)}")
 
-    async def extract_from_image(self, file_content: bytes) -> str:
-        """Extract text from image using Tesseract OCR"""
+    async def extract_from_image(self, source: Source, content_hash: str = None) -> str:
+        """Extract text from image using the grid-aware OCR pipeline"""
         try:
-            # Convert bytes to PIL Image
-            image = Image.open(io.BytesIO(file_content))
-            
-            # Convert to OpenCV format
-            cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # Preprocess image for better OCR
-            gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-            
-            # Apply threshold to get better contrast
-            _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
-            # Denoise
-            denoised = cv2.medianBlur(thresh, 5)
-            
-            # Extract text using Tesseract
-            text = pytesseract.image_to_string(denoised, config='--psm 6')
-            
-            return text
+            # OCR is CPU bound; keep it off the event loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, ocr_pipeline.extract_text, source, content_hash)
             
         except Exception as e:
             raise Exception(f"Image OCR failed: {str(e)}")
@@ -117,39 +126,26 @@ class TimetableProcessor:
     def extract_courses_with_bert(self, text: str) -> List[Dict[str, Any]]:
         """Extract comprehensive course information using BERT and pattern matching"""
         courses = []
-        lines = text.split('\n')
+        lines = [line.strip() for line in text.split('\n')]
+        lines = [line for line in lines if len(line) >= 5]
         
-        for line in lines:
-            line = line.strip()
-            if not line or len(line) < 5:
-                continue
-                
-            # Extract course codes and names using patterns
-            course_matches = []
-            for pattern in self.course_patterns:
-                matches = re.findall(pattern, line, re.IGNORECASE)
-                course_matches.extend(matches)
-            
-            # Extract times
-            time_matches = re.findall('|'.join(self.time_patterns), line, re.IGNORECASE)
-            
-            # Extract days
-            day_matches = re.findall('|'.join(self.day_patterns), line, re.IGNORECASE)
-            
-            # Extract professor/instructor names
-            professor_matches = []
-            for pattern in self.professor_patterns:
-                matches = re.findall(pattern, line, re.IGNORECASE)
-                professor_matches.extend(matches)
-            
-            # Extract room/location
-            room_matches = []
-            for pattern in self.room_patterns:
-                matches = re.findall(pattern, line, re.IGNORECASE)
-                room_matches.extend(matches)
-            
-            # Extract class type
-            type_matches = re.findall('|'.join(self.type_patterns), line, re.IGNORECASE)
+        # Tokenize each line in a single pass
+        scanned_lines = [self.scanner.scan(line) for line in lines]
+        
+        # Tag every ambiguous line of the timetable in one batched model call
+        if self.span_tagger is not None:
+            ambiguous = [index for index, scanned in enumerate(scanned_lines) if scanned.ambiguous]
+            tagged = self.span_tagger.tag_lines([lines[index] for index in ambiguous])
+            for index, spans in zip(ambiguous, tagged):
+                self._merge_spans(scanned_lines[index], spans)
+        
+        for line, scanned in zip(lines, scanned_lines):
+            course_matches = scanned.courses
+            time_matches = scanned.times
+            day_matches = scanned.days
+            professor_matches = scanned.professors
+            room_matches = scanned.rooms
+            type_matches = scanned.types
             
             # Extract duration
             duration = self._extract_duration(line, time_matches)
@@ -169,22 +165,30 @@ class TimetableProcessor:
                         'duration': duration,
                         'type': type_matches[0].lower() if type_matches else 'lecture',
                         'raw_text': line,
-                        'confidence': self._calculate_confidence(line, professor_matches, room_matches, time_matches, day_matches)
+                        'confidence': self._calculate_confidence(scanned.has_code, professor_matches, room_matches, time_matches, day_matches)
                     }
                     courses.append(course_info)
         
         return self._deduplicate_courses(courses)
     
+    def _merge_spans(self, scanned, spans: Dict[str, List[str]]):
+        """Prefer tagged courses on ambiguous lines; fill other fields the regex missed"""
+        if spans.get('courses'):
+            scanned.courses = spans['courses']
+        for field in ('professors', 'rooms', 'times', 'days'):
+            if spans.get(field) and not getattr(scanned, field):
+                setattr(scanned, field, spans[field])
+    
     def _extract_course_code(self, course_name: str) -> str:
         """Extract course code from course name"""
-        code_match = re.search(r'[A-Z]{2,4}\s*\d{3,4}', course_name)
+        code_match = COURSE_CODE.search(course_name)
         return code_match.group(0) if code_match else ''
     
     def _extract_duration(self, line: str, time_matches: List[str]) -> int:
         """Extract or calculate class duration in minutes"""
         # Try to find explicit duration
-        for pattern in self.duration_patterns:
-            match = re.search(pattern, line, re.IGNORECASE)
+        for pattern in DURATION_PATTERNS:
+            match = pattern.search(line)
             if match:
                 if 'hour' in line.lower() or 'hr' in line.lower():
                     return int(match.group(1)) * 60
@@ -219,12 +223,12 @@ class TimetableProcessor:
             pass
         return None
 
-    def _calculate_confidence(self, text: str, professors: List, rooms: List, times: List, days: List) -> float:
+    def _calculate_confidence(self, has_code: bool, professors: List, rooms: List, times: List, days: List) -> float:
         """Calculate confidence score for extracted course based on completeness"""
         score = 0.0
         
         # Check for course code pattern (20%)
-        if re.search(r'[A-Z]{2,4}\s*\d{3,4}', text):
+        if has_code:
             score += 0.2
             
         # Check for professor/instructor (20%)
@@ -258,26 +262,44 @@ class TimetableProcessor:
         
         return unique_courses
 
-    async def process_timetable(self, file_content: bytes, file_type: str) -> Dict[str, Any]:
-        """Main method to process timetable file"""
+    async def process_timetable(self, source: Source, file_type: str, content_hash: str = None) -> Dict[str, Any]:
+        """
+        Main method to process timetable file
+        
+        Args:
+            source: File bytes, or the path of a spooled upload
+            file_type: File extension (pdf, jpg, png, ...)
+            content_hash: SHA-256 of the file if already computed while spooling
+        """
         try:
+            # Identical files (re-uploads, shared department timetables) are parsed once
+            if content_hash is None:
+                content_hash = await asyncio.to_thread(timetable_cache.hash_content, source)
+            cache_key = timetable_cache.make_key(content_hash, self.extractor_version)
+            cached = await asyncio.to_thread(timetable_cache.get, cache_key)
+            if cached is not None:
+                return {**cached, 'cached': True}
+            
             # Extract text based on file type
             if file_type.lower() == 'pdf':
-                text = await self.extract_from_pdf(file_content)
+                text = await self.extract_from_pdf(source)
             elif file_type.lower() in ['jpg', 'jpeg', 'png', 'bmp', 'tiff']:
-                text = await self.extract_from_image(file_content)
+                text = await self.extract_from_image(source, content_hash)
             else:
                 raise Exception(f"Unsupported file type: {file_type}")
             
-            # Extract structured course data
-            courses = self.extract_courses_with_bert(text)
+            # Extract structured course data (the tagger's forward pass runs off the event loop)
+            courses = await asyncio.to_thread(self.extract_courses_with_bert, text)
             
-            return {
+            result = {
                 'success': True,
                 'extracted_text': text,
                 'courses': courses,
                 'total_courses': len(courses)
             }
+            await asyncio.to_thread(timetable_cache.set, cache_key, result)
+            
+            return {**result, 'cached': False}
             
         except Exception as e:
             return {
@@ -285,4 +307,4 @@ class TimetableProcessor:
                 'error': str(e),
                 'courses': [],
                 'total_courses': 0
-            }
\ No newline at end of file
+            }
@@ -0,0 +1,114 @@
+"""
+Timetable Line Scanner
+All timetable patterns compiled once into a single named-group regex, so each
+line is tokenized in one left-to-right pass.
+"""
+import re
+from typing import List
+
+# Words that end a course or instructor name instead of extending it
+RESERVED_WORDS = [
+    'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday',
+    'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun',
+    'Lecture', 'Laboratory', 'Lab', 'Tutorial', 'Seminar', 'Workshop', 'Practical',
+    'Professor', 'Prof', 'Dr', 'Mr', 'Ms', 'Mrs', 'Instructor', 'Faculty', 'Teacher',
+    'Room', 'Hall', 'Building',
+]
+_NOT_RESERVED = r'(?!(?:' + '|'.join(RESERVED_WORDS) + r')\b)'
+_NAME = r'(?-i:' + _NOT_RESERVED + r'[A-Z][a-z]+(?:\s+' + _NOT_RESERVED + r'[A-Z][a-z]+)*)'
+_TITLE_WORDS = _NOT_RESERVED + r'[a-z]+(?:\s+' + _NOT_RESERVED + r'[a-z]+)*'
+
+# Alternatives are tried in this order at each position, so labelled and more
+# specific forms come before the generic course/room shapes
+TOKEN_PATTERNS = [
+    ('professor', r'\b(?:Prof(?:essor)?|Dr|Mr|Ms|Mrs)\.?\s+' + _NAME),
+    ('instructor', r'\b(?:Instructor|Faculty|Teacher):\s*(?P<instructor_name>' + _NAME + ')'),
+    ('room', r'\b(?P<room_label>Room|Lab|Hall|Building)\s*[:#]?\s*(?P<room_name>(?=[A-Z-]*\d)[A-Z0-9-]+)'),
+    ('time', r'\b\d{1,2}:\d{2}(?:\s*[AP]M\b)?|\b\d{1,2}\s*[AP]M\b'),
+    ('day', r'\b(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday|Mon|Tue|Wed|Thu|Fri|Sat|Sun)\b'),
+    ('type', r'\b(?:lecture|laboratory|lab|tutorial|seminar|workshop|practical)\b'),
+    ('course_code', r'(?-i:\b[A-Z]{2,4}\s*\d{3,4}\b)'),
+    ('course_title', r'\b(?:Introduction\s+to|Advanced|Fundamentals\s+of)\s+' + _TITLE_WORDS),
+    ('course_name', r'(?-i:\b' + _NOT_RESERVED + r'[A-Z][a-z]+(?:\s+' + _NOT_RESERVED + r'[A-Z][a-z]+)+)'),
+    ('room_code', r'(?-i:\b[A-Z]{1,3}[-\s]?\d{2,4}\b)'),
+    ('day_letters', r'(?-i:\b(?:Th|Su|M|T|W|F|S)+\b)'),
+]
+
+COURSE_CODE = re.compile(r'[A-Z]{2,4}\s*\d{3,4}')
+DAY_LETTER = re.compile(r'Th|Su|M|T|W|F|S')
+DURATION_PATTERNS = [
+    re.compile(r'(\d+)\s*(?:hour|hr|h)', re.IGNORECASE),
+    re.compile(r'(\d+)\s*(?:minute|min|m)', re.IGNORECASE),
+    re.compile(r'(\d+)\s*-\s*(\d+)', re.IGNORECASE),  # Time range
+]
+
+class ScannedLine:
+    """Spans found on one timetable line, grouped by kind"""
+
+    __slots__ = ('courses', 'times', 'days', 'professors', 'rooms', 'types', 'has_code')
+
+    def __init__(self):
+        self.courses: List[str] = []
+        self.times: List[str] = []
+        self.days: List[str] = []
+        self.professors: List[str] = []
+        self.rooms: List[str] = []
+        self.types: List[str] = []
+        self.has_code = False
+
+    @property
+    def ambiguous(self) -> bool:
+        """
+        True when the line looks like a timetable entry but has no course code
+        to anchor it (a name-only course, or schedule details with no course)
+        """
+        if self.has_code:
+            return False
+        return bool(self.courses or self.times or self.rooms or self.professors)
+
+class CourseLineScanner:
+    """
+    Tokenizes timetable lines into course, time, day, professor, room and type spans
+
+    Matches never overlap: where two patterns could claim the same text, the
+    earlier entry in TOKEN_PATTERNS wins (e.g. "CS101" is a course code, not
+    also a room).
+    """
+
+    def __init__(self, patterns=TOKEN_PATTERNS):
+        self.pattern = re.compile(
+            '|'.join(f'(?P<{kind}>{pattern})' for kind, pattern in patterns),
+            re.IGNORECASE
+        )
+
+    def scan(self, line: str) -> ScannedLine:
+        scanned = ScannedLine()
+        for match in self.pattern.finditer(line):
+            kind = match.lastgroup
+            # Inner groups close first, so lastgroup is always the outer kind
+            value = match.group(kind)
+
+            if kind == 'course_code':
+                scanned.courses.append(value)
+                scanned.has_code = True
+            elif kind in ('course_title', 'course_name'):
+                scanned.courses.append(value)
+            elif kind == 'time':
+                scanned.times.append(value)
+            elif kind == 'day':
+                scanned.days.append(value)
+            elif kind == 'day_letters':
+                scanned.days.extend(DAY_LETTER.findall(value))
+            elif kind == 'professor':
+                scanned.professors.append(value)
+            elif kind == 'instructor':
+                scanned.professors.append(match.group('instructor_name'))
+            elif kind == 'room':
+                scanned.rooms.append(match.group('room_name'))
+                if match.group('room_label').lower() == 'lab':
+                    scanned.types.append('lab')
+            elif kind == 'room_code':
+                scanned.rooms.append(value)
+            elif kind == 'type':
+                scanned.types.append(value)
+        return scanned
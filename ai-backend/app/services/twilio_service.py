@@ -3,8 +3,10 @@ Twilio Service for sending SMS and WhatsApp notifications
 """
 import os
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
 from typing import Optional, Dict, Any
 import logging
+from app.services.notification_templates import render_opportunity
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +21,12 @@ class TwilioService:
         
         if self.account_sid and self.auth_token:
             try:
-                self.client = Client(self.account_sid, self.auth_token)
+                # Keep-alive connection pool shared by every send from this process
+                self.client = Client(
+                    self.account_sid,
+                    self.auth_token,
+                    http_client=TwilioHttpClient(pool_connections=True, max_retries=3)
+                )
                 self.enabled = True
                 logger.info("Twilio service initialized successfully")
             except Exception as e:
@@ -142,26 +149,21 @@ class TwilioService:
         Returns:
             Dict with results for each channel
         """
-        message = f"""🎯 New Opportunity Alert!
-
-📋 Position: {opportunity_title}
-🏢 Company: {company}
-📍 Location: {location}
-
-Apply now: {apply_url}
-
-Good luck! 🚀
-- EduCareer Team"""
+        rendered = render_opportunity({
+            'title': opportunity_title,
+            'company': company,
+            'location': location,
+            'apply_url': apply_url
+        })
         
         results = {}
         
         if via_whatsapp:
-            results['whatsapp'] = self.send_whatsapp(user_phone, message)
+            results['whatsapp'] = self.send_whatsapp(user_phone, rendered.whatsapp)
         
         if via_sms:
             # SMS has character limit, so send shorter version
-            sms_message = f"New Job: {opportunity_title} at {company}. Apply: {apply_url}"
-            results['sms'] = self.send_sms(user_phone, sms_message)
+            results['sms'] = self.send_sms(user_phone, rendered.sms)
         
         return results
 
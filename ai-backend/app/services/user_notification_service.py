@@ -3,8 +3,115 @@ User Notification Preferences Service
 Manages user notification settings and preferences
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+import zlib
+
+def _preference_signature(prefs: Dict) -> Tuple:
+    """Hashable summary of the filters that decide whether a job matches"""
+    return (
+        frozenset(prefs.get('categories') or ()),
+        frozenset(prefs.get('locations') or ()),
+        frozenset(prefs.get('experience_levels') or ()),
+        prefs.get('min_salary', 0) or 0,
+        bool(prefs.get('remote_only'))
+    )
+
+def _signature_matches(signature: Tuple, job: Dict) -> bool:
+    """Check a job against a preference signature (empty filters match everything)"""
+    categories, locations, experience_levels, min_salary, remote_only = signature
+    
+    if categories and job['category'] not in categories:
+        return False
+    if locations and job['location'] not in locations:
+        return False
+    if experience_levels and job['experience_level'] not in experience_levels:
+        return False
+    if job['salary_max'] < min_salary:
+        return False
+    if remote_only and not job['remote']:
+        return False
+    return True
+
+def _shard_of(user_id: str, shard_count: int) -> int:
+    """Stable shard number for a user (same in every worker process)"""
+    return zlib.crc32(user_id.encode('utf-8')) % shard_count
+
+class PreferenceIndex:
+    """
+    Subscribers grouped by identical filter preferences
+    
+    Jobs are matched once per distinct preference signature rather than once
+    per user. Signatures are also indexed by their location filter (or their
+    category filter when they have no location filter), so a signature is
+    only checked against jobs in one of its locations or categories; only
+    signatures with neither filter see every job.
+    """
+    
+    def __init__(self):
+        self.groups: Dict[Tuple, List[Dict]] = {}
+        self.by_location: Dict[str, List[Tuple]] = {}
+        self.by_category: Dict[str, List[Tuple]] = {}
+        self.unfiltered: List[Tuple] = []
+    
+    def add(self, recipient: Dict, preferences: Dict):
+        """Index a recipient under their preference signature"""
+        signature = _preference_signature(preferences)
+        if signature not in self.groups:
+            self.groups[signature] = []
+            categories, locations = signature[0], signature[1]
+            if locations:
+                for location in locations:
+                    self.by_location.setdefault(location, []).append(signature)
+            elif categories:
+                for category in categories:
+                    self.by_category.setdefault(category, []).append(signature)
+            else:
+                self.unfiltered.append(signature)
+        self.groups[signature].append(recipient)
+    
+    def __len__(self) -> int:
+        return sum(len(members) for members in self.groups.values())
+    
+    def match_job(self, job: Dict) -> List[Dict]:
+        """Get every indexed user who should hear about a job"""
+        candidates = (
+            self.by_location.get(job['location'], [])
+            + self.by_category.get(job['category'], [])
+            + self.unfiltered
+        )
+        matched = []
+        for signature in candidates:
+            if _signature_matches(signature, job):
+                matched.extend(self.groups[signature])
+        return matched
+    
+    def match_jobs(self, jobs: List[Dict]) -> List[Tuple[List[Dict], List[str]]]:
+        """
+        Match many jobs at once
+        
+        Returns:
+            List of (users, job_ids) pairs; every user in a pair gets the same jobs
+        """
+        jobs_by_location: Dict[str, List[int]] = {}
+        jobs_by_category: Dict[str, List[int]] = {}
+        for position, job in enumerate(jobs):
+            jobs_by_location.setdefault(job['location'], []).append(position)
+            jobs_by_category.setdefault(job['category'], []).append(position)
+        
+        digests = []
+        for signature, members in self.groups.items():
+            categories, locations = signature[0], signature[1]
+            if locations:
+                candidates = sorted(p for location in locations for p in jobs_by_location.get(location, ()))
+            elif categories:
+                candidates = sorted(p for category in categories for p in jobs_by_category.get(category, ()))
+            else:
+                candidates = range(len(jobs))
+            job_ids = [jobs[p]['id'] for p in candidates if _signature_matches(signature, jobs[p])]
+            if job_ids:
+                digests.append((members, job_ids))
+        return digests
 
 class UserNotificationService:
     """Service for managing user notification preferences"""
@@ -90,57 +197,61 @@ class UserNotificationService:
         """Get user notification preferences"""
         return self.user_preferences.get(user_id)
     
-    def get_matching_users_for_job(self, job: Dict) -> List[Dict]:
+    def _recipient(self, user_id: str, user_data: Dict) -> Dict:
+        """Contact details and channel switches needed to notify a user"""
+        prefs = user_data['preferences']
+        return {
+            'user_id': user_id,
+            'email': user_data['email'],
+            'phone': user_data['phone'],
+            'name': user_data['name'],
+            'whatsapp_enabled': prefs.get('whatsapp_enabled', True),
+            'sms_enabled': prefs.get('sms_enabled', False),
+            'email_enabled': prefs.get('email_enabled', True)
+        }
+    
+    def build_preference_index(
+        self,
+        frequency: str,
+        shard_index: int = 0,
+        shard_count: int = 1
+    ) -> PreferenceIndex:
         """
-        Get list of users who should be notified about a job
+        Index users with the given notification frequency by their filters
         
         Args:
-            job: Job dict with details
+            frequency: 'immediate', 'daily' or 'weekly'
+            shard_index: Shard to build (0-based)
+            shard_count: Total shards; users are split by a stable hash of user_id
             
         Returns:
-            List of user dicts who match the job criteria
+            PreferenceIndex over the selected users
         """
-        matching_users = []
+        index = PreferenceIndex()
         
         for user_id, user_data in self.user_preferences.items():
-            prefs = user_data['preferences']
-            
-            # Check if user wants immediate notifications
-            if prefs.get('frequency') != 'immediate':
-                continue
-            
-            # Check category filter
-            if prefs.get('categories') and job['category'] not in prefs['categories']:
-                continue
-            
-            # Check location filter
-            if prefs.get('locations') and job['location'] not in prefs['locations']:
-                continue
-            
-            # Check experience level filter
-            if prefs.get('experience_levels') and job['experience_level'] not in prefs['experience_levels']:
+            if user_data['preferences'].get('frequency') != frequency:
                 continue
-            
-            # Check salary filter
-            if job['salary_max'] < prefs.get('min_salary', 0):
-                continue
-            
-            # Check remote filter
-            if prefs.get('remote_only') and not job['remote']:
+            if shard_count > 1 and _shard_of(user_id, shard_count) != shard_index:
                 continue
             
-            # User matches! Add to list
-            matching_users.append({
-                'user_id': user_id,
-                'email': user_data['email'],
-                'phone': user_data['phone'],
-                'name': user_data['name'],
-                'whatsapp_enabled': prefs.get('whatsapp_enabled', True),
-                'sms_enabled': prefs.get('sms_enabled', False),
-                'email_enabled': prefs.get('email_enabled', True)
-            })
+            index.add(self._recipient(user_id, user_data), user_data['preferences'])
         
-        return matching_users
+        return index
+    
+    def get_matching_users_for_job(self, job: Dict) -> List[Dict]:
+        """
+        Get list of users who should be notified about a job
+        
+        Args:
+            job: Job dict with details
+            
+        Returns:
+            List of user dicts who match the job criteria
+        """
+        # Only users who want immediate notifications; the index narrows the
+        # candidates to preference groups for the job's location or category
+        return self.build_preference_index('immediate').match_job(job)
     
     def unsubscribe_user(self, user_id: str) -> Dict:
         """Unsubscribe user from all notifications"""
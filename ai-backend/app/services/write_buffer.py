@@ -0,0 +1,259 @@
+"""
+Write-behind buffer for MongoDB telemetry
+Gathers log and audit documents from request handlers and flushes them in
+batches, spilling to a local append-only file when MongoDB is unreachable.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Queued operation: (kind, collection, payload)
+Operation = Tuple[str, str, Any]
+
+# Queued by stop(); the flusher writes what it holds and exits
+_STOP = ("stop", "", None)
+
+class WriteBehindBuffer:
+    """
+    Batches inserts and upserts and writes them off the request path
+
+    Documents are flushed once `batch_size` are queued or `flush_interval`
+    seconds have passed. The queue is bounded, so when MongoDB is slow the
+    flusher falls behind and callers wait in `insert`/`upsert` (backpressure)
+    instead of memory growing without limit. Batches that fail with a
+    connection or server error are appended to `spill_path` as JSON lines and
+    replayed once writes succeed again (at-least-once delivery).
+    """
+
+    def __init__(
+        self,
+        database=None,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000,
+        spill_path: str = "logs/mongo_spill.jsonl",
+        replay_interval: float = 60.0
+    ):
+        self.database = database
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.spill_path = spill_path
+        self.replay_interval = replay_interval
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Set by stop(); later writes go straight to MongoDB instead of restarting the flusher
+        self._closing = False
+        self._last_replay = 0.0
+        self.stats = {"flushed": 0, "batches": 0, "spilled": 0, "replayed": 0, "write_errors": 0}
+
+    async def start(self):
+        """Start the background flusher on the running event loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._closing = False
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run())
+        await self._replay_spill()
+
+    async def stop(self):
+        """Flush everything still queued and stop the flusher"""
+        self._closing = True
+        if self._task is None:
+            return
+        if not self._task.done():
+            # Behind everything already queued, so the flusher writes it all first
+            await self._queue.put(_STOP)
+            await self._task
+        self._task = None
+
+        # Anything queued after the stop marker, including producers that were
+        # waiting for room in a full queue (they enqueue while we flush)
+        while not self._queue.empty():
+            remaining = []
+            while not self._queue.empty():
+                operation = self._queue.get_nowait()
+                if operation is not _STOP:
+                    remaining.append(operation)
+            for start in range(0, len(remaining), self.batch_size):
+                await self._flush(remaining[start:start + self.batch_size])
+
+    async def insert(self, collection: str, document: Dict[str, Any]):
+        """Queue a document for insert_many into `collection`"""
+        await self._put(("insert", collection, document))
+
+    async def upsert(self, collection: str, filter_doc: Dict[str, Any], update: Dict[str, Any]):
+        """Queue an upserting update_one against `collection`"""
+        await self._put(("upsert", collection, {"filter": filter_doc, "update": update}))
+
+    async def _put(self, operation: Operation):
+        if self._closing:
+            # Shutting down: write through rather than queue behind a flusher that's exiting
+            await self._flush([operation])
+            return
+        if self._task is None or self._task.done():
+            await self.start()
+        # Blocks while the queue is full, slowing producers down to the flush rate
+        await self._queue.put(operation)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            operation = await self._queue.get()
+            if operation is _STOP:
+                return
+            batch = [operation]
+            deadline = loop.time() + self.flush_interval
+
+            stopping = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    operation = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if operation is _STOP:
+                    stopping = True
+                    break
+                batch.append(operation)
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Operation]):
+        if not batch:
+            return
+
+        if self.database is None:
+            await self._spill(batch)
+            return
+
+        # Each collection's inserts and upserts are written (and fail) independently
+        groups: Dict[Tuple[str, str], List[Operation]] = {}
+        for operation in batch:
+            kind, collection, _ = operation
+            groups.setdefault((kind, collection), []).append(operation)
+
+        written = 0
+        for (kind, collection), operations in groups.items():
+            if kind == "insert":
+                written += await self._insert(collection, operations)
+            else:
+                written += await self._upsert(collection, operations)
+
+        self.stats["flushed"] += written
+        self.stats["batches"] += 1
+
+        if time.monotonic() - self._last_replay >= self.replay_interval:
+            await self._replay_spill()
+
+    async def _insert(self, collection: str, operations: List[Operation]) -> int:
+        """insert_many for one collection; returns the number of documents written"""
+        documents = [payload for _, _, payload in operations]
+        try:
+            await self.database[collection].insert_many(documents, ordered=False)
+            return len(documents)
+        except BulkWriteError as e:
+            # Individual documents were rejected; the rest were written
+            rejected = len(e.details.get("writeErrors", []))
+            self.stats["write_errors"] += rejected
+            logger.warning(f"Telemetry inserts into {collection} had {rejected} rejected writes")
+            return e.details.get("nInserted", len(documents) - rejected)
+        except PyMongoError as e:
+            logger.error(f"MongoDB unavailable, spilling {len(operations)} {collection} inserts to {self.spill_path}: {str(e)}")
+            await self._spill(operations)
+            return 0
+
+    async def _upsert(self, collection: str, operations: List[Operation]) -> int:
+        """Ordered bulk_write for one collection, continuing past rejected updates"""
+        requests = [
+            UpdateOne(payload["filter"], payload["update"], upsert=True)
+            for _, _, payload in operations
+        ]
+        written = 0
+        start = 0
+        while start < len(requests):
+            try:
+                # Ordered so repeated updates to the same document keep their order
+                await self.database[collection].bulk_write(requests[start:], ordered=True)
+                return written + len(requests) - start
+            except BulkWriteError as e:
+                # An ordered bulk stops at its first error; resume after it
+                failed = e.details["writeErrors"][0]["index"]
+                self.stats["write_errors"] += 1
+                logger.warning(f"Telemetry upsert into {collection} rejected: {e.details['writeErrors'][0].get('errmsg', '')}")
+                written += failed
+                start += failed + 1
+            except PyMongoError as e:
+                logger.error(f"MongoDB unavailable, spilling {len(requests) - start} {collection} upserts to {self.spill_path}: {str(e)}")
+                await self._spill(operations[start:])
+                return written
+        return written
+
+    async def _spill(self, batch: List[Operation]):
+        """Append failed operations to the local spill file"""
+        lines = []
+        for kind, collection, payload in batch:
+            if kind == "insert":
+                # insert_many may already have assigned an ObjectId
+                payload = {k: v for k, v in payload.items() if k != "_id"}
+            lines.append(json.dumps({"kind": kind, "collection": collection, "payload": payload}, default=str))
+
+        def write_lines():
+            os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+        try:
+            await asyncio.to_thread(write_lines)
+            self.stats["spilled"] += len(batch)
+        except OSError as e:
+            logger.error(f"Could not spill {len(batch)} writes, dropping them: {str(e)}")
+
+    async def _replay_spill(self):
+        """Re-queue operations from the spill file, if any"""
+        self._last_replay = time.monotonic()
+        if not os.path.exists(self.spill_path):
+            return
+
+        replay_path = f"{self.spill_path}.replay"
+        try:
+            os.replace(self.spill_path, replay_path)
+            with open(replay_path, encoding="utf-8") as f:
+                operations = [json.loads(line) for line in f if line.strip()]
+            os.remove(replay_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not replay spilled writes: {str(e)}")
+            return
+
+        for start in range(0, len(operations), self.batch_size):
+            chunk = operations[start:start + self.batch_size]
+            await self._flush([(op["kind"], op["collection"], op["payload"]) for op in chunk])
+
+        self.stats["replayed"] += len(operations)
+        logger.info(f"Replayed {len(operations)} spilled writes")
+
+def _create_log_writer() -> WriteBehindBuffer:
+    from app.database import mongo_db
+
+    return WriteBehindBuffer(
+        database=mongo_db,
+        batch_size=int(os.getenv("TELEMETRY_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("TELEMETRY_FLUSH_INTERVAL", "1.0")),
+        max_pending=int(os.getenv("TELEMETRY_MAX_PENDING", "10000")),
+        spill_path=os.getenv("TELEMETRY_SPILL_PATH", "logs/mongo_spill.jsonl")
+    )
+
+# Global instance
+log_writer = _create_log_writer()
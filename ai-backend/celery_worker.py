@@ -3,14 +3,24 @@ Celery Worker Configuration for Background Tasks
 Handles scheduled notifications and async job processing
 """
 
-from celery import Celery
+from celery import Celery, group
 from celery.schedules import crontab
+from celery.utils.log import get_task_logger
 import os
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+logger = get_task_logger(__name__)
+
+# Users per fan-out task; one task renders and sends for the whole batch
+NOTIFICATION_BATCH_SIZE = int(os.getenv('NOTIFICATION_BATCH_SIZE', '200'))
+
+# Number of workers the daily digest run is split across (by user id)
+DIGEST_SHARD_COUNT = int(os.getenv('DIGEST_SHARD_COUNT', '1'))
+
 # Initialize Celery
 redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
 celery_app = Celery(
@@ -38,24 +48,34 @@ celery_app.conf.beat_schedule = {
         'task': 'celery_worker.check_new_opportunities',
         'schedule': crontab(minute=0),  # Every hour at minute 0
     },
-    # Send daily digest at 9 AM
-    'send-daily-digest': {
-        'task': 'celery_worker.send_daily_opportunity_digest',
-        'schedule': crontab(hour=9, minute=0),  # 9:00 AM daily
+    # Refresh the stalest portfolio verifications a budgeted slice at a time
+    'reverify-stale-portfolios': {
+        'task': 'celery_worker.reverify_stale_portfolios',
+        'schedule': crontab(minute='*/30'),  # Every 30 minutes
     },
 }
 
-@celery_app.task(name='celery_worker.send_opportunity_notification')
-def send_opportunity_notification(user_data: dict, job_data: dict):
-    """
-    Send opportunity notification via email and WhatsApp
-    
-    Args:
-        user_data: Dict with user info (email, phone, name, preferences)
-        job_data: Dict with job info (title, company, location, etc.)
-    """
+# Send daily digest at 9 AM, one task per shard
+for shard in range(DIGEST_SHARD_COUNT):
+    celery_app.conf.beat_schedule[f'send-daily-digest-{shard}'] = {
+        'task': 'celery_worker.send_daily_opportunity_digest',
+        'schedule': crontab(hour=9, minute=0),  # 9:00 AM daily
+        'args': (shard, DIGEST_SHARD_COUNT),
+    }
+
+def _chunked(items: list, size: int):
+    """Yield successive slices of at most `size` items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _deliver_opportunity(user_data: dict, job_data: dict, rendered, email_session=None) -> dict:
+    """Send one user's opportunity notification on every channel they enabled"""
     from app.services.email_service import email_service
     from app.services.twilio_service import twilio_service
+    from app.services.notification_dedup import notification_dedup, recipient_key, job_key
+    
+    user_key = recipient_key(user_data)
+    job_id = job_key(job_data)
     
     results = {
         'email': None,
@@ -64,52 +84,133 @@ def send_opportunity_notification(user_data: dict, job_data: dict):
     }
     
     # Send Email
-    if user_data.get('email'):
+    if user_data.get('email') and user_data.get('email_enabled', True):
         try:
-            results['email'] = email_service.send_opportunity_email(
+            results['email'] = notification_dedup.send_once(user_key, job_id, 'email', lambda: email_service.send_rendered_opportunity(
                 user_email=user_data['email'],
                 user_name=user_data.get('name', 'User'),
-                opportunity_title=job_data['title'],
-                company=job_data['company'],
-                location=job_data['location'],
-                description=job_data['description'],
-                apply_url=job_data.get('apply_url', 'http://localhost:5173/opportunities'),
-                salary=job_data.get('salary')
-            )
+                rendered=rendered,
+                session=email_session
+            ))
         except Exception as e:
             results['email'] = {'success': False, 'error': str(e)}
     
     # Send WhatsApp
     if user_data.get('phone') and user_data.get('whatsapp_enabled', True):
         try:
-            results['whatsapp'] = twilio_service.send_whatsapp(
+            results['whatsapp'] = notification_dedup.send_once(user_key, job_id, 'whatsapp', lambda: twilio_service.send_whatsapp(
                 to_number=user_data['phone'],
-                message=f"""🎯 New Opportunity Alert!
-
-📋 {job_data['title']}
-🏢 {job_data['company']}
-📍 {job_data['location']}
-{f"💰 {job_data['salary']}" if job_data.get('salary') else ''}
-
-Apply: {job_data.get('apply_url', 'http://localhost:5173/opportunities')}
-
-Good luck! 🚀"""
-            )
+                message=rendered.whatsapp
+            ))
         except Exception as e:
             results['whatsapp'] = {'success': False, 'error': str(e)}
     
     # Send SMS (optional, if user prefers)
     if user_data.get('phone') and user_data.get('sms_enabled', False):
         try:
-            results['sms'] = twilio_service.send_sms(
+            results['sms'] = notification_dedup.send_once(user_key, job_id, 'sms', lambda: twilio_service.send_sms(
                 to_number=user_data['phone'],
-                message=f"New Job: {job_data['title']} at {job_data['company']}. Apply: {job_data.get('apply_url', 'http://localhost:5173/opportunities')}"
-            )
+                message=rendered.sms
+            ))
         except Exception as e:
             results['sms'] = {'success': False, 'error': str(e)}
     
     return results
 
+def _build_job_data(job: dict) -> dict:
+    """Shape a job listing into the payload used by the notification tasks"""
+    return {
+        'job_id': job['id'],
+        'title': job['title'],
+        'company': job['company'],
+        'location': job['location'],
+        'description': job['description'],
+        'salary': f"{job['salary_currency']} {job['salary_min']:,} - {job['salary_max']:,}",
+        'apply_url': f"http://localhost:5173/opportunities?job={job['id']}"
+    }
+
+def _dispatch_in_batches(user_list: list, job_data: dict):
+    """Fan a notification out as one task per batch of users"""
+    batches = list(_chunked(user_list, NOTIFICATION_BATCH_SIZE))
+    group_result = group(
+        send_opportunity_notification_batch.s(batch, job_data) for batch in batches
+    ).apply_async()
+    return group_result, len(batches)
+
+@celery_app.task(name='celery_worker.send_opportunity_notification')
+def send_opportunity_notification(user_data: dict, job_data: dict):
+    """
+    Send opportunity notification via email and WhatsApp
+    
+    Args:
+        user_data: Dict with user info (email, phone, name, preferences)
+        job_data: Dict with job info (title, company, location, etc.)
+    """
+    from app.services.notification_templates import render_opportunity
+    
+    return _deliver_opportunity(user_data, job_data, render_opportunity(job_data))
+
+@celery_app.task(name='celery_worker.send_opportunity_notification_batch')
+def send_opportunity_notification_batch(user_batch: list, job_data: dict):
+    """
+    Send one job's notification to a batch of users
+    
+    Job content is rendered once for the batch (only the greeting is rendered
+    per user) and every email goes through a single SMTP connection. Twilio
+    sends share the service's pooled HTTP client. Users already notified
+    about this job on a channel are counted as duplicates and skipped.
+    
+    Args:
+        user_batch: List of user dicts
+        job_data: Job information dict
+    """
+    from app.services.email_service import email_service
+    from app.services.notification_templates import render_opportunity
+    
+    started = time.perf_counter()
+    rendered = render_opportunity(job_data)
+    stats = {channel: {'sent': 0, 'failed': 0, 'duplicate': 0} for channel in ('email', 'whatsapp', 'sms')}
+    failed_users = 0
+    
+    with email_service.session() as email_session:
+        for user in user_batch:
+            try:
+                results = _deliver_opportunity(user, job_data, rendered, email_session)
+            except Exception as e:
+                # e.g. a malformed user record; the rest of the batch still goes out
+                logger.warning("Could not notify user %s: %s", user.get('user_id', user.get('email')), e)
+                failed_users += 1
+                continue
+            user_failed = False
+            for channel, result in results.items():
+                if result is None:
+                    continue
+                if result.get('duplicate'):
+                    stats[channel]['duplicate'] += 1
+                elif result.get('success'):
+                    stats[channel]['sent'] += 1
+                else:
+                    stats[channel]['failed'] += 1
+                    user_failed = True
+            if user_failed:
+                failed_users += 1
+    
+    duration = time.perf_counter() - started
+    throughput = len(user_batch) / duration if duration > 0 else 0.0
+    logger.info(
+        "Notification batch for job %s: %d users in %.2fs (%.1f users/s), %d with failures",
+        job_data.get('job_id', job_data.get('title')), len(user_batch), duration, throughput, failed_users
+    )
+    
+    return {
+        'job_id': job_data.get('job_id'),
+        'batch_size': len(user_batch),
+        'failed_users': failed_users,
+        'channels': stats,
+        'duration_seconds': round(duration, 3),
+        'users_per_second': round(throughput, 1)
+    }
+
 @celery_app.task(name='celery_worker.check_new_opportunities')
 def check_new_opportunities():
     """
@@ -120,41 +221,147 @@ def check_new_opportunities():
     from datetime import datetime, timedelta
     
     # Get jobs posted in the last hour
-    one_hour_ago = datetime.now() - timedelta(hours=1)
+    now = datetime.now()
+    new_jobs = job_service.get_jobs_posted_between(now - timedelta(hours=1), now)
     
-    # In a real system, you would:
-    # 1. Query database for jobs posted after one_hour_ago
-    # 2. Get list of users with matching preferences
-    # 3. Send notifications to matching users
+    # Each job fans out to its own matching users
+    if new_jobs:
+        group(notify_users_of_new_job.s(job['id']) for job in new_jobs).apply_async()
+    
+    return {
+        'status': 'completed',
+        'checked_at': now.isoformat(),
+        'new_jobs': len(new_jobs),
+        'message': f'Queued notifications for {len(new_jobs)} new opportunities'
+    }
+
+@celery_app.task(name='celery_worker.reverify_stale_portfolios')
+def reverify_stale_portfolios():
+    """
+    Periodic task to re-verify stale portfolio items
+    Runs every 30 minutes
+    """
+    import asyncio
+    from app.services.portfolio_reverifier import portfolio_reverifier
+    from datetime import datetime
+    
+    # Fresh event loop per run; the re-verifier opens its MongoDB client on it
+    stats = asyncio.run(portfolio_reverifier.run())
+    
+    logger.info(
+        "Portfolio re-verification: %d items checked (%d unchanged, %d deferred) across %d portfolios, %d updated (%.2fs)",
+        stats['items_checked'], stats['unchanged'], stats['deferred'], stats['portfolios_scanned'],
+        stats['portfolios_updated'], stats['duration_seconds']
+    )
     
-    # For now, we'll return a status
     return {
         'status': 'completed',
         'checked_at': datetime.now().isoformat(),
-        'message': 'Checked for new opportunities'
+        **stats
     }
 
 @celery_app.task(name='celery_worker.send_daily_opportunity_digest')
-def send_daily_opportunity_digest():
+def send_daily_opportunity_digest(shard_index: int = 0, shard_count: int = 1):
     """
     Send daily digest of opportunities to users
     Runs at 9 AM daily
+    
+    Args:
+        shard_index: Shard of the subscriber base handled by this run (0-based)
+        shard_count: Number of shards the run is split into
     """
     from app.services.job_opportunities_service import job_service
+    from app.services.user_notification_service import user_notification_service
     from datetime import datetime, timedelta
     
-    # Get jobs posted in the last 24 hours
-    yesterday = datetime.now() - timedelta(days=1)
+    started = time.perf_counter()
     
-    # In a real system, you would:
-    # 1. Get all jobs from last 24 hours
-    # 2. Group by user preferences
-    # 3. Send digest emails
+    # Get jobs posted in the last 24 hours (one range lookup on the posted-date index)
+    now = datetime.now()
+    jobs = job_service.get_jobs_posted_between(now - timedelta(days=1), now)
+    
+    if not jobs:
+        return {
+            'status': 'completed',
+            'sent_at': now.isoformat(),
+            'shard': shard_index,
+            'message': 'No new opportunities in the last 24 hours'
+        }
+    
+    # Match jobs once per distinct preference set, then expand to users
+    index = user_notification_service.build_preference_index('daily', shard_index, shard_count)
+    digests = [
+        {'user': user, 'job_ids': job_ids}
+        for users, job_ids in index.match_jobs(jobs)
+        for user in users
+    ]
+    
+    jobs_by_id = {job['id']: _build_job_data(job) for job in jobs}
+    batches = list(_chunked(digests, NOTIFICATION_BATCH_SIZE))
+    if batches:
+        group(send_digest_batch.s(batch, jobs_by_id) for batch in batches).apply_async()
+    
+    logger.info(
+        "Digest shard %d/%d: %d jobs, %d subscribers, %d digests in %d batches (%.2fs)",
+        shard_index, shard_count, len(jobs), len(index), len(digests), len(batches),
+        time.perf_counter() - started
+    )
     
     return {
         'status': 'completed',
-        'sent_at': datetime.now().isoformat(),
-        'message': 'Daily digest sent'
+        'sent_at': now.isoformat(),
+        'shard': shard_index,
+        'jobs': len(jobs),
+        'subscribers': len(index),
+        'digests': len(digests),
+        'batches': len(batches),
+        'message': 'Daily digest queued'
+    }
+
+@celery_app.task(name='celery_worker.send_digest_batch')
+def send_digest_batch(digests: list, jobs_by_id: dict):
+    """
+    Send a batch of daily digests over one SMTP connection
+    
+    Args:
+        digests: List of {'user': user dict, 'job_ids': [job ids]}
+        jobs_by_id: Job payloads for every job referenced by the batch
+    """
+    from app.services.email_service import email_service
+    
+    started = time.perf_counter()
+    sent = failed = skipped = 0
+    
+    with email_service.session() as email_session:
+        for digest in digests:
+            user = digest['user']
+            if not user.get('email') or not user.get('email_enabled', True):
+                skipped += 1
+                continue
+            
+            result = email_service.send_digest_email(
+                user_email=user['email'],
+                user_name=user.get('name', 'User'),
+                jobs=[jobs_by_id[job_id] for job_id in digest['job_ids']],
+                session=email_session
+            )
+            if result.get('success'):
+                sent += 1
+            else:
+                failed += 1
+    
+    duration = time.perf_counter() - started
+    logger.info(
+        "Digest batch: %d sent, %d failed, %d skipped in %.2fs",
+        sent, failed, skipped, duration
+    )
+    
+    return {
+        'batch_size': len(digests),
+        'sent': sent,
+        'failed': failed,
+        'skipped': skipped,
+        'duration_seconds': round(duration, 3)
     }
 
 @celery_app.task(name='celery_worker.notify_users_of_new_job')
@@ -166,6 +373,7 @@ def notify_users_of_new_job(job_id: str):
         job_id: ID of the newly posted job
     """
     from app.services.job_opportunities_service import job_service
+    from app.services.user_notification_service import user_notification_service
     
     # Get job details
     job = job_service.get_job_by_id(job_id)
@@ -173,45 +381,25 @@ def notify_users_of_new_job(job_id: str):
     if not job:
         return {'success': False, 'error': 'Job not found'}
     
-    # In a real system, you would:
-    # 1. Query database for users with matching preferences
-    # 2. Filter by location, category, experience level, etc.
-    # 3. Send notifications to each matching user
-    
-    # Example: Notify sample users
-    sample_users = [
-        {
-            'email': 'user@example.com',
-            'phone': '+919876543210',
-            'name': 'John Doe',
-            'whatsapp_enabled': True,
-            'sms_enabled': False
-        }
-    ]
+    # Users whose category, location, experience, salary and remote filters match
+    users = user_notification_service.get_matching_users_for_job(job)
     
-    results = []
-    for user in sample_users:
-        job_data = {
-            'title': job['title'],
-            'company': job['company'],
-            'location': job['location'],
-            'description': job['description'],
-            'salary': f"{job['salary_currency']} {job['salary_min']:,} - {job['salary_max']:,}",
-            'apply_url': f"http://localhost:5173/opportunities?job={job_id}"
+    if not users:
+        return {
+            'success': True,
+            'job_id': job_id,
+            'matched_users': 0,
+            'batches': 0
         }
-        
-        # Send notification asynchronously
-        result = send_opportunity_notification.delay(user, job_data)
-        results.append({
-            'user_email': user['email'],
-            'task_id': result.id
-        })
+    
+    group_result, batch_count = _dispatch_in_batches(users, _build_job_data(job))
     
     return {
         'success': True,
         'job_id': job_id,
-        'notifications_sent': len(results),
-        'results': results
+        'matched_users': len(users),
+        'batches': batch_count,
+        'group_id': group_result.id
     }
 
 @celery_app.task(name='celery_worker.send_bulk_notifications')
@@ -223,27 +411,20 @@ def send_bulk_notifications(user_list: list, job_data: dict):
         user_list: List of user dicts
         job_data: Job information dict
     """
-    results = []
+    if not user_list:
+        return {
+            'success': True,
+            'total_users': 0,
+            'batches': 0
+        }
     
-    for user in user_list:
-        try:
-            result = send_opportunity_notification.delay(user, job_data)
-            results.append({
-                'user_email': user.get('email'),
-                'task_id': result.id,
-                'status': 'queued'
-            })
-        except Exception as e:
-            results.append({
-                'user_email': user.get('email'),
-                'status': 'failed',
-                'error': str(e)
-            })
+    group_result, batch_count = _dispatch_in_batches(user_list, job_data)
     
     return {
         'success': True,
         'total_users': len(user_list),
-        'results': results
+        'batches': batch_count,
+        'group_id': group_result.id
     }
 
 if __name__ == '__main__':
@@ -1,11 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import uvicorn
 import os
 from dotenv import load_dotenv
 
 # Import routers
-from app.routers import personalized_recommendations, timetable_extraction, notifications, portfolio_verification
+from app.routers import personalized_recommendations, timetable_extraction, notifications, portfolio_verification, resume_builder
+from app.services.write_buffer import log_writer
+from app.services.timetable_batch import timetable_batch_queue
+from app.services.resume_renderer import resume_render_queue
+from app.services.http_client import http_client
+from app.repositories import ensure_indexes, query_stats
 
 # Load environment variables
 load_dotenv()
@@ -50,7 +56,25 @@ app.include_router(
     tags=["Portfolio Verification"]
 )
 
+app.include_router(
+    resume_builder.router,
+    prefix="/api/v1/resume",
+    tags=["Resume Builder"]
+)
+
 
+@app.on_event("startup")
+async def start_background_writers():
+    await log_writer.start()
+    # In the background, so an unreachable MongoDB doesn't hold up startup
+    app.state.index_task = asyncio.create_task(ensure_indexes())
+
+@app.on_event("shutdown")
+async def flush_background_writers():
+    await log_writer.stop()
+    timetable_batch_queue.shutdown()
+    resume_render_queue.shutdown()
+    await http_client.close()
 
 @app.get("/")
 async def root():
@@ -69,6 +93,11 @@ async def root():
 async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/health/queries")
+async def query_timings():
+    """Per-query MongoDB latency since startup"""
+    return {"queries": query_stats.snapshot()}
+
 # Basic test endpoint
 @app.get("/test")
 async def test_endpoint():
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Compare inference backends per model: parity with PyTorch, latency and memory
+Each (model, backend) pair loads in a fresh process so memory numbers are
+not polluted by models loaded earlier.
+
+Usage (from ai-backend/):
+    python scripts/bench_inference_backends.py
+    python scripts/bench_inference_backends.py --models minilm bart --backends torch onnx-int8
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+from app.services.fallback_courses import FALLBACK_COURSES
+from app.services.inference_backend import BACKENDS
+
+# Fixed eval set: timetable course names ranked against the course catalogue
+QUERIES = [
+    'Data Structures and Algorithms', 'Introduction to Machine Learning', 'Web Programming',
+    'Database Management Systems', 'Cloud Infrastructure', 'Statistics for Data Science',
+    'Operating Systems', 'Computer Networks', 'Deep Learning', 'Software Engineering',
+]
+CANDIDATES = [course['title'] for courses in FALLBACK_COURSES.values() for course in courses]
+
+BIOS = [
+    "I am a final-year computer science student who has built several full-stack web applications "
+    "with React and FastAPI, interned at a fintech startup where I automated reporting pipelines in "
+    "Python, and I lead the university coding club where I organise weekly algorithm workshops.",
+    "Data analyst with two years of experience turning messy operational data into dashboards. "
+    "Comfortable with SQL, pandas and Tableau, currently learning machine learning through online "
+    "courses and applying it to churn prediction for a subscription business.",
+    "Mechanical engineering graduate moving into robotics software. Built a ROS-based autonomous "
+    "rover for a capstone project, wrote the path planning in C++, and published a short paper on "
+    "sensor fusion for low-cost lidar units at a regional student conference.",
+]
+
+TIMETABLE_LINES = [
+    'Data Structures Monday 9:00 AM Room 204 Prof. Alan Turing',
+    'Linear Algebra with Dr Grace Hopper Hall B2',
+    'Organic Chemistry lab Thursday afternoon',
+    'Machine Learning Seminar Instructor: Ada Lovelace',
+]
+
+MODELS = {
+    'minilm': ('sentence', 'all-MiniLM-L6-v2'),
+    'bert-base': ('feature', 'bert-base-uncased'),
+    'bart': ('summarizer', 'facebook/bart-large-cnn'),
+    'span-tagger': ('tagger', os.getenv('COURSE_SPAN_MODEL', '')),
+}
+
+def _rss_mb():
+    """Current resident set size (psutil if available, else peak RSS)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 ** 2
+    except ImportError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _time_calls(function, inputs, repeat):
+    timings = []
+    outputs = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        outputs = [function(item) for item in inputs]
+        timings.append((time.perf_counter() - started) / len(inputs))
+    per_item = sorted(timings)
+    return outputs, per_item[len(per_item) // 2] * 1000, per_item[-1] * 1000
+
+def run_one(kind, model_name, backend, repeat):
+    """Load one model on one backend and measure it (runs in a child process)"""
+    from app.services import inference_backend
+
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+
+    if kind == 'sentence':
+        model = inference_backend.load_sentence_encoder(model_name, backend)
+        load_seconds = time.perf_counter() - started
+        _, p50, worst = _time_calls(lambda text: model.encode([text]), QUERIES, repeat)
+        batch_started = time.perf_counter()
+        candidate_vectors = np.asarray(model.encode(CANDIDATES))
+        batch_ms = (time.perf_counter() - batch_started) * 1000
+        query_vectors = np.asarray(model.encode(QUERIES))
+        output = {'queries': query_vectors.tolist(), 'candidates': candidate_vectors.tolist()}
+    elif kind == 'feature':
+        tokenizer, model = inference_backend.load_feature_extractor(model_name, backend)
+        load_seconds = time.perf_counter() - started
+
+        def embed(text):
+            encoded = tokenizer(text, return_tensors='pt', truncation=True)
+            return np.asarray(model(**encoded).last_hidden_state.detach().numpy()).mean(axis=1)[0]
+
+        import torch
+        with torch.inference_mode():
+            vectors, p50, worst = _time_calls(embed, QUERIES, repeat)
+        batch_ms = None
+        output = {'vectors': [vector.tolist() for vector in vectors]}
+    elif kind == 'summarizer':
+        summarizer = inference_backend.load_summarizer(model_name, backend)
+        load_seconds = time.perf_counter() - started
+        summaries, p50, worst = _time_calls(
+            lambda bio: summarizer(bio, max_length=100, min_length=30, do_sample=False)[0]['summary_text'],
+            BIOS, max(1, repeat // 2)
+        )
+        batch_ms = None
+        output = {'summaries': summaries}
+    else:
+        from app.services.course_span_tagger import CourseSpanTagger
+        tagger = CourseSpanTagger(model_name, backend=backend)
+        tagger._load()
+        load_seconds = time.perf_counter() - started
+        _, p50, worst = _time_calls(lambda line: tagger.tag_lines([line]), TIMETABLE_LINES, repeat)
+        batch_started = time.perf_counter()
+        spans = tagger.tag_lines(TIMETABLE_LINES * 16)[:len(TIMETABLE_LINES)]
+        batch_ms = (time.perf_counter() - batch_started) * 1000
+        output = {'spans': spans}
+
+    return {
+        'load_seconds': load_seconds,
+        'memory_mb': _rss_mb() - rss_before,
+        'p50_ms': p50,
+        'max_ms': worst,
+        'batch_ms': batch_ms,
+        'output': output,
+    }
+
+def _ranks(scores):
+    order = np.argsort(-scores)
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(scores))
+    return ranks
+
+def parity(kind, baseline, result, top_k=5):
+    """Agreement of a backend's outputs with the torch baseline"""
+    if kind == 'sentence':
+        def scores(output):
+            queries = np.asarray(output['queries'])
+            candidates = np.asarray(output['candidates'])
+            queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+            candidates = candidates / np.linalg.norm(candidates, axis=1, keepdims=True)
+            return queries @ candidates.T
+        base, other = scores(baseline), scores(result)
+        overlaps, rhos = [], []
+        for base_row, other_row in zip(base, other):
+            overlaps.append(len(set(np.argsort(-base_row)[:top_k]) & set(np.argsort(-other_row)[:top_k])) / top_k)
+            rhos.append(np.corrcoef(_ranks(base_row), _ranks(other_row))[0, 1])
+        return f"top-{top_k} overlap {np.mean(overlaps):.3f}, spearman {np.mean(rhos):.4f}"
+    if kind == 'feature':
+        cosines = [
+            np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+            for a, b in zip(np.asarray(baseline['vectors']), np.asarray(result['vectors']))
+        ]
+        return f"mean cosine to torch {np.mean(cosines):.4f}"
+    if kind == 'summarizer':
+        scores = []
+        for base_text, other_text in zip(baseline['summaries'], result['summaries']):
+            base_words, other_words = set(base_text.lower().split()), set(other_text.lower().split())
+            common = len(base_words & other_words)
+            scores.append(2 * common / (len(base_words) + len(other_words)) if common else 0.0)
+        return f"unigram F1 to torch {np.mean(scores):.3f}"
+    matches = sum(a == b for a, b in zip(baseline['spans'], result['spans']))
+    return f"identical spans on {matches}/{len(baseline['spans'])} lines"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--models', nargs='+', default=list(MODELS), choices=list(MODELS))
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    backends = ['torch'] + [backend for backend in args.backends if backend != 'torch']
+    context = multiprocessing.get_context('spawn')
+
+    for key in args.models:
+        kind, model_name = MODELS[key]
+        if not model_name:
+            print(f"⏭️  {key}: set COURSE_SPAN_MODEL to benchmark the span tagger")
+            continue
+
+        print(f"\n📦 {key} ({model_name})")
+        print(f"{'backend':<11} {'load s':>7} {'RSS MB':>8} {'p50 ms':>8} {'max ms':>8} {'batch ms':>9}  parity")
+        baseline = None
+        for backend in backends:
+            with context.Pool(1) as pool:
+                try:
+                    result = pool.apply(run_one, (kind, model_name, backend, args.repeat))
+                except Exception as e:
+                    print(f"{backend:<11} failed: {e}")
+                    continue
+            if backend == 'torch':
+                baseline = result['output']
+                agreement = 'baseline'
+            else:
+                agreement = parity(kind, baseline, result['output']) if baseline else 'n/a'
+            batch = f"{result['batch_ms']:9.1f}" if result['batch_ms'] is not None else f"{'-':>9}"
+            print(f"{backend:<11} {result['load_seconds']:7.1f} {result['memory_mb']:8.0f} "
+                  f"{result['p50_ms']:8.1f} {result['max_ms']:8.1f} {batch}  {agreement}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Measure GraphBERTRecommender startup: import time, construction time and memory
+Compares the default (bert-base loaded on first use) with bert-base loaded up
+front, the way the recommender used to start. Each case runs in a fresh
+interpreter.
+
+Usage (from ai-backend/):
+    python scripts/bench_recommender_startup.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+PROBE = r"""
+import json, resource, sys, time
+sys.path.insert(0, '.')
+eager = sys.argv[1] == 'eager'
+
+def rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024 ** 2
+    except ImportError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+started = time.perf_counter()
+from app.services.graph_bert_recommender import graph_bert_recommender
+ready = time.perf_counter() - started
+if eager:
+    graph_bert_recommender.bert_model
+loaded = time.perf_counter() - started
+print(json.dumps({'import_seconds': ready, 'ready_seconds': loaded, 'rss_mb': rss_mb()}))
+"""
+
+CASES = [
+    ('lazy bert-base (default)', 'lazy', 'false'),
+    ('eager bert-base (previous)', 'eager', 'true'),
+]
+
+def main():
+    print(f"{'case':<28} {'import s':>9} {'ready s':>8} {'RSS MB':>8}")
+    for label, mode, flag in CASES:
+        env = {**os.environ, 'ENABLE_BERT_KEYWORDS': flag}
+        completed = subprocess.run(
+            [sys.executable, '-c', PROBE, mode],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            print(f"{label:<28} failed: {completed.stderr.strip().splitlines()[-1]}")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(f"{label:<28} {result['import_seconds']:9.2f} {result['ready_seconds']:8.2f} {result['rss_mb']:8.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Compare resume bio summarizers: latency, batched throughput and quality
+Quality is ROUGE-1/2/L F1 of each model's summaries against those of
+facebook/bart-large-cnn (the default), so it measures how much a faster model
+changes the summaries users see. Each model loads in a fresh process.
+
+Usage (from ai-backend/):
+    python scripts/bench_summarizers.py
+    python scripts/bench_summarizers.py --models sshleifer/distilbart-cnn-6-6 --batch-size 16
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_inference_backends import BIOS as SHORT_BIOS, _rss_mb
+
+BASELINE = 'facebook/bart-large-cnn'
+DEFAULT_MODELS = [BASELINE, 'sshleifer/distilbart-cnn-12-6', 'sshleifer/distilbart-cnn-6-6']
+
+BIOS = SHORT_BIOS + [
+    "Aspiring product designer with a background in psychology. I have run usability studies for two "
+    "campus apps, prototyped in Figma, and taught myself enough HTML and CSS to ship a portfolio site. "
+    "I want to work on accessible interfaces for healthcare and education products.",
+    "Electronics and communication student focused on embedded systems. I program STM32 and ESP32 "
+    "boards in C, designed a low-power soil moisture sensor network for a farming cooperative, and "
+    "placed second in a national hardware hackathon with a wearable fall detector.",
+    "Business analytics graduate who spent a year at a retail chain forecasting store demand with "
+    "Python and Prophet. I enjoy explaining numbers to non-technical teams, and I am preparing for "
+    "the AWS data analytics certification while mentoring juniors in SQL.",
+    "Self-taught backend developer who switched careers from accounting. I build REST APIs in Go and "
+    "Node.js, maintain a small open-source invoicing library with a few hundred stars, and contribute "
+    "documentation fixes to larger projects in the payments space.",
+    "Final-year biotechnology student applying machine learning to protein data. I fine-tuned small "
+    "transformer models on public enzyme datasets, wrote reproducible pipelines with Snakemake, and "
+    "co-authored a poster on predicting thermostability at an undergraduate research symposium.",
+]
+
+SUMMARY_ARGS = {'max_length': 100, 'min_length': 30, 'do_sample': False, 'truncation': True}
+
+def run_one(model_name, backend, batch_size, repeat):
+    """Load one summarizer and time it (runs in a child process)"""
+    from app.services.inference_backend import load_summarizer
+
+    rss_before = _rss_mb()
+    started = time.perf_counter()
+    summarizer = load_summarizer(model_name, backend)
+    load_seconds = time.perf_counter() - started
+
+    # One bio per call, as /resume/generate did
+    single = []
+    for _ in range(repeat):
+        for bio in BIOS:
+            call_started = time.perf_counter()
+            summarizer(bio, **SUMMARY_ARGS)
+            single.append(time.perf_counter() - call_started)
+    single.sort()
+
+    # The whole cohort in padded batches, as summarize_many does
+    ordered = sorted(BIOS, key=len)
+    batch_started = time.perf_counter()
+    results = summarizer(ordered, batch_size=batch_size, **SUMMARY_ARGS)
+    batch_seconds = time.perf_counter() - batch_started
+    by_bio = {bio: result['summary_text'] for bio, result in zip(ordered, results)}
+
+    return {
+        'load_seconds': load_seconds,
+        'memory_mb': _rss_mb() - rss_before,
+        'p50_ms': single[len(single) // 2] * 1000,
+        'batched_ms': batch_seconds / len(BIOS) * 1000,
+        'summaries': [by_bio[bio] for bio in BIOS],
+    }
+
+def _ngrams(words, n):
+    return [tuple(words[i:i + n]) for i in range(len(words) - n + 1)]
+
+def _f1(overlap, candidate_total, reference_total):
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / candidate_total, overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+def rouge_n(candidate, reference, n):
+    from collections import Counter
+
+    candidate_counts = Counter(_ngrams(candidate.lower().split(), n))
+    reference_counts = Counter(_ngrams(reference.lower().split(), n))
+    overlap = sum((candidate_counts & reference_counts).values())
+    return _f1(overlap, sum(candidate_counts.values()), sum(reference_counts.values()))
+
+def rouge_l(candidate, reference):
+    a, b = candidate.lower().split(), reference.lower().split()
+    previous = [0] * (len(b) + 1)
+    for word in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if word == other else max(previous[j + 1], current[j]))
+        previous = current
+    return _f1(previous[-1], len(a), len(b))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--models', nargs='+', default=DEFAULT_MODELS)
+    parser.add_argument('--backend', default=None, help='inference backend (default: INFERENCE_BACKEND)')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    models = [BASELINE] + [model for model in args.models if model != BASELINE]
+    context = multiprocessing.get_context('spawn')
+
+    print(f"📝 {len(BIOS)} bios, batch size {args.batch_size}")
+    print(f"{'model':<32} {'load s':>7} {'RSS MB':>7} {'p50 ms':>8} {'batched ms':>11} "
+          f"{'R-1':>6} {'R-2':>6} {'R-L':>6}")
+    reference = None
+    for model in models:
+        with context.Pool(1) as pool:
+            try:
+                result = pool.apply(run_one, (model, args.backend, args.batch_size, args.repeat))
+            except Exception as e:
+                print(f"{model:<32} failed: {e}")
+                continue
+
+        if model == BASELINE:
+            reference = result['summaries']
+        if reference:
+            pairs = list(zip(result['summaries'], reference))
+            scores = [sum(metric(c, r) for c, r in pairs) / len(pairs) for metric in (
+                lambda c, r: rouge_n(c, r, 1), lambda c, r: rouge_n(c, r, 2), rouge_l
+            )]
+            quality = ' '.join(f"{score:6.3f}" for score in scores)
+        else:
+            quality = f"{'n/a':>20}"
+        print(f"{model:<32} {result['load_seconds']:7.1f} {result['memory_mb']:7.0f} "
+              f"{result['p50_ms']:8.0f} {result['batched_ms']:11.0f} {quality}")
+
+if __name__ == '__main__':
+    main()
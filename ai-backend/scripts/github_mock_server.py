@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Local mock of the GitHub API used by portfolio verification
+Serves repository metadata, paged commits (with a Link header), aliased
+GraphQL repository queries, ETags / 304s and X-RateLimit-* headers, so the
+GitHub client can be exercised without network access or a real token.
+
+Usage (from ai-backend/):
+    python scripts/github_mock_server.py --port 8765
+    GITHUB_API_URL=http://127.0.0.1:8765 uvicorn main:app
+
+    python scripts/github_mock_server.py --smoke   # run the client against it and exit
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+REPOS = {
+    ('educareer', 'portfolio-demo'): {
+        'private': False, 'stars': 42, 'forks': 7, 'language': 'Python',
+        'description': 'Demo portfolio project', 'commits': 137,
+    },
+    ('educareer', 'tiny'): {
+        'private': False, 'stars': 0, 'forks': 0, 'language': 'JavaScript',
+        'description': None, 'commits': 3,
+    },
+    ('educareer', 'secret'): {
+        'private': True, 'stars': 0, 'forks': 0, 'language': None,
+        'description': None, 'commits': 12,
+    },
+}
+
+CREATED_AT = '2024-01-15T10:00:00Z'
+UPDATED_AT = '2024-06-01T12:00:00Z'
+
+class MockState:
+    """Fixtures plus the per-resource rate-limit budget"""
+
+    def __init__(self, repos, limit: int, window: int):
+        self.repos = repos
+        self.limit = limit
+        self.window = window
+        self.lock = threading.Lock()
+        self.budget = {}
+        self.requests = {'rest': 0, 'not_modified': 0, 'graphql': 0}
+
+    def rate_limit(self, resource: str, spend: int) -> dict:
+        with self.lock:
+            remaining, reset = self.budget.get(resource, (self.limit, int(time.time()) + self.window))
+            if reset <= time.time():
+                remaining, reset = self.limit, int(time.time()) + self.window
+            remaining = max(0, remaining - spend)
+            self.budget[resource] = (remaining, reset)
+        return {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Reset': str(reset),
+            'X-RateLimit-Resource': resource,
+        }
+
+    def exhausted(self, resource: str) -> bool:
+        with self.lock:
+            remaining, reset = self.budget.get(resource, (self.limit, 0))
+            return remaining <= 0 and reset > time.time()
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body=None, headers=None):
+            payload = json.dumps(body).encode() if body is not None else b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _send_conditional(self, body, extra_headers=None):
+            """200 with an ETag, or a 304 that doesn't spend rate limit"""
+            etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest() + '"'
+            if self.headers.get('If-None-Match') == etag:
+                state.requests['not_modified'] += 1
+                self._send(304, headers={'ETag': etag, **state.rate_limit('core', 0)})
+                return
+            if state.exhausted('core'):
+                self._send(403, {'message': 'API rate limit exceeded'}, state.rate_limit('core', 0))
+                return
+            state.requests['rest'] += 1
+            self._send(200, body, {'ETag': etag, **state.rate_limit('core', 1), **(extra_headers or {})})
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            match = re.fullmatch(r'/repos/([^/]+)/([^/]+)(/commits)?/?', parsed.path)
+            repo = state.repos.get(match.groups()[:2]) if match else None
+            if repo is None:
+                self._send(404, {'message': 'Not Found'}, state.rate_limit('core', 1))
+                return
+            owner, name, commits = match.groups()
+
+            if not commits:
+                self._send_conditional({
+                    'full_name': f"{owner}/{name}",
+                    'private': repo['private'],
+                    'stargazers_count': repo['stars'],
+                    'forks_count': repo['forks'],
+                    'language': repo['language'],
+                    'description': repo['description'],
+                    'created_at': CREATED_AT,
+                    'updated_at': UPDATED_AT,
+                })
+                return
+
+            query = parse_qs(parsed.query)
+            per_page = int(query.get('per_page', ['30'])[0])
+            page = int(query.get('page', ['1'])[0])
+            last_page = max(1, -(-repo['commits'] // per_page))
+            first = (page - 1) * per_page
+            body = [{'sha': f"{index:040x}"} for index in range(first, min(first + per_page, repo['commits']))]
+            base = f"http://{self.headers.get('Host')}/repos/{owner}/{name}/commits"
+            link = f'<{base}?per_page={per_page}&page={last_page}>; rel="last"' if last_page > 1 else ''
+            self._send_conditional(body, {'Link': link} if link else None)
+
+        def do_POST(self):
+            if urlparse(self.path).path.rstrip('/') != '/graphql':
+                self._send(404, {'message': 'Not Found'})
+                return
+            if not self.headers.get('Authorization'):
+                self._send(401, {'message': 'This endpoint requires you to be authenticated.'})
+                return
+            if state.exhausted('graphql'):
+                self._send(403, {'message': 'API rate limit exceeded'}, state.rate_limit('graphql', 0))
+                return
+
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            variables = request.get('variables') or {}
+            state.requests['graphql'] += 1
+            headers = state.rate_limit('graphql', 1)
+
+            data, errors = {}, []
+            index = 0
+            while f"o{index}" in variables:
+                key = (variables[f"o{index}"], variables[f"n{index}"])
+                repo = state.repos.get(key)
+                if repo is None:
+                    data[f"r{index}"] = None
+                    errors.append({'type': 'NOT_FOUND', 'path': [f"r{index}"]})
+                else:
+                    data[f"r{index}"] = {
+                        'isPrivate': repo['private'],
+                        'stargazerCount': repo['stars'],
+                        'forkCount': repo['forks'],
+                        'description': repo['description'],
+                        'createdAt': CREATED_AT,
+                        'updatedAt': UPDATED_AT,
+                        'primaryLanguage': {'name': repo['language']} if repo['language'] else None,
+                        'defaultBranchRef': {'target': {'history': {'totalCount': repo['commits']}}},
+                    }
+                index += 1
+            data['rateLimit'] = {
+                'limit': int(headers['X-RateLimit-Limit']),
+                'remaining': int(headers['X-RateLimit-Remaining']),
+                'resetAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(int(headers['X-RateLimit-Reset']))),
+            }
+            body = {'data': data}
+            if errors:
+                body['errors'] = errors
+            self._send(200, body, headers)
+
+    return Handler
+
+def start_server(port: int, repos=None, limit: int = 5000, window: int = 3600):
+    """Serve the mock on a background thread; returns (server, state)"""
+    state = MockState(repos or REPOS, limit, window)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+def synthetic_repos(count: int):
+    repos = dict(REPOS)
+    for index in range(count):
+        repos[('student', f"project-{index}")] = {
+            'private': index % 10 == 0, 'stars': index % 50, 'forks': index % 7,
+            'language': ('Python', 'JavaScript', 'Java')[index % 3],
+            'description': f"Student project {index}", 'commits': 1 + (index * 37) % 400,
+        }
+    return repos
+
+async def smoke(port: int, repos):
+    from app.services.github_client import GitHubClient, GitHubRateLimited
+    from app.services.http_client import http_client
+
+    api_url = f"http://127.0.0.1:{port}"
+    wanted = list(repos) + [('educareer', 'missing')]
+
+    graphql = GitHubClient(api_url=api_url, token='mock-token', batch_size=50)
+    started = time.perf_counter()
+    results = await graphql.fetch_repos(wanted)
+    print(f"🔎 GraphQL: {len(results)} repos in {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"budget left {graphql.remaining('graphql')}")
+    assert results[('educareer', 'portfolio-demo')]['commits'] == 137
+    assert results[('educareer', 'missing')] is None
+
+    # Re-checks: authenticated conditional REST, where 304s are free
+    rest = GitHubClient(api_url=api_url, token='mock-token')
+    sample = list(REPOS)
+    first = await rest.fetch_repos(sample, conditional=True)
+    spent = rest.remaining('core')
+    second = await rest.fetch_repos(sample, conditional=True)
+    print(f"🔁 REST: budget {spent} after first pass, {rest.remaining('core')} after conditional re-fetch")
+    assert first == second
+    assert rest.remaining('core') == spent
+    assert first[('educareer', 'portfolio-demo')]['commits'] == 137
+
+    rest.rate_limits['core'] = {'limit': 60, 'remaining': 0, 'reset': int(time.time()) + 60}
+    try:
+        await rest.fetch_repo('educareer', 'tiny')
+        print("❌ Exhausted budget was not respected")
+    except GitHubRateLimited as e:
+        print(f"⏸️  Deferred: {e}")
+
+    await http_client.close()
+    print("✅ Smoke test passed")
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the GitHub REST and GraphQL APIs")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--repos', type=int, default=0, help="Extra synthetic student repos")
+    parser.add_argument('--limit', type=int, default=5000, help="Rate limit per resource and window")
+    parser.add_argument('--window', type=int, default=3600, help="Rate limit window in seconds")
+    parser.add_argument('--smoke', action='store_true', help="Run the GitHub client against the mock and exit")
+    args = parser.parse_args()
+
+    repos = synthetic_repos(args.repos)
+    server, state = start_server(args.port, repos, args.limit, args.window)
+
+    if args.smoke:
+        try:
+            asyncio.run(smoke(args.port, repos))
+        finally:
+            server.shutdown()
+        print(f"📊 Requests served: {state.requests}")
+        return
+
+    print(f"🚀 Mock GitHub API on http://127.0.0.1:{args.port} ({len(repos)} repos)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()